@@ -1,4 +1,4 @@
-import React, { useContext, useState } from "react";
+import React, { useContext, useEffect, useState } from "react";
 import styled, { ThemeContext } from "styled-components";
 import {
   Checkbox,
@@ -13,6 +13,7 @@ import * as atoms from "../recoil/atoms";
 import * as selectors from "../recoil/selectors";
 import { SampleContext } from "../utils/context";
 import { labelTypeIsFilterable, LABEL_LISTS } from "../utils/labels";
+import { packageMessage } from "../utils/socket";
 
 import Filter from "./Filter";
 import NumericFieldFilter from "./NumericFieldFilter";
@@ -162,6 +163,20 @@ const Entry = ({ entry, onCheck, modal }) => {
     filterAtoms.fieldIsFiltered(entry.path)
   );
   const isNumericField = useRecoilValue(selectors.isNumericField(entry.path));
+  const socket = useRecoilValue(selectors.socket);
+  const filterStage = useRecoilValue(selectors.filterStage(entry.path));
+  const hasDetailedStats = useRecoilValue(
+    selectors.fieldHasDetailedStats(entry.path)
+  );
+
+  // the classes and bounds of a field are only computed once its filter is
+  // expanded or applied
+  const needsDetailedStats = expanded || Boolean(filterStage);
+  useEffect(() => {
+    needsDetailedStats &&
+      !hasDetailedStats &&
+      socket.send(packageMessage("statistics", { fields: [entry.path] }));
+  }, [needsDetailedStats, hasDetailedStats]);
 
   const handleCheck = (entry) => {
     if (onCheck) {
@@ -17,6 +17,7 @@ import {
   useEventHandler,
   useKeydownHandler,
   useResizeHandler,
+  useSampleMasks,
   useVideoData,
 } from "../utils/hooks";
 import { formatMetadata, stringify } from "../utils/labels";
@@ -252,6 +253,7 @@ const SampleModal = ({
   const [requested, requestLabels] = useVideoData(socket, sample);
   const frameData = useRecoilValue(atoms.sampleFrameData(sample._id));
   const videoLabels = useRecoilValue(atoms.sampleVideoLabels(sample._id));
+  const playerSample = useSampleMasks(socket, sample);
   useEffect(() => {
     mediaType === "video" && requested !== viewCounter && requestLabels();
   }, [requested]);
@@ -483,7 +485,7 @@ const SampleModal = ({
                 position: "relative",
                 ...playerStyle,
               }}
-              sample={sample}
+              sample={playerSample}
               keep={true}
               overlay={videoLabels}
               metadata={metadata}
@@ -110,6 +110,31 @@ function App(props: Props) {
     handleStateUpdate(state);
   });
 
+  useMessageHandler(
+    "selection",
+    ({ added, removed, clear, selected_objects }) => {
+      setSelectedSamples((prev) => {
+        const selected = new Set(clear ? [] : prev);
+        removed.forEach((_id) => selected.delete(_id));
+        added.forEach((_id) => selected.add(_id));
+        return selected;
+      });
+      setStateDescription((prev) => {
+        const selected = new Set(clear ? [] : prev.selected);
+        removed.forEach((_id) => selected.delete(_id));
+        added.forEach((_id) => selected.add(_id));
+        const state = { ...prev, selected: Array.from(selected) };
+        if (selected_objects !== undefined) {
+          state.selected_objects = selected_objects;
+        }
+        return state;
+      });
+      if (selected_objects !== undefined) {
+        setSelectedObjects(convertSelectedObjectsListToMap(selected_objects));
+      }
+    }
+  );
+
   useMessageHandler("notification", (data) => addNotification.current(data));
 
   ipcRenderer.on("update-session-config", (event, message) => {
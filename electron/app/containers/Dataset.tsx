@@ -75,9 +75,18 @@ function Dataset(props) {
   const activeOther = useRecoilValue(atoms.activeOther("sample"));
   const activeFrameOther = useRecoilValue(atoms.activeOther("frame"));
 
-  useMessageHandler("statistics", ({ stats, extended }) => {
-    extended && setExtendedDatasetStats(stats);
-    !extended && setDatasetStats(stats);
+  useMessageHandler("statistics", ({ stats, extended, fields }) => {
+    const setStats = extended ? setExtendedDatasetStats : setDatasetStats;
+    if (!fields) {
+      setStats(stats);
+      return;
+    }
+
+    // merge the detailed statistics of fields requested by the sidebar
+    setStats((current) => [
+      ...current.filter((cur) => !fields.includes(cur.name)),
+      ...stats,
+    ]);
   });
   useSendMessage("as_app", {});
 
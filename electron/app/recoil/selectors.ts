@@ -291,6 +291,15 @@ export const labelClasses = selectorFamily({
   },
 });
 
+export const fieldHasDetailedStats = selectorFamily({
+  key: "fieldHasDetailedStats",
+  get: (path: string) => ({ get }): boolean => {
+    return get(atoms.datasetStats).some(
+      (cur) => cur.name === path && cur._CLS !== COUNT_CLS
+    );
+  },
+});
+
 export const labelSampleCounts = selectorFamily({
   key: "labelSampleCounts",
   get: (dimension: string) => ({ get }) => {
@@ -123,8 +123,42 @@ export const useFastRerender = () => {
   return rerender;
 };
 
+const LABEL_CONTAINERS = ["attrs", "objects", "keypoints", "polylines"];
+
+// Frame labels are streamed without the sample-level labels of the video,
+// which are added to every frame here
+const addSampleLabels = (frameLabels, sampleLabels, frameNumber) => {
+  const merged = { ...frameLabels, frame_number: frameNumber };
+  for (const key of LABEL_CONTAINERS) {
+    if (!sampleLabels[key]) continue;
+    let items = sampleLabels[key][key];
+    if (key === "objects") {
+      items = items.map((obj) => ({ ...obj, frame_number: frameNumber }));
+    }
+    const current = frameLabels[key] ? frameLabels[key][key] : [];
+    merged[key] = { [key]: [...current, ...items] };
+  }
+  if (sampleLabels.mask && !merged.mask) {
+    merged.mask = sampleLabels.mask;
+  }
+  return merged;
+};
+
+// Frames without frame labels only show the sample-level labels, which are
+// built when a frame is read rather than stored for every frame of the video
+const makeFrameLabels = (frameLabels, sampleLabels, frameCount) =>
+  new Proxy(frameLabels, {
+    get: (target, key) => {
+      if (key in target || typeof key !== "string") return target[key];
+      const frameNumber = Number(key);
+      if (!Number.isInteger(frameNumber)) return undefined;
+      if (frameNumber < 1 || frameNumber > frameCount) return undefined;
+      return addSampleLabels({}, sampleLabels, frameNumber);
+    },
+  });
+
 export const useVideoData = (socket, sample, callback = null) => {
-  const { _id: sampleId, filepath } = sample;
+  const { _id: sampleId } = sample;
   const [requested, setRequested] = useRecoilState(
     atoms.sampleVideoDataRequested(sampleId)
   );
@@ -137,17 +171,52 @@ export const useVideoData = (socket, sample, callback = null) => {
     (...args) => {
       if (requested !== viewCounter) {
         setRequested(viewCounter);
-        const event = `video_data-${sampleId}`;
-        const handler = ({ labels, frames, fps }) => {
+        const event = `frame_labels-${sampleId}`;
+        let sampleLabels = {};
+        let frameCount = 0;
+        const frames = [];
+        const frameLabels = {};
+        const handler = ({ data }) => {
+          data = JSON.parse(data);
+          if (data.type !== event) return;
+          if (data.error) {
+            socket.removeEventListener("message", handler);
+            callback && callback(null, ...args);
+            return;
+          }
+          if (data.sample_labels !== undefined) {
+            // The first chunk describes the video
+            sampleLabels = data.sample_labels;
+            frameCount = data.frame_count;
+            setFrameRate(data.fps);
+          }
+          for (const [key, value] of Object.entries(data.labels.frames || {})) {
+            const frameNumber = Number(key);
+            frameLabels[frameNumber] = addSampleLabels(
+              value,
+              sampleLabels,
+              frameNumber
+            );
+          }
+          frames.push(...data.frames);
+
+          // Labels are shown as their chunks arrive
+          const labels = {
+            frames: makeFrameLabels(
+              { ...frameLabels },
+              sampleLabels,
+              frameCount
+            ),
+          };
           setVideoLabels(labels);
-          setFrameData(frames);
-          setFrameRate(fps);
+          setFrameData([...frames]);
+          if (data.more) return;
+
+          socket.removeEventListener("message", handler);
           callback && callback({ labels, frames }, ...args);
         };
-        attachDisposableHandler(socket, event, handler);
-        socket.send(
-          packageMessage("get_video_data", { _id: sampleId, filepath })
-        );
+        socket.addEventListener("message", handler);
+        socket.send(packageMessage("get_frame_labels", { _id: sampleId }));
       } else {
         callback && callback(null, ...args);
       }
@@ -155,6 +224,43 @@ export const useVideoData = (socket, sample, callback = null) => {
   ];
 };
 
+const setPathValue = (obj, keys, value) => {
+  if (!keys.length) {
+    return value;
+  }
+  const [key, ...rest] = keys;
+  const copy = Array.isArray(obj) ? [...obj] : { ...obj };
+  copy[key] = setPathValue(obj[key], rest, value);
+  return copy;
+};
+
+// Pages carry downsampled segmentation masks, so the full resolution masks
+// of an expanded sample are requested separately
+export const useSampleMasks = (socket, sample) => {
+  const [result, setResult] = useState(null);
+  const viewCounter = useRecoilValue(atoms.viewCounter);
+  useEffect(() => {
+    const sampleId = sample._id;
+    const event = `sample_masks-${sampleId}`;
+    attachDisposableHandler(socket, event, ({ masks }) =>
+      setResult({ sampleId, viewCounter, masks })
+    );
+    socket.send(packageMessage("get_sample_masks", { _id: sampleId }));
+  }, [sample._id, viewCounter]);
+
+  if (
+    !result ||
+    result.sampleId !== sample._id ||
+    result.viewCounter !== viewCounter
+  ) {
+    return sample;
+  }
+  return Object.entries(result.masks).reduce(
+    (acc, [path, mask]) => setPathValue(acc, path.split("."), mask),
+    sample
+  );
+};
+
 export const useWindowSize = () => {
   const [windowSize, setWindowSize] = useState({
     width: undefined,
@@ -33,6 +33,21 @@ def _ping(url):
     requests.get(url)
 
 
+def _apply_selection(state, delta):
+    # Applies a coalesced selection message from the server to the state
+    if delta.get("clear", False):
+        selected = set()
+    else:
+        selected = set(state.selected)
+
+    selected.difference_update(delta.get("removed", []))
+    selected.update(delta.get("added", []))
+    state.selected = list(selected)
+
+    if "selected_objects" in delta:
+        state.selected_objects = delta["selected_objects"]
+
+
 class HasClient(object):
 
     _HC_NAMESPACE = None
@@ -83,6 +98,8 @@ class HasClient(object):
                 event = message.pop("type")
                 if event == "update":
                     self._data = self._HC_ATTR_TYPE.from_dict(message["state"])
+                if event == "selection" and self._data is not None:
+                    _apply_selection(self._data, message)
                 if event == "notification":
                     self.on_notification(message)
 
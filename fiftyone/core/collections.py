@@ -5,24 +5,35 @@ Base classes for collections of samples.
 | `voxel51.com <https://voxel51.com/>`_
 |
 """
+from concurrent.futures import ThreadPoolExecutor
 import inspect
 import logging
+import multiprocessing
 import os
 import random
 import string
 
+from bson import ObjectId
+import numpy as np
+from pymongo import UpdateOne
+
 import eta.core.serial as etas
 import eta.core.utils as etau
 
+import fiftyone as fo
 from fiftyone.core.aggregations import Aggregation
+import fiftyone.core.expressions as foe
 import fiftyone.core.fields as fof
 import fiftyone.core.labels as fol
 import fiftyone.core.media as fom
+import fiftyone.core.metadata as fomt
+import fiftyone.core.odm as foo
 from fiftyone.core.odm.frame import DatasetFrameSampleDocument
 from fiftyone.core.odm.sample import (
     DatasetSampleDocument,
     default_sample_fields,
 )
+import fiftyone.core.sample as fosa
 import fiftyone.core.stages as fos
 import fiftyone.core.utils as fou
 
@@ -33,6 +44,13 @@ foud = fou.lazy_import("fiftyone.utils.data")
 logger = logging.getLogger(__name__)
 
 
+# The number of operations per ``bulk_write()`` call
+_BULK_WRITE_BATCH_SIZE = 10000
+
+# The number of samples per prefetched batch when no cursor batch size is set
+_DEFAULT_PREFETCH_BATCH_SIZE = 100
+
+
 def _make_registrar():
     """Makes a decorator that keeps a registry of all functions decorated by
     it.
@@ -171,17 +189,172 @@ class SampleCollection(object):
         if len(aggregations) == 0:
             return []
         # pylint: disable=no-member
+        collection = self._aggregation_collection
         pipeline = self._pipeline(
             pipeline=facets, attach_frames=_attach_frames
         )
+        self._dataset._index_advisor.record(pipeline)
         try:
-            # pylint: disable=no-member
-            result = next(self._dataset._sample_collection.aggregate(pipeline))
+            result = next(collection.aggregate(pipeline))
         except StopIteration:
             pass
 
         return self._process_aggregations(aggregations, result, scalar_result)
 
+    def explain(self, pipeline=None):
+        """Returns the MongoDB explain plan of the (optimized) aggregation
+        pipeline that defines the collection.
+
+        Examples::
+
+            import fiftyone as fo
+            from fiftyone import ViewField as F
+
+            dataset = fo.load_dataset(...)
+
+            view = dataset.sort_by("filepath").match(F("uniqueness") > 0.5)
+
+            # The `$match` stage is executed before the `$sort` stage
+            print(view.explain()["stages"])
+
+        Args:
+            pipeline (None): an optional list of additional aggregation stages
+                to append to the pipeline
+
+        Returns:
+            the explain plan dict
+        """
+        # pylint: disable=no-member
+        collection = self._aggregation_collection
+        _pipeline = self._pipeline(pipeline=pipeline)
+        return foo.get_db_conn().command(
+            "aggregate", collection.name, pipeline=_pipeline, explain=True,
+        )
+
+    def values(self, field_path, unwind=False, as_numpy=False):
+        """Extracts the values of the given field or embedded field path from
+        all samples in the collection.
+
+        The values are extracted by a projected aggregation whose results are
+        returned directly, without constructing
+        :class:`fiftyone.core.sample.Sample` instances.
+
+        Paths that traverse list fields, such as
+        ``"ground_truth.detections.label"``, return one list of values per
+        sample, unless ``unwind`` is True, in which case the values are
+        flattened into a single list.
+
+        Examples::
+
+            import fiftyone as fo
+
+            dataset = fo.load_dataset(...)
+
+            #
+            # Get the uniqueness of each sample as a numpy array
+            #
+
+            uniqueness = dataset.values("uniqueness", as_numpy=True)
+
+            #
+            # Get the labels of the detections in each sample
+            #
+
+            labels = dataset.values("ground_truth.detections.label")
+
+            #
+            # Get the confidences of all detections in a view
+            #
+
+            view = dataset.match_tag("test")
+            confs = view.values(
+                "predictions.detections.confidence", unwind=True
+            )
+
+        Args:
+            field_path: a field or ``embedded.field.name``. IDs can be
+                extracted via ``"id"`` or paths like
+                ``"ground_truth.detections.id"``. For video datasets, frame
+                fields can be extracted via ``"frames.<field>"``
+            unwind (False): whether to flatten all list fields traversed by
+                the path (including the field itself, if it is a list)
+            as_numpy (False): whether to return the values as a numpy array.
+                When the path traverses list fields and ``unwind`` is False,
+                a list containing one array per sample is returned
+
+        Returns:
+            a list or numpy array of values
+        """
+        path, list_fields, field = self._parse_field_path(field_path)
+
+        pipeline = []
+        if unwind:
+            for list_field in list_fields:
+                pipeline.append({"$unwind": "$" + list_field})
+
+            if isinstance(field, fof.ListField):
+                pipeline.append({"$unwind": "$" + path})
+                field = field.field
+
+            expr = "$" + path
+            depth = 0
+        else:
+            # Use `$map` rather than array traversal so that elements that
+            # are missing the field yield `None` rather than being omitted
+            expr = _make_values_expr(path, list_fields)
+            depth = len(list_fields)
+
+        pipeline.append({"$project": {"_id": False, "value": expr}})
+
+        values = [d.get("value", None) for d in self._aggregate(pipeline)]
+
+        convert = _get_value_parser(path, field)
+        if convert is not None:
+            values = _apply_at_depth(values, convert, depth)
+
+        if as_numpy:
+            if depth > 0:
+                return [np.asarray(v) if v is not None else v for v in values]
+
+            return np.asarray(values)
+
+        return values
+
+    def _parse_field_path(self, field_path):
+        # pylint: disable=no-member
+        if self.media_type == fom.VIDEO and field_path.startswith("frames."):
+            schema = self.get_frame_field_schema(include_private=True)
+            field_path = field_path[len("frames.") :]
+            prefix = "frames."
+            list_fields = ["frames"]
+        else:
+            schema = self.get_field_schema(include_private=True)
+            prefix = ""
+            list_fields = []
+
+        field = None
+        chunks = []
+        for chunk in field_path.split("."):
+            if chunk == "id":
+                chunk = "_id"
+
+            if not chunks:
+                field = schema.get(chunk, None)
+            else:
+                if isinstance(field, fof.ListField):
+                    list_fields.append(prefix + ".".join(chunks))
+                    field = field.field
+
+                if isinstance(field, fof.EmbeddedDocumentField):
+                    # pylint: disable=protected-access
+                    field = field.document_type._fields.get(chunk, None)
+                else:
+                    field = None
+
+            chunks.append(chunk)
+
+        return prefix + ".".join(chunks), list_fields, field
+
     async def _async_aggregate(self, coll, aggregations):
         scalar_result, aggregations, facets = self._build_aggregation(
             aggregations
@@ -189,8 +362,12 @@ class SampleCollection(object):
         if not aggregations:
             return []
 
+        # The view may be served by a materialized collection in the same
+        # database as the given collection
         # pylint: disable=no-member
+        coll = coll.database[self._aggregation_collection.name]
         pipeline = self._pipeline(pipeline=facets)
+        self._dataset._index_advisor.record(pipeline)
         try:
             # pylint: disable=no-member
             result = await coll.aggregate(pipeline).to_list(1)
@@ -263,15 +440,106 @@ class SampleCollection(object):
         """
         return [s for s in self[-num_samples:]]
 
-    def iter_samples(self):
+    def iter_samples(
+        self, fields=None, readonly=False, batch_size=None, prefetch=None
+    ):
         """Returns an iterator over the samples in the collection.
 
+        Args:
+            fields (None): an optional field name or iterable of field names to
+                load. If provided, only these fields (and the default sample
+                fields) are fetched from the database
+            readonly (False): whether to return lightweight, read-only
+                :class:`fiftyone.core.sample.SampleRecord` instances rather
+                than full samples. This avoids the cost of constructing
+                backing documents for each sample and is recommended when
+                the samples will not be modified
+            batch_size (None): the number of samples to fetch from the
+                database per round trip. By default,
+                ``fiftyone.config.default_cursor_batch_size`` is used, and
+                the database's default batching is used if that is ``None``
+            prefetch (None): the number of batches of samples to fetch and
+                decode in a background thread while the current samples are
+                being processed. By default,
+                ``fiftyone.config.default_cursor_prefetch`` is used. If zero,
+                no prefetching is performed
+
         Returns:
-            an iterator over :class:`fiftyone.core.sample.Sample` or
-            :class:`fiftyone.core.sample.SampleView` instances
+            an iterator over :class:`fiftyone.core.sample.Sample`,
+            :class:`fiftyone.core.sample.SampleView`, or
+            :class:`fiftyone.core.sample.SampleRecord` instances
         """
         raise NotImplementedError("Subclass must implement iter_samples()")
 
+    def iter_dicts(self, fields=None, batch_size=None, prefetch=None):
+        """Returns an iterator over the raw database dicts of the samples in
+        the collection.
+
+        No deserialization is performed, so field values are returned in
+        their database representation. For example, labels are returned as
+        dicts and sample IDs are returned as ``ObjectId`` instances. For video
+        collections, the frames of each sample are included as a list of dicts
+        in its ``frames`` key.
+
+        Args:
+            fields (None): an optional field name or iterable of field names to
+                load. If provided, only these fields (and the default sample
+                fields) are fetched from the database
+            batch_size (None): the number of samples to fetch from the
+                database per round trip. See :meth:`iter_samples`
+            prefetch (None): the number of batches of samples to fetch in a
+                background thread. See :meth:`iter_samples`
+
+        Returns:
+            an iterator over dicts
+        """
+        if fields is not None:
+            return self.select_fields(fields).iter_dicts(
+                batch_size=batch_size, prefetch=prefetch
+            )
+
+        batch_size, prefetch = self._parse_cursor_params(batch_size, prefetch)
+        dicts = self._aggregate(batch_size=batch_size, record_query=True)
+        return self._prefetch(dicts, batch_size, prefetch)
+
+    def save_context(self, batch_size=1000):
+        """Returns a context manager that batches the database writes issued
+        by :meth:`fiftyone.core.sample.Sample.save` calls on samples in this
+        collection.
+
+        Within the context, the ``$set`` and ``$unset`` updates generated by
+        saving samples (and their frames, for video datasets) are buffered
+        and flushed to the database via ``bulk_write()`` in batches of
+        ``batch_size`` operations, rather than requiring one round trip per
+        sample. Any remaining updates are flushed when the context exits.
+
+        Example usage::
+
+            import fiftyone.zoo as foz
+
+            dataset = foz.load_zoo_dataset("quickstart")
+
+            with dataset.save_context():
+                for sample in dataset:
+                    sample["random"] = random.random()
+                    sample.save()
+
+        Note that buffered updates are not visible to database reads (e.g.,
+        aggregations) until they are flushed.
+
+        Args:
+            batch_size (1000): the number of buffered operations that triggers
+                a flush to the database
+
+        Returns:
+            a :class:`fiftyone.core.odm.BulkWriter`
+        """
+        dataset = self._dataset
+        return foo.BulkWriter(
+            [dataset._sample_collection_name, dataset._frame_collection_name],
+            batch_size=batch_size,
+        )
+
     def get_field_schema(
         self, ftype=None, embedded_doc_type=None, include_private=False
     ):
@@ -474,19 +742,251 @@ class SampleCollection(object):
         """
         raise NotImplementedError("Subclass must implement get_tags()")
 
-    def compute_metadata(self, overwrite=False):
+    def compute_metadata(self, overwrite=False, num_workers=None):
         """Populates the ``metadata`` field of all samples in the collection.
 
         Any samples with existing metadata are skipped, unless
         ``overwrite == True``.
 
+        The metadata of the samples is computed in parallel by a pool of worker
+        threads and written to the database via batched ``bulk_write()``
+        operations. Only the headers of image files are read.
+
         Args:
             overwrite (False): whether to overwrite existing metadata
+            num_workers (None): the number of worker threads to use. By
+                default, ``multiprocessing.cpu_count()`` is used
         """
-        with fou.ProgressBar() as pb:
-            for sample in pb(self):
-                if sample.metadata is None or overwrite:
-                    sample.compute_metadata()
+        if num_workers is None:
+            num_workers = multiprocessing.cpu_count()
+
+        if overwrite:
+            view = self
+        else:
+            view = self.exists("metadata", False)
+
+        pipeline = [{"$project": {"filepath": True, "_media_type": True}}]
+        tasks = [
+            (d["_id"], d["filepath"], d.get("_media_type", None))
+            for d in view._aggregate(pipeline=pipeline, attach_frames=False)
+        ]
+
+        if not tasks:
+            return
+
+        dataset = self._dataset
+        field = dataset.get_field_schema()["metadata"]
+
+        with fou.ProgressBar(total=len(tasks)) as pb:
+            with ThreadPoolExecutor(max_workers=num_workers) as executor:
+                for batch in fou.iter_batches(tasks, _BULK_WRITE_BATCH_SIZE):
+                    ops = []
+                    for sample_id, metadata in executor.map(
+                        _compute_metadata, batch
+                    ):
+                        value = field.to_mongo(metadata)
+                        ops.append(
+                            UpdateOne(
+                                {"_id": sample_id},
+                                {"$set": {"metadata": value}},
+                            )
+                        )
+
+                    dataset._sample_collection.bulk_write(ops, ordered=False)
+                    pb.update(count=len(batch))
+
+        dataset._mark_modified()
+        fosa.Sample._reload_dataset_samples(dataset._sample_collection_name)
+
+    def set_values(self, field_name, values, expand_schema=True):
+        """Sets the field or embedded field on each sample in the collection to
+        the given values.
+
+        The values are written directly to the database via batched
+        ``bulk_write()`` operations, without loading any
+        :class:`fiftyone.core.sample.Sample` instances.
+
+        Examples::
+
+            import random
+
+            import fiftyone as fo
+
+            dataset = fo.load_dataset(...)
+
+            #
+            # Populate a `random` field on all samples, in order
+            #
+
+            values = [random.random() for _ in range(len(dataset))]
+            dataset.set_values("random", values)
+
+            #
+            # Populate the field for specific samples, by ID
+            #
+
+            view = dataset.take(10)
+            dataset.set_values("random", {s.id: 0.5 for s in view})
+
+        Args:
+            field_name: a field or ``embedded.field.name``
+            values: an iterable of values, one for each sample in the
+                collection, in the order that the samples are iterated, or a
+                dict mapping sample IDs to values
+            expand_schema (True): whether to dynamically add ``field_name`` to
+                the dataset schema if it is a new top-level field. If False,
+                an error is raised if the field does not exist
+
+        Raises:
+            ValueError: if the number of values does not match the number of
+                samples in the collection, or if the field does not exist and
+                cannot be added
+        """
+        if isinstance(values, dict):
+            sample_ids = list(values.keys())
+            values = list(values.values())
+        else:
+            sample_ids = self._get_sample_ids()
+            values = list(values)
+            if len(values) != len(sample_ids):
+                raise ValueError(
+                    "Found %d values for %d samples"
+                    % (len(values), len(sample_ids))
+                )
+
+        field = self._get_or_create_field(field_name, values, expand_schema)
+
+        ops = []
+        for sample_id, value in zip(sample_ids, values):
+            if field is not None and value is not None:
+                field.validate(value)
+                value = field.to_mongo(value)
+            else:
+                value = _to_mongo_value(value)
+
+            ops.append(
+                UpdateOne(
+                    {"_id": ObjectId(sample_id)}, {"$set": {field_name: value}}
+                )
+            )
+
+        dataset = self._dataset
+        for batch in fou.iter_batches(ops, _BULK_WRITE_BATCH_SIZE):
+            dataset._sample_collection.bulk_write(list(batch), ordered=False)
+
+        dataset._mark_modified()
+        fosa.Sample._reload_dataset_samples(dataset._sample_collection_name)
+
+    def set_field(self, field_name, expr):
+        """Sets the field or embedded field on each sample in the collection to
+        the result of the given expression.
+
+        The expression is evaluated by the database, so only the IDs of the
+        samples and the computed values are transferred to and from Python.
+
+        Examples::
+
+            import fiftyone as fo
+            from fiftyone import ViewField as F
+
+            dataset = fo.load_dataset(...)
+
+            #
+            # Store the number of ground truth objects in each sample
+            #
+
+            dataset.set_field(
+                "num_objects", F("ground_truth.detections").length()
+            )
+
+            #
+            # Set the `reviewed` field of all samples in a view
+            #
+
+            view = dataset.match_tag("validation")
+            view.set_field("reviewed", True)
+
+        Args:
+            field_name: a field or ``embedded.field.name``
+            expr: a :class:`fiftyone.core.expressions.ViewExpression` or
+                `MongoDB expression <https://docs.mongodb.com/manual/meta/aggregation-quick-reference/#aggregation-expressions>`_
+                that defines the field value to set. Field references in the
+                expression are evaluated relative to the samples in this
+                collection
+        """
+        if isinstance(expr, foe.ViewExpression):
+            expr = expr.to_mongo()
+
+        dataset = self._dataset
+        root = field_name.split(".", 1)[0]
+        is_new_field = root not in dataset.get_field_schema(
+            include_private=True
+        )
+        if is_new_field and "." in field_name:
+            raise ValueError("Field '%s' does not exist" % root)
+
+        self._set_field(field_name, expr)
+
+        if is_new_field:
+            # Infer the field's type from the values that were written
+            d = dataset._sample_collection.find_one(
+                {field_name: {"$ne": None}}, {field_name: True}
+            )
+            if d is not None:
+                value = d[field_name]
+                if isinstance(value, dict) and "_cls" in value:
+                    value = getattr(fo, value["_cls"]).from_dict(value)
+
+                dataset._sample_doc_cls.add_implied_field(field_name, value)
+
+        fosa.Sample._reload_dataset_samples(dataset._sample_collection_name)
+
+    def _set_field(self, field_name, expr):
+        dataset = self._dataset
+        pipeline = [
+            # `$addFields` rather than `$project` so that literal values like
+            # `0` and `True` are not interpreted as inclusion flags
+            {"$addFields": {"_value": expr}},
+            {"$project": {"_value": True}},
+        ]
+
+        # A `$merge` into the collection being aggregated would avoid the
+        # round trip, but it requires MongoDB 4.4
+        ops = _iter_set_field_ops(
+            self._aggregate(
+                pipeline=pipeline, batch_size=_BULK_WRITE_BATCH_SIZE
+            ),
+            field_name,
+        )
+        for batch in fou.iter_batches(ops, _BULK_WRITE_BATCH_SIZE):
+            dataset._sample_collection.bulk_write(list(batch), ordered=False)
+
+        dataset._mark_modified()
+
+    def _get_sample_ids(self):
+        pipeline = [{"$project": {"_id": True}}]
+        return [str(d["_id"]) for d in self._aggregate(pipeline=pipeline)]
+
+    def _get_or_create_field(self, field_name, values, expand_schema):
+        dataset = self._dataset
+        schema = dataset.get_field_schema(include_private=True)
+
+        root = field_name.split(".", 1)[0]
+        if root in schema:
+            return schema.get(field_name, None)
+
+        if not expand_schema or "." in field_name:
+            raise ValueError("Field '%s' does not exist" % root)
+
+        value = next((v for v in values if v is not None), None)
+        if value is None:
+            raise ValueError(
+                "Cannot infer the type of new field '%s' because all values "
+                "are None" % field_name
+            )
+
+        dataset._sample_doc_cls.add_implied_field(field_name, value)
+        return dataset.get_field_schema(include_private=True)[field_name]
 
     @classmethod
     def list_view_stages(cls):
@@ -1766,6 +2266,36 @@ class SampleCollection(object):
         """
         raise NotImplementedError("Subclass must implement make_index()")
 
+    def list_indexes(self):
+        """Returns the list of fields on which the collection has database
+        indexes.
+
+        Returns:
+            a list of field names
+        """
+        raise NotImplementedError("Subclass must implement list_indexes()")
+
+    def ensure_indexes(self, fields=None, min_count=10, create=False):
+        """Recommends, and optionally creates, database indexes on the given
+        fields.
+
+        If no fields are provided, indexes are recommended for the fields that
+        have most frequently been filtered or sorted on.
+
+        Args:
+            fields (None): an optional field or iterable of fields to index
+            min_count (10): the minimum number of times that a field must have
+                been filtered or sorted on to be indexed when no ``fields`` are
+                provided
+            create (False): whether to create the missing indexes. By default,
+                the fields that need an index are only returned
+
+        Returns:
+            the list of fields that lack an index, on which indexes were
+            created if ``create`` is True
+        """
+        raise NotImplementedError("Subclass must implement ensure_indexes()")
+
     def to_dict(self, rel_dir=None, frame_labels_dir=None, pretty_print=False):
         """Returns a JSON dictionary representation of the collection.
 
@@ -1921,7 +2451,13 @@ class SampleCollection(object):
         raise NotImplementedError("Subclass must implement _add_view_stage()")
 
     def _aggregate(
-        self, pipeline=None, hide_frames=False, squash_frames=False
+        self,
+        pipeline=None,
+        hide_frames=False,
+        squash_frames=False,
+        attach_frames=True,
+        batch_size=None,
+        record_query=False,
     ):
         """Runs the MongoDB aggregation pipeline on the collection and returns
         the result.
@@ -1930,12 +2466,50 @@ class SampleCollection(object):
             pipeline (None): a MongoDB aggregation pipeline (list of dicts)
             hide_frames (False): whether to hide frames in the result
             squash_frames (False): whether to squash frames in the result
+            attach_frames (True): whether to attach frames to the result
+            batch_size (None): an optional cursor batch size to use
+            record_query (False): whether to record the fields on which the
+                pipeline filters and sorts with the index advisor of the
+                dataset
 
         Returns:
             the aggregation result dict
         """
         raise NotImplementedError("Subclass must implement _aggregate()")
 
+    def _iter_sample_records(self, batch_size=None):
+        schema = self.get_field_schema(include_private=True)
+        if self.media_type == fom.VIDEO:
+            frame_schema = self.get_frame_field_schema(include_private=True)
+        else:
+            frame_schema = None
+
+        for d in self._aggregate(
+            hide_frames=True, batch_size=batch_size, record_query=True
+        ):
+            yield fosa.SampleRecord.from_dict(
+                d, schema, frame_schema=frame_schema
+            )
+
+    def _parse_cursor_params(self, batch_size, prefetch):
+        if batch_size is None:
+            batch_size = fo.config.default_cursor_batch_size
+
+        if prefetch is None:
+            prefetch = fo.config.default_cursor_prefetch
+
+        return batch_size, prefetch
+
+    def _prefetch(self, iterable, batch_size, prefetch):
+        if not prefetch:
+            return iter(iterable)
+
+        return fou.iter_prefetched(
+            iterable,
+            prefetch,
+            batch_size=batch_size or _DEFAULT_PREFETCH_BATCH_SIZE,
+        )
+
     def _attach_frames(self, hide_frames=False):
         key = "_frames" if hide_frames else "frames"
 
@@ -1965,6 +2539,85 @@ class SampleCollection(object):
         return {field_name: str(field) for field_name, field in schema.items()}
 
 
+def _compute_metadata(task):
+    sample_id, filepath, media_type = task
+    return sample_id, fomt.build_for(filepath, media_type=media_type)
+
+
+def _get_value_parser(path, field):
+    if path == "_id" or path.endswith("._id"):
+        return str
+
+    if isinstance(field, fof.ObjectIdField):
+        return str
+
+    if isinstance(
+        field,
+        (
+            fof.EmbeddedDocumentField,
+            fof.VectorField,
+            fof.ArrayField,
+            fof.DictField,
+        ),
+    ):
+        return field.to_python
+
+    if isinstance(field, fof.ListField) and isinstance(
+        field.field, fof.EmbeddedDocumentField
+    ):
+        return field.to_python
+
+    return None
+
+
+def _make_values_expr(path, list_fields, prefix="$", level=0):
+    if not list_fields:
+        return prefix + path
+
+    list_field = list_fields[0]
+    n = len(list_field) + 1
+    var = "elem%d" % level
+
+    return {
+        "$map": {
+            "input": prefix + list_field,
+            "as": var,
+            "in": _make_values_expr(
+                path[n:],
+                [f[n:] for f in list_fields[1:]],
+                prefix="$$%s." % var,
+                level=level + 1,
+            ),
+        }
+    }
+
+
+def _apply_at_depth(values, fcn, depth):
+    if depth == 0:
+        return [fcn(v) if v is not None else None for v in values]
+
+    return [
+        _apply_at_depth(v, fcn, depth - 1) if v is not None else None
+        for v in values
+    ]
+
+
+def _to_mongo_value(value):
+    if hasattr(value, "to_mongo"):
+        return value.to_mongo()
+
+    if isinstance(value, np.generic):
+        return value.item()
+
+    if isinstance(value, (list, tuple)):
+        return [_to_mongo_value(v) for v in value]
+
+    if isinstance(value, dict):
+        return {k: _to_mongo_value(v) for k, v in value.items()}
+
+    return value
+
+
 def _get_random_characters(n):
     return "".join(
         random.choice(string.ascii_lowercase + string.digits) for _ in range(n)
@@ -2229,3 +2882,17 @@ def _get_field_with_type(label_fields, label_cls):
             return field
 
     return None
+
+
+def _iter_set_field_ops(cursor, field_name):
+    # The cursor reads the collection while it is being updated, so samples
+    # that it returns more than once must only be updated the first time
+    seen_ids = set()
+    for d in cursor:
+        if d["_id"] in seen_ids:
+            continue
+
+        seen_ids.add(d["_id"])
+        yield UpdateOne(
+            {"_id": d["_id"]}, {"$set": {field_name: d.get("_value", None)}}
+        )
@@ -14,7 +14,7 @@ except ImportError:
     import importlib_metadata  # Python < 3.8
 
 import eta
-from eta.core.config import EnvConfig
+from eta.core.config import EnvConfig, EnvConfigError
 
 import fiftyone as fo
 import fiftyone.constants as foc
@@ -57,6 +57,18 @@ class FiftyOneConfig(EnvConfig):
             env_var="FIFTYONE_DEFAULT_VIDEO_EXT",
             default=".mp4",
         )
+        self.default_cursor_batch_size = self.parse_int(
+            d,
+            "default_cursor_batch_size",
+            env_var="FIFTYONE_DEFAULT_CURSOR_BATCH_SIZE",
+            default=None,
+        )
+        self.default_cursor_prefetch = self.parse_int(
+            d,
+            "default_cursor_prefetch",
+            env_var="FIFTYONE_DEFAULT_CURSOR_PREFETCH",
+            default=0,
+        )
         self._show_progress_bars = None  # declare
         self.show_progress_bars = self.parse_bool(
             d,
@@ -103,6 +115,21 @@ class FiftyOneConfig(EnvConfig):
         if self.default_ml_backend is not None:
             self.default_ml_backend = self.default_ml_backend.lower()
 
+        if (
+            self.default_cursor_batch_size is not None
+            and self.default_cursor_batch_size <= 0
+        ):
+            raise EnvConfigError(
+                "default_cursor_batch_size must be a positive integer; found "
+                "%d" % self.default_cursor_batch_size
+            )
+
+        if self.default_cursor_prefetch < 0:
+            raise EnvConfigError(
+                "default_cursor_prefetch must be a non-negative integer; found "
+                "%d" % self.default_cursor_prefetch
+            )
+
 
 def load_config():
     """Loads the FiftyOne config.
@@ -5,6 +5,8 @@ FiftyOne datasets.
 | `voxel51.com <https://voxel51.com/>`_
 |
 """
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from copy import deepcopy
 import datetime
 import fnmatch
@@ -15,8 +17,9 @@ import os
 import random
 import reprlib
 import string
+import threading
 
-from bson import ObjectId
+from bson import BSON, ObjectId
 from mongoengine.errors import DoesNotExist, FieldDoesNotExist
 from pymongo.errors import BulkWriteError
 
@@ -29,11 +32,13 @@ from fiftyone.constants import VERSION
 import fiftyone.core.collections as foc
 import fiftyone.core.fields as fof
 import fiftyone.core.frame as fofr
+import fiftyone.core.indexes as foi
 import fiftyone.core.labels as fol
 import fiftyone.core.media as fom
 from fiftyone.migrations import get_migration_runner
 import fiftyone.core.odm as foo
 import fiftyone.core.odm.sample as foos
+import fiftyone.core.optimizer as foop
 import fiftyone.core.sample as fos
 from fiftyone.core.singleton import DatasetSingleton
 import fiftyone.core.view as fov
@@ -45,6 +50,18 @@ import fiftyone.utils.data as foud
 logger = logging.getLogger(__name__)
 
 
+# Target latency, in seconds, of each batch inserted by `add_samples()`
+_ADD_SAMPLES_TARGET_LATENCY = 0.2
+
+# Target BSON size, in bytes, of each batch inserted by `add_samples()`. This
+# is comfortably below MongoDB's 48MB maximum message size
+_ADD_SAMPLES_TARGET_BSON_SIZE = 16 * 1024 ** 2
+
+# Maximum number of samples per batch when `add_samples()` prepares batches in
+# worker threads, which bounds the number of samples buffered in memory
+_ADD_SAMPLES_MAX_PIPELINED_BATCH_SIZE = 1000
+
+
 def list_datasets():
     """Returns the list of available FiftyOne datasets.
 
@@ -227,6 +244,8 @@ class Dataset(foc.SampleCollection, metaclass=DatasetSingleton):
             ) = _load_dataset(name)
 
         self._deleted = False
+        self._modification_count = 0
+        self._index_advisor = foi.IndexAdvisor()
 
     def __len__(self):
         return self.aggregate(foa.Count()).count
@@ -605,6 +624,8 @@ class Dataset(foc.SampleCollection, metaclass=DatasetSingleton):
             field_name: the field name
             new_field_name: the new field name
         """
+        self._mark_modified()
+
         if "." in field_name:
             self._sample_doc_cls.rename_embedded_field(
                 field_name, new_field_name
@@ -628,6 +649,8 @@ class Dataset(foc.SampleCollection, metaclass=DatasetSingleton):
             field_name: the field name
             new_field_name: the new field name
         """
+        self._mark_modified()
+
         if self.media_type != fom.VIDEO:
             raise ValueError("Only video datasets have frame fields")
 
@@ -656,6 +679,8 @@ class Dataset(foc.SampleCollection, metaclass=DatasetSingleton):
         Raises:
             AttributeError: if the field does not exist
         """
+        self._mark_modified()
+
         if "." in field_name:
             raise ValueError(
                 "Use `delete_sample_field()` to clear embedded sample fields"
@@ -677,6 +702,8 @@ class Dataset(foc.SampleCollection, metaclass=DatasetSingleton):
         Raises:
             AttributeError: if the field does not exist
         """
+        self._mark_modified()
+
         if self.media_type != fom.VIDEO:
             raise ValueError("Only video datasets have frame fields")
 
@@ -702,6 +729,8 @@ class Dataset(foc.SampleCollection, metaclass=DatasetSingleton):
         Raises:
             AttributeError: if the field does not exist
         """
+        self._mark_modified()
+
         if "." in field_name:
             self._sample_doc_cls.delete_embedded_field(field_name)
             fos.Sample._reload_docs(self._sample_collection_name)
@@ -723,6 +752,8 @@ class Dataset(foc.SampleCollection, metaclass=DatasetSingleton):
         Raises:
             AttributeError: if the field does not exist
         """
+        self._mark_modified()
+
         if self.media_type != fom.VIDEO:
             raise ValueError("Only video datasets have frame fields")
 
@@ -758,6 +789,8 @@ class Dataset(foc.SampleCollection, metaclass=DatasetSingleton):
             -   num_cloned: the number of samples that were cloned
             -   num_skipped: the number of samples that were skipped
         """
+        self._mark_modified()
+
         if samples is None:
             samples = self
 
@@ -800,13 +833,53 @@ class Dataset(foc.SampleCollection, metaclass=DatasetSingleton):
         """
         return set(self._sample_collection.distinct(field))
 
-    def iter_samples(self):
+    def iter_samples(
+        self, fields=None, readonly=False, batch_size=None, prefetch=None
+    ):
         """Returns an iterator over the samples in the dataset.
 
+        Args:
+            fields (None): an optional field name or iterable of field names to
+                load. If provided, only these fields (and the default sample
+                fields) are fetched from the database, and
+                :class:`fiftyone.core.sample.SampleView` instances are returned
+            readonly (False): whether to return lightweight, read-only
+                :class:`fiftyone.core.sample.SampleRecord` instances rather
+                than :class:`fiftyone.core.sample.Sample` instances. This
+                avoids constructing backing documents and registering
+                in-memory sample instances
+            batch_size (None): the number of samples to fetch from the
+                database per round trip. By default,
+                ``fiftyone.config.default_cursor_batch_size`` is used
+            prefetch (None): the number of batches of samples to fetch and
+                decode in a background thread while the current samples are
+                being processed. By default,
+                ``fiftyone.config.default_cursor_prefetch`` is used
+
         Returns:
-            an iterator over :class:`fiftyone.core.sample.Sample` instances
+            an iterator over :class:`fiftyone.core.sample.Sample` instances,
+            :class:`fiftyone.core.sample.SampleView` instances if ``fields``
+            is provided, or :class:`fiftyone.core.sample.SampleRecord`
+            instances if ``readonly`` is True
         """
-        for d in self._aggregate(hide_frames=True):
+        if fields is not None:
+            return self.select_fields(fields).iter_samples(
+                readonly=readonly, batch_size=batch_size, prefetch=prefetch
+            )
+
+        batch_size, prefetch = self._parse_cursor_params(batch_size, prefetch)
+
+        if readonly:
+            samples = self._iter_sample_records(batch_size=batch_size)
+        else:
+            samples = self._iter_samples(batch_size=batch_size)
+
+        return self._prefetch(samples, batch_size, prefetch)
+
+    def _iter_samples(self, batch_size=None):
+        for d in self._aggregate(
+            hide_frames=True, batch_size=batch_size, record_query=True
+        ):
             frames = d.pop("_frames", [])
             doc = self._sample_dict_to_doc(d)
             sample = fos.Sample.from_doc(doc, dataset=self)
@@ -859,15 +932,38 @@ class Dataset(foc.SampleCollection, metaclass=DatasetSingleton):
             sample.frames._serve(sample)
             sample.frames._save(insert=True)
 
+        self._mark_modified()
+
         return str(d["_id"])
 
-    def add_samples(self, samples, expand_schema=True, num_samples=None):
+    def add_samples(
+        self,
+        samples,
+        expand_schema=True,
+        num_samples=None,
+        num_workers=None,
+        _batch_size=None,
+    ):
         """Adds the given samples to the dataset.
 
         Any sample instances that do not belong to a dataset are updated
         in-place to reflect membership in this dataset. Any sample instances
         that belong to other datasets are not modified.
 
+        The samples are inserted in batches whose sizes are dynamically tuned
+        based on the observed insertion latency and the BSON size of the
+        inserted documents (including frames, for video datasets).
+
+        When ``num_workers`` is provided, the copying, validation, and
+        serialization of upcoming batches is performed by a pool of worker
+        threads while previous batches are being inserted into the database.
+        Threads are used because samples cannot be pickled, so preparation
+        only overlaps with the database I/O of insertions; the preparation of
+        different batches does not run in parallel because of the GIL. In this
+        mode, batch sizes are tuned only based on the BSON size of the
+        inserted documents and are capped, which bounds the number of samples
+        buffered in memory.
+
         Args:
             samples: an iterable of :class:`fiftyone.core.sample.Sample`
                 instances. For example, ``samples`` may be a :class:`Dataset`
@@ -879,6 +975,9 @@ class Dataset(foc.SampleCollection, metaclass=DatasetSingleton):
                 provided, this is computed via ``len(samples)``, if possible.
                 This value is optional and is used only for optimization and
                 progress tracking
+            num_workers (None): an optional number of worker threads to use
+                to prepare batches of samples in the background. By default,
+                batches are prepared serially on the calling thread
 
         Returns:
             a list of IDs of the samples in the dataset
@@ -894,27 +993,106 @@ class Dataset(foc.SampleCollection, metaclass=DatasetSingleton):
             except:
                 pass
 
-        # @todo optimize adjust dynamically based on sample save time
-        batch_size = 128 if self.media_type == fom.IMAGE else 1
+        if _batch_size is not None:
+            batcher = None
+            batches = fou.iter_batches(samples, _batch_size)
+        elif num_workers:
+            # Batches are emitted when they are submitted to the workers, long
+            # before they are inserted, so their latency is not measurable
+            batcher = fou.DynamicBatcher(
+                samples,
+                target_latency=None,
+                target_size=_ADD_SAMPLES_TARGET_BSON_SIZE,
+                init_batch_size=1,
+                max_batch_size=_ADD_SAMPLES_MAX_PIPELINED_BATCH_SIZE,
+                max_batch_beta=2.0,
+            )
+            batches = batcher
+        else:
+            batcher = fou.DynamicBatcher(
+                samples,
+                target_latency=_ADD_SAMPLES_TARGET_LATENCY,
+                target_size=_ADD_SAMPLES_TARGET_BSON_SIZE,
+                init_batch_size=1,
+                max_batch_beta=2.0,
+            )
+            batches = batcher
+
+        # Serializes updates to the dataset's schema and media type
+        schema_lock = threading.Lock()
 
         sample_ids = []
         with fou.ProgressBar(total=num_samples) as pb:
-            for batch in fou.iter_batches(samples, batch_size):
-                sample_ids.extend(
-                    self._add_samples_batch(batch, expand_schema)
+
+            def _insert_batch(samples, dicts):
+                _ids, num_bytes = self._insert_samples_batch(samples, dicts)
+                sample_ids.extend(_ids)
+
+                if batcher is not None:
+                    batcher.record_size(num_bytes, num_elements=len(samples))
+
+                pb.update(count=len(samples))
+
+            if num_workers:
+                self._add_samples_pipelined(
+                    batches,
+                    expand_schema,
+                    schema_lock,
+                    num_workers,
+                    _insert_batch,
                 )
-                pb.update(count=len(batch))
+            else:
+                for batch in batches:
+                    _insert_batch(
+                        *self._prepare_samples_batch(
+                            batch, expand_schema, schema_lock
+                        )
+                    )
 
         return sample_ids
 
-    def _add_samples_batch(self, samples, expand_schema):
+    def _add_samples_pipelined(
+        self, batches, expand_schema, schema_lock, num_workers, insert_fcn
+    ):
+        # Batches are prepared by the worker pool in the order they are
+        # submitted, and at most `max_pending` prepared batches are buffered
+        # in memory while waiting to be inserted
+        max_pending = 2 * num_workers
+
+        with ThreadPoolExecutor(max_workers=num_workers) as executor:
+            pending = deque()
+            try:
+                for batch in batches:
+                    pending.append(
+                        executor.submit(
+                            self._prepare_samples_batch,
+                            batch,
+                            expand_schema,
+                            schema_lock,
+                        )
+                    )
+
+                    # Insert the oldest batch while the others are prepared
+                    if len(pending) > max_pending or pending[0].done():
+                        insert_fcn(*pending.popleft().result())
+
+                while pending:
+                    insert_fcn(*pending.popleft().result())
+            except:
+                for future in pending:
+                    future.cancel()
+
+                raise
+
+    def _prepare_samples_batch(self, samples, expand_schema, schema_lock):
         samples = [s.copy() if s._in_db else s for s in samples]
 
-        if self.media_type is None and len(samples) > 0:
-            self.media_type = samples[0].media_type
+        with schema_lock:
+            if self.media_type is None and len(samples) > 0:
+                self.media_type = samples[0].media_type
 
-        if expand_schema:
-            self._expand_schema(samples)
+            if expand_schema:
+                self._expand_schema(samples)
 
         for sample in samples:
             self._validate_sample(sample)
@@ -923,6 +1101,9 @@ class Dataset(foc.SampleCollection, metaclass=DatasetSingleton):
         for d in dicts:
             d.pop("_id", None)  # remove the ID if in DB
 
+        return samples, dicts
+
+    def _insert_samples_batch(self, samples, dicts):
         try:
             # adds `_id` to each dict
             self._sample_collection.insert_many(dicts)
@@ -930,16 +1111,27 @@ class Dataset(foc.SampleCollection, metaclass=DatasetSingleton):
             msg = bwe.details["writeErrors"][0]["errmsg"]
             raise ValueError(msg) from bwe
 
+        frame_dicts = []
         for sample, d in zip(samples, dicts):
             if not sample._in_db:
                 doc = self._sample_doc_cls.from_dict(d, extended=False)
                 sample._set_backing_doc(doc, dataset=self)
 
             if self.media_type == fom.VIDEO:
-                sample.frames._serve(sample)
-                sample.frames._save(insert=True)
+                frames = sample.frames._serve(sample)
+                frame_dicts.extend(frames._pop_insert_dicts())
+
+        if frame_dicts:
+            # Frames of all samples in the batch are inserted together
+            self._frame_collection.insert_many(frame_dicts)
+
+        self._mark_modified()
+
+        num_bytes = _estimate_bson_size(dicts) + _estimate_bson_size(
+            frame_dicts
+        )
 
-        return [str(d["_id"]) for d in dicts]
+        return [str(d["_id"]) for d in dicts], num_bytes
 
     def merge_samples(
         self, samples, overwrite=False, key_field="filepath", key_fcn=None
@@ -971,7 +1163,7 @@ class Dataset(foc.SampleCollection, metaclass=DatasetSingleton):
         for sample in self.select_fields(key_field):
             id_map[key_fcn(sample[key_field])] = sample.id
 
-        with fou.ProgressBar() as pb:
+        with fou.ProgressBar() as pb, self.save_context():
             for sample in pb(samples):
                 key = key_fcn(sample[key_field])
                 if key in id_map:
@@ -997,6 +1189,7 @@ class Dataset(foc.SampleCollection, metaclass=DatasetSingleton):
             sample_id = sample_or_id.id
 
         self._sample_collection.delete_one({"_id": ObjectId(sample_id)})
+        self._mark_modified()
 
         fos.Sample._reset_backing_docs(
             self._sample_collection_name, [sample_id]
@@ -1024,6 +1217,7 @@ class Dataset(foc.SampleCollection, metaclass=DatasetSingleton):
         self._sample_collection.delete_many(
             {"_id": {"$in": sample_object_ids}}
         )
+        self._mark_modified()
 
         fos.Sample._reset_backing_docs(
             self._sample_collection_name, sample_ids
@@ -1065,6 +1259,8 @@ class Dataset(foc.SampleCollection, metaclass=DatasetSingleton):
         self._frame_doc_cls.drop_collection()
         fos.Sample._reset_all_backing_docs(self._frame_collection_name)
 
+        self._mark_modified()
+
     def delete(self):
         """Deletes the dataset.
 
@@ -1075,6 +1271,7 @@ class Dataset(foc.SampleCollection, metaclass=DatasetSingleton):
         updated such that ``sample.in_dataset == False``.
         """
         self.clear()
+        _drop_materialized_collections(self._sample_collection_name)
         self._doc.delete()
         self._deleted = True
 
@@ -1875,11 +2072,71 @@ class Dataset(foc.SampleCollection, metaclass=DatasetSingleton):
         sorting on that field.
 
         Args:
-            field: the name of the field to index
+            field: the name of the field to index. For video datasets, frame
+                fields can be indexed via ``"frames.<field>"``
         """
-        if field not in self._sample_indexes:
+        if self.media_type == fom.VIDEO and field.startswith("frames."):
+            field = field[len("frames.") :]
+            if field not in self._frame_indexes:
+                self._frame_collection.create_index(field)
+        elif field not in self._sample_indexes:
             self._sample_collection.create_index(field)
 
+    def list_indexes(self):
+        """Returns the list of fields on which the dataset has database
+        indexes.
+
+        For video datasets, indexes on the frames collection are included with
+        a ``"frames."`` prefix.
+
+        Returns:
+            a list of field names
+        """
+        indexes = list(self._sample_indexes)
+        if self.media_type == fom.VIDEO:
+            indexes.extend("frames." + f for f in self._frame_indexes)
+
+        return indexes
+
+    def ensure_indexes(self, fields=None, min_count=10, create=False):
+        """Recommends, and optionally creates, database indexes on the given
+        fields.
+
+        If no fields are provided, indexes are recommended for the fields that
+        the views of this dataset have most frequently filtered or sorted on,
+        which are recorded as views are executed.
+
+        Indexes speed up queries but slow down writes and use memory, so they
+        are only created when ``create`` is True.
+
+        Args:
+            fields (None): an optional field or iterable of fields to index.
+                For video datasets, frame fields can be indexed via
+                ``"frames.<field>"``
+            min_count (10): the minimum number of times that a field must have
+                been filtered or sorted on to be indexed when no ``fields`` are
+                provided
+            create (False): whether to create the missing indexes. By default,
+                the fields that need an index are only returned
+
+        Returns:
+            the list of fields that lack an index, on which indexes were
+            created if ``create`` is True
+        """
+        if fields is None:
+            fields = self._index_advisor.recommend(min_count=min_count)
+        elif etau.is_str(fields):
+            fields = [fields]
+
+        indexes = set(self.list_indexes())
+        missing = [f for f in fields if f not in indexes]
+
+        if create:
+            for field in missing:
+                self.create_index(field)
+
+        return missing
+
     @classmethod
     def from_dict(cls, d, name=None, rel_dir=None, frame_labels_dir=None):
         """Loads a :class:`Dataset` from a JSON dictionary generated by
@@ -2008,7 +2265,7 @@ class Dataset(foc.SampleCollection, metaclass=DatasetSingleton):
             key = "_frames" if hide_frames else "frames"
             _pipeline.append({"$project": {key: False}})
 
-        return _pipeline
+        return foop.optimize_pipeline(_pipeline)
 
     def _aggregate(
         self,
@@ -2016,6 +2273,8 @@ class Dataset(foc.SampleCollection, metaclass=DatasetSingleton):
         hide_frames=False,
         squash_frames=False,
         attach_frames=True,
+        batch_size=None,
+        record_query=False,
     ):
         _pipeline = self._pipeline(
             pipeline=pipeline,
@@ -2023,7 +2282,17 @@ class Dataset(foc.SampleCollection, metaclass=DatasetSingleton):
             squash_frames=squash_frames,
             attach_frames=attach_frames,
         )
-        return self._sample_collection.aggregate(_pipeline)
+
+        if record_query:
+            self._index_advisor.record(_pipeline)
+
+        # Allow large blocking sorts, e.g., from `Shuffle` or `SortBy`, to
+        # spill to disk
+        kwargs = {"allowDiskUse": True}
+        if batch_size is not None:
+            kwargs["batchSize"] = batch_size
+
+        return self._sample_collection.aggregate(_pipeline, **kwargs)
 
     @property
     def _sample_collection_name(self):
@@ -2033,6 +2302,10 @@ class Dataset(foc.SampleCollection, metaclass=DatasetSingleton):
     def _sample_collection(self):
         return foo.get_db_conn()[self._sample_collection_name]
 
+    @property
+    def _aggregation_collection(self):
+        return self._sample_collection
+
     @property
     def _sample_indexes(self):
         index_info = self._sample_collection.index_information()
@@ -2149,6 +2422,20 @@ class Dataset(foc.SampleCollection, metaclass=DatasetSingleton):
                 % (sample.media_type, self.media_type)
             )
 
+    def _mark_modified(self):
+        # Invalidates any materialized views of the dataset
+        self._modification_count += 1
+
+    def _set_field(self, field_name, expr):
+        if self.media_type == fom.VIDEO:
+            # The expression may reference frames, which must be attached via
+            # an aggregation
+            super()._set_field(field_name, expr)
+            return
+
+        self._sample_collection.update_many({}, [{"$set": {field_name: expr}}])
+        self._mark_modified()
+
     def _sample_dict_to_doc(self, d):
         return self._sample_doc_cls.from_dict(d, extended=False)
 
@@ -2214,6 +2501,20 @@ _info_repr.maxstring = 63
 _info_repr.maxother = 63
 
 
+def _estimate_bson_size(dicts, max_docs=8):
+    # Encoding every document would double the serialization cost of an
+    # insertion, so we extrapolate from a subset of documents evenly spaced
+    # throughout the batch
+    num_dicts = len(dicts)
+    if num_dicts == 0:
+        return 0
+
+    step = max(1, num_dicts // max_docs)
+    sampled = dicts[::step]
+    num_bytes = sum(len(BSON.encode(d)) for d in sampled)
+    return int(num_bytes * num_dicts / len(sampled))
+
+
 def _get_random_characters(n):
     return "".join(
         random.choice(string.ascii_lowercase + string.digits) for _ in range(n)
@@ -2253,9 +2554,10 @@ def _create_dataset(name, persistent=False, media_type=None):
     conn = foo.get_db_conn()
     collection = conn[sample_collection_name]
     collection.create_index("filepath", unique=True)
+    collection.create_index("_rand")
     frames_collection = conn[frames_collection_name]
     frames_collection.create_index(
-        [("sample_id", foo.ASC), ("frame_number", foo.ASC)]
+        [("_sample_id", foo.ASC), ("frame_number", foo.ASC)]
     )
 
     return dataset_doc, sample_doc_cls, frame_doc_cls
@@ -2326,6 +2628,11 @@ def _load_dataset(name):
         dataset_doc.version = VERSION
         dataset_doc.save()
 
+    # Datasets created by older versions may have no index on `_rand`, which
+    # is required to efficiently take random samples
+    conn = foo.get_db_conn()
+    conn[dataset_doc.sample_collection_name].create_index("_rand")
+
     sample_doc_cls = _create_sample_document_cls(
         dataset_doc.sample_collection_name
     )
@@ -2409,6 +2716,16 @@ def _drop_dataset(name, drop_persistent=True):
     )
     frame_doc_cls.drop_collection()
 
+    _drop_materialized_collections(dataset_doc.sample_collection_name)
+
     dataset_doc.delete()
 
     return True
+
+
+def _drop_materialized_collections(sample_collection_name):
+    conn = foo.get_db_conn()
+    prefix = fov._get_materialized_prefix(sample_collection_name)
+    for collection_name in conn.list_collection_names():
+        if collection_name.startswith(prefix):
+            conn.drop_collection(collection_name)
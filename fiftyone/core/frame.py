@@ -19,6 +19,7 @@ from fiftyone.core.document import Document
 import fiftyone.core.fields as fof
 import fiftyone.core.frame_utils as fofu
 import fiftyone.core.labels as fol
+import fiftyone.core.odm as foo
 from fiftyone.core.odm.document import (
     DynamicEmbeddedDocument,
     EmbeddedDocument,
@@ -88,17 +89,22 @@ class Frames(object):
                 ]
             )
         else:
-            self._frame_collection.bulk_write(
-                [
-                    ReplaceOne(
-                        self._make_filter(frame_number, self._sample._id),
-                        self._make_dict(frame),
-                        upsert=True,
-                    )
-                    for frame_number, frame in self._replacements.items()
-                ],
-                ordered=False,
-            )
+            ops = [
+                ReplaceOne(
+                    self._make_filter(frame_number, self._sample._id),
+                    self._make_dict(frame),
+                    upsert=True,
+                )
+                for frame_number, frame in self._replacements.items()
+            ]
+
+            collection_name = self._frame_collection.name
+            bulk_writer = foo.get_bulk_writer(collection_name)
+            if bulk_writer is not None:
+                for op in ops:
+                    bulk_writer.add(collection_name, op)
+            else:
+                self._frame_collection.bulk_write(ops, ordered=False)
 
         self._replacements = {}
 
@@ -364,6 +370,29 @@ class Frames(object):
         if not self._in_db:
             return
 
+        self._save_first_frame()
+        self._save_replacements(insert)
+
+    def _pop_insert_dicts(self):
+        """Returns the frame dicts that must be inserted into the frames
+        collection for this (newly added) sample, and clears the pending
+        replacements.
+
+        This allows callers to insert the frames of many samples in a single
+        batch rather than via one :meth:`_save` call per sample.
+        """
+        if not self._in_db:
+            return []
+
+        self._save_first_frame()
+
+        dicts = [
+            self._make_dict(frame) for frame in self._replacements.values()
+        ]
+        self._replacements = {}
+        return dicts
+
+    def _save_first_frame(self):
         d = self._get_first_frame()
         if d is not None:
             for k, v in d.items():
@@ -386,8 +415,6 @@ class Frames(object):
 
             self._sample._doc.frames.first_frame = fol._FrameLabels(**d)
 
-        self._save_replacements(insert)
-
     def _serve(self, sample):
         self._sample = sample
         return self
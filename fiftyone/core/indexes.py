@@ -0,0 +1,102 @@
+"""
+Index management for datasets.
+
+| Copyright 2017-2020, Voxel51, Inc.
+| `voxel51.com <https://voxel51.com/>`_
+|
+"""
+from collections import Counter
+import threading
+
+
+class IndexAdvisor(object):
+    """Records the field paths on which the aggregation pipelines of a dataset
+    and its views filter and sort, so that indexes can be recommended for the
+    most frequently used paths.
+
+    Only paths that MongoDB could serve from an index are recorded, i.e., the
+    paths of the ``$match`` stages at the head of a pipeline and of the
+    ``$sort`` stage that immediately follows them, if any. Private paths such
+    as ``_id`` and ``_rand``, which are indexed by the dataset itself, are
+    ignored.
+    """
+
+    def __init__(self):
+        self._counts = Counter()
+        self._lock = threading.Lock()
+
+    @property
+    def counts(self):
+        """A dict mapping the recorded field paths to the number of pipelines
+        in which they were used.
+        """
+        with self._lock:
+            return dict(self._counts)
+
+    def record(self, pipeline):
+        """Records the index-eligible field paths of the given pipeline.
+
+        Args:
+            pipeline: a MongoDB aggregation pipeline (list of dicts)
+        """
+        paths = set()
+        for stage in pipeline:
+            if not isinstance(stage, dict) or len(stage) != 1:
+                break
+
+            name, spec = next(iter(stage.items()))
+            if name == "$match":
+                paths.update(_get_query_paths(spec))
+                continue
+
+            if name == "$sort" and isinstance(spec, dict):
+                paths.update(
+                    k for k, v in spec.items() if not isinstance(v, dict)
+                )
+
+            break
+
+        paths = [p for p in paths if not _is_private_path(p)]
+
+        if paths:
+            with self._lock:
+                self._counts.update(paths)
+
+    def recommend(self, min_count=1):
+        """Returns the recorded field paths that were used at least the given
+        number of times, in descending order of use.
+
+        Args:
+            min_count (1): the minimum number of pipelines in which a path must
+                have been used
+
+        Returns:
+            a list of field paths
+        """
+        with self._lock:
+            return [p for p, c in self._counts.most_common() if c >= min_count]
+
+    def clear(self):
+        """Clears all recorded field paths."""
+        with self._lock:
+            self._counts.clear()
+
+
+def _is_private_path(path):
+    return any(key.startswith("_") for key in path.split("."))
+
+
+def _get_query_paths(query):
+    if not isinstance(query, dict):
+        return []
+
+    paths = []
+    for key, value in query.items():
+        if key in ("$and", "$or"):
+            if isinstance(value, list):
+                for subquery in value:
+                    paths.extend(_get_query_paths(subquery))
+        elif not key.startswith("$"):
+            paths.append(key)
+
+    return paths
@@ -7,12 +7,15 @@ Metadata stored in dataset samples.
 """
 import os
 
+import PIL.Image
+
 import eta.core.image as etai
 import eta.core.utils as etau
 import eta.core.video as etav
 
 from fiftyone.core.odm.document import DynamicEmbeddedDocument
 import fiftyone.core.fields as fof
+import fiftyone.core.media as fomm
 
 
 class Metadata(DynamicEmbeddedDocument):
@@ -71,14 +74,7 @@ class ImageMetadata(Metadata):
         """
         if etau.is_str(image_or_path):
             # From image on disk
-            m = etai.ImageMetadata.build_for(image_or_path)
-            return cls(
-                size_bytes=m.size_bytes,
-                mime_type=m.mime_type,
-                width=m.frame_size[0],
-                height=m.frame_size[1],
-                num_channels=m.num_channels,
-            )
+            return cls._build_for_path(image_or_path)
 
         # From in-memory image
         height, width = image_or_path.shape[:2]
@@ -89,6 +85,31 @@ class ImageMetadata(Metadata):
 
         return cls(width=width, height=height, num_channels=num_channels)
 
+    @classmethod
+    def _build_for_path(cls, image_path):
+        # Only the image header is read here; the pixels are not decoded
+        try:
+            with PIL.Image.open(image_path) as img:
+                width, height = img.size
+                num_channels = len(img.getbands())
+        except IOError:
+            m = etai.ImageMetadata.build_for(image_path)
+            return cls(
+                size_bytes=m.size_bytes,
+                mime_type=m.mime_type,
+                width=m.frame_size[0],
+                height=m.frame_size[1],
+                num_channels=m.num_channels,
+            )
+
+        return cls(
+            size_bytes=os.path.getsize(image_path),
+            mime_type=etau.guess_mime_type(image_path),
+            width=width,
+            height=height,
+            num_channels=num_channels,
+        )
+
 
 class VideoMetadata(Metadata):
     """Class for storing metadata about video samples.
@@ -132,3 +153,28 @@ class VideoMetadata(Metadata):
             duration=m.duration,
             encoding_str=m.encoding_str,
         )
+
+
+def build_for(filepath, media_type=None):
+    """Builds a :class:`Metadata` instance of the appropriate type for the
+    given media file.
+
+    Args:
+        filepath: the path to the media on disk
+        media_type (None): the media type of the file. By default, this is
+            inferred from the filepath via
+            :func:`fiftyone.core.media.get_media_type`
+
+    Returns:
+        a :class:`Metadata`
+    """
+    if media_type is None:
+        media_type = fomm.get_media_type(filepath)
+
+    if media_type == fomm.IMAGE:
+        return ImageMetadata.build_for(filepath)
+
+    if media_type == fomm.VIDEO:
+        return VideoMetadata.build_for(filepath)
+
+    return Metadata.build_for(filepath)
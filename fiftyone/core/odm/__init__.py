@@ -5,7 +5,14 @@ ODM package declaration.
 | `voxel51.com <https://voxel51.com/>`_
 |
 """
-from .database import get_db_conn, get_async_db_conn, drop_database, ASC
+from .database import (
+    get_db_conn,
+    get_async_db_conn,
+    get_bulk_writer,
+    drop_database,
+    BulkWriter,
+    ASC,
+)
 from .dataset import SampleFieldDocument, DatasetDocument
 from .document import (
     Document,
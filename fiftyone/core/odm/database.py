@@ -5,6 +5,9 @@ Database connection.
 | `voxel51.com <https://voxel51.com/>`_
 |
 """
+from collections import defaultdict
+import threading
+
 from mongoengine import connect
 import motor
 import pymongo
@@ -14,6 +17,7 @@ _DEFAULT_DATABASE = "fiftyone"
 _client = None
 _async_client = None
 _default_port = 27017
+_bulk_writers = threading.local()
 
 
 ASC = pymongo.ASCENDING
@@ -75,3 +79,109 @@ def sync_database():
     """Syncs all pending database writes to disk."""
     if _client is not None:
         _client.admin.command("fsync")
+
+
+def get_bulk_writer(collection_name):
+    """Returns the :class:`BulkWriter` that is currently active for the given
+    collection in the current thread, if any.
+
+    Args:
+        collection_name: the name of the MongoDB collection
+
+    Returns:
+        a :class:`BulkWriter`, or None
+    """
+    writers = getattr(_bulk_writers, "writers", None)
+    if not writers:
+        return None
+
+    return writers.get(collection_name, None)
+
+
+class BulkWriter(object):
+    """Context manager that buffers write operations to a set of MongoDB
+    collections and flushes them in batches via ``bulk_write()``.
+
+    While the context is active, document updates to the specified
+    collections that are issued by the current thread (for example, via
+    :meth:`fiftyone.core.sample.Sample.save`) are appended to the buffer
+    rather than being sent to the database individually.
+
+    Note that buffered operations are not visible to database reads until
+    they are flushed, which happens whenever ``batch_size`` operations have
+    been accumulated, when :meth:`flush` is called, and when the context
+    exits.
+
+    Args:
+        collection_names: an iterable of MongoDB collection names
+        batch_size (1000): the number of buffered operations that triggers an
+            automatic flush
+    """
+
+    def __init__(self, collection_names, batch_size=1000):
+        self.collection_names = [n for n in collection_names if n]
+        self.batch_size = batch_size
+
+        self._ops = defaultdict(list)
+        self._num_ops = 0
+        self._callbacks = []
+        self._prev_writers = None
+
+    def __enter__(self):
+        writers = getattr(_bulk_writers, "writers", None) or {}
+        self._prev_writers = writers
+
+        writers = dict(writers)
+        for collection_name in self.collection_names:
+            writers[collection_name] = self
+
+        _bulk_writers.writers = writers
+        return self
+
+    def __exit__(self, *args):
+        try:
+            self.flush()
+        finally:
+            _bulk_writers.writers = self._prev_writers
+            self._prev_writers = None
+
+    @property
+    def num_pending(self):
+        """The number of buffered operations that have not been flushed."""
+        return self._num_ops
+
+    def add(self, collection_name, op):
+        """Adds a write operation to the buffer.
+
+        Args:
+            collection_name: the name of the MongoDB collection
+            op: a ``pymongo`` write operation such as ``pymongo.UpdateOne``
+        """
+        self._ops[collection_name].append(op)
+        self._num_ops += 1
+
+        if self.batch_size is not None and self._num_ops >= self.batch_size:
+            self.flush()
+
+    def add_callback(self, callback):
+        """Registers a function to call after the next flush.
+
+        Args:
+            callback: a function that takes no arguments
+        """
+        self._callbacks.append(callback)
+
+    def flush(self):
+        """Flushes all buffered operations to the database."""
+        ops, self._ops = self._ops, defaultdict(list)
+        callbacks, self._callbacks = self._callbacks, []
+        self._num_ops = 0
+
+        db = get_db_conn()
+        for collection_name, _ops in ops.items():
+            # Operations are ordered so that successive updates to the same
+            # document are applied in the order in which they were issued
+            db[collection_name].bulk_write(_ops, ordered=True)
+
+        for callback in callbacks:
+            callback()
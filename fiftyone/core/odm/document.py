@@ -17,6 +17,8 @@ import fiftyone.core.utils as fou
 
 import eta.core.serial as etas
 
+from .database import get_bulk_writer
+
 
 class SerializableDocument(object):
     """Mixin for documents that can be serialized in BSON or JSON format."""
@@ -482,11 +484,19 @@ class Document(BaseDocument, mongoengine.Document):
 
         Helper method; should only be used by :meth:`Document.save`.
         """
-        result = (
-            self._get_collection()
-            .update_one({"_id": object_id}, update_doc, upsert=True)
-            .raw_result
-        )
+        collection = self._get_collection()
+
+        bulk_writer = get_bulk_writer(collection.name)
+        if bulk_writer is not None:
+            bulk_writer.add(
+                collection.name,
+                pymongo.UpdateOne({"_id": object_id}, update_doc, upsert=True),
+            )
+            return True
+
+        result = collection.update_one(
+            {"_id": object_id}, update_doc, upsert=True
+        ).raw_result
 
         if result is not None:
             updated_existing = result.get("updatedExisting")
@@ -15,9 +15,10 @@ from bson import json_util
 from bson.binary import Binary
 from mongoengine.errors import InvalidQueryError
 import numpy as np
+from pymongo import UpdateOne
 
 import fiftyone as fo
-from .database import get_db_conn
+from .database import get_bulk_writer, get_db_conn
 from .dataset import SampleFieldDocument, DatasetDocument
 from .document import Document, BaseEmbeddedDocument, SampleDocument
 import fiftyone.core.fields as fof
@@ -468,6 +469,27 @@ class DatasetMixin(object):
             update_doc, filtered_fields
         )
 
+        bulk_writer = get_bulk_writer(collection.name)
+        if bulk_writer is not None:
+            if update_doc:
+                bulk_writer.add(
+                    collection.name,
+                    UpdateOne(select_dict, update_doc, upsert=True),
+                )
+
+            for update, element_id in extra_updates:
+                bulk_writer.add(
+                    collection.name,
+                    UpdateOne(
+                        select_dict,
+                        update,
+                        array_filters=[{"element._id": element_id}],
+                        upsert=True,
+                    ),
+                )
+
+            return updated_existing
+
         if update_doc:
             result = collection.update_one(
                 select_dict, update_doc, upsert=True
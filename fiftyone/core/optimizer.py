@@ -0,0 +1,577 @@
+"""
+Optimization of the MongoDB aggregation pipelines that define sample
+collections.
+
+| Copyright 2017-2020, Voxel51, Inc.
+| `voxel51.com <https://voxel51.com/>`_
+|
+"""
+# Stages past which a `$match` may be moved when it does not reference any of
+# the fields that they modify
+_MATCH_REORDERABLE_STAGES = {
+    "$addFields",
+    "$lookup",
+    "$project",
+    "$set",
+    "$sort",
+    "$unset",
+}
+
+# Stages past which a `$lookup` may be deferred when they do not reference
+# the field that it populates or the field on which it joins
+_LOOKUP_DEFERRABLE_STAGES = {
+    "$addFields",
+    "$limit",
+    "$match",
+    "$project",
+    "$sample",
+    "$set",
+    "$skip",
+    "$sort",
+    "$unset",
+}
+
+
+def optimize_pipeline(pipeline):
+    """Returns an optimized version of the given aggregation pipeline.
+
+    The following rewrites are performed, each of which produces a pipeline
+    that returns the same documents as the input pipeline:
+
+    -   ``$match`` stages are moved before any ``$sort``, ``$addFields``,
+        ``$set``, ``$project``, ``$unset``, and ``$lookup`` stages that do not
+        modify the fields that they reference, so that they can use indexes
+        and so that fewer documents flow through the rest of the pipeline
+    -   ``$lookup`` stages, such as the one that attaches the frames of video
+        samples, are deferred until after any stages that do not reference
+        the fields that they populate, so that documents that are filtered,
+        skipped, or limited are never joined
+    -   ``$lookup`` stages whose fields are never referenced by subsequent
+        stages or included in the output of the pipeline are removed, and
+        ``$lookup`` stages whose fields are referenced by only one
+        sub-pipeline of a ``$facet`` stage are moved into that sub-pipeline.
+        In particular, the frames of video samples are only joined when a
+        ``frames`` path is actually required
+    -   consecutive ``$match``, ``$unset``, and ``$project`` stages are fused
+
+    Any stage that cannot be analyzed is treated as a barrier.
+
+    Args:
+        pipeline: a MongoDB aggregation pipeline (list of dicts)
+
+    Returns:
+        the optimized pipeline (list of dicts)
+    """
+    pipeline = _reorder_stages(pipeline)
+    pipeline = _eliminate_lookups(pipeline)
+    pipeline = _reorder_stages(pipeline)
+    return _fuse_stages(pipeline)
+
+
+class _UnknownFields(Exception):
+    pass
+
+
+def _get_stage_name(stage):
+    if not isinstance(stage, dict) or len(stage) != 1:
+        return None
+
+    return next(iter(stage))
+
+
+def _get_root(path):
+    return path.split(".", 1)[0]
+
+
+def _reorder_stages(pipeline):
+    pipeline = list(pipeline)
+
+    changed = True
+    while changed:
+        changed = False
+        for idx in range(len(pipeline) - 1):
+            if _can_swap(pipeline[idx], pipeline[idx + 1]):
+                pipeline[idx], pipeline[idx + 1] = (
+                    pipeline[idx + 1],
+                    pipeline[idx],
+                )
+                changed = True
+
+    return pipeline
+
+
+def _can_swap(first, second):
+    # Returns True if `second` can be moved before `first`
+    first_name = _get_stage_name(first)
+    second_name = _get_stage_name(second)
+
+    if second_name == "$match" and first_name in _MATCH_REORDERABLE_STAGES:
+        return _can_match_before(second["$match"], first_name, first)
+
+    if first_name == "$lookup" and second_name in _LOOKUP_DEFERRABLE_STAGES:
+        return _can_lookup_after(first["$lookup"], second_name, second)
+
+    return False
+
+
+def _can_match_before(query, name, stage):
+    try:
+        roots = _get_query_roots(query)
+    except _UnknownFields:
+        return False
+
+    if name == "$sort":
+        return True
+
+    if name == "$project":
+        return _is_preserved_by_projection(roots, stage["$project"])
+
+    try:
+        modified = _get_modified_roots(name, stage)
+    except _UnknownFields:
+        return False
+
+    return not roots & modified
+
+
+def _can_lookup_after(lookup, name, stage):
+    if "localField" not in lookup or "as" not in lookup:
+        return False
+
+    if name in ("$skip", "$limit", "$sample"):
+        return True
+
+    if name == "$project" and not _is_exclusion(stage["$project"]):
+        return False
+
+    try:
+        referenced = _get_referenced_roots(name, stage)
+        if name in ("$match", "$sort"):
+            modified = set()
+        else:
+            modified = _get_modified_roots(name, stage)
+    except _UnknownFields:
+        return False
+
+    return (
+        _get_root(lookup["as"]) not in referenced
+        and _get_root(lookup["localField"]) not in modified
+    )
+
+
+def _get_referenced_roots(name, stage):
+    spec = stage[name]
+
+    if name == "$match":
+        return _get_query_roots(spec)
+
+    if name == "$sort":
+        if not isinstance(spec, dict):
+            raise _UnknownFields()
+
+        return {_get_root(k) for k in spec.keys()}
+
+    if name in ("$addFields", "$set"):
+        if not isinstance(spec, dict):
+            raise _UnknownFields()
+
+        roots = {_get_root(k) for k in spec.keys()}
+        for value in spec.values():
+            _add_expr_roots(value, roots)
+
+        return roots
+
+    if name == "$lookup":
+        if "localField" not in spec or "as" not in spec:
+            raise _UnknownFields()
+
+        return {_get_root(spec["localField"]), _get_root(spec["as"])}
+
+    if name == "$unwind":
+        if isinstance(spec, dict):
+            roots = set()
+            if "includeArrayIndex" in spec:
+                roots.add(_get_root(spec["includeArrayIndex"]))
+
+            spec = spec.get("path", None)
+        else:
+            roots = set()
+
+        if not isinstance(spec, str) or not spec.startswith("$"):
+            raise _UnknownFields()
+
+        roots.add(_get_root(spec[1:]))
+        return roots
+
+    return _get_modified_roots(name, stage)
+
+
+def _get_modified_roots(name, stage):
+    spec = stage[name]
+
+    if name == "$lookup":
+        if "as" not in spec:
+            raise _UnknownFields()
+
+        return {_get_root(spec["as"])}
+
+    if name in ("$addFields", "$set"):
+        if not isinstance(spec, dict):
+            raise _UnknownFields()
+
+        return {_get_root(k) for k in spec.keys()}
+
+    if name == "$unset":
+        if isinstance(spec, str):
+            spec = [spec]
+
+        return {_get_root(k) for k in spec}
+
+    if name == "$project":
+        if not isinstance(spec, dict) or not _is_exclusion(spec):
+            raise _UnknownFields()
+
+        return {_get_root(k) for k in spec.keys()}
+
+    raise _UnknownFields()
+
+
+def _get_query_roots(query):
+    if not isinstance(query, dict):
+        raise _UnknownFields()
+
+    roots = set()
+    for key, value in query.items():
+        if key in ("$and", "$or", "$nor"):
+            if not isinstance(value, list):
+                raise _UnknownFields()
+
+            for subquery in value:
+                roots.update(_get_query_roots(subquery))
+        elif key == "$expr":
+            _add_expr_roots(value, roots)
+        elif key == "$comment":
+            continue
+        elif key.startswith("$"):
+            # `$text`, `$where`, etc.
+            raise _UnknownFields()
+        else:
+            roots.add(_get_root(key))
+
+    return roots
+
+
+def _add_expr_roots(expr, roots):
+    if isinstance(expr, str):
+        if expr.startswith("$$"):
+            if _get_root(expr[2:]) in ("ROOT", "CURRENT"):
+                raise _UnknownFields()
+        elif expr.startswith("$"):
+            roots.add(_get_root(expr[1:]))
+    elif isinstance(expr, dict):
+        for key, value in expr.items():
+            if key != "$literal":
+                _add_expr_roots(value, roots)
+    elif isinstance(expr, (list, tuple)):
+        for value in expr:
+            _add_expr_roots(value, roots)
+
+
+def _is_flag(value, flag):
+    # `True == 1`, so we must explicitly check types here
+    if isinstance(value, bool):
+        return value is flag
+
+    return isinstance(value, int) and value == int(flag)
+
+
+def _is_exclusion(projection):
+    return bool(projection) and all(
+        _is_flag(v, False) for v in projection.values()
+    )
+
+
+def _get_plain_inclusion(projection):
+    # Returns the set of top-level fields included by the projection, and
+    # whether `_id` is included, if the projection is a plain inclusion
+    if not projection or _is_exclusion(projection):
+        return None, None
+
+    include_id = True
+    fields = set()
+    for key, value in projection.items():
+        if key == "_id":
+            if _is_flag(value, False):
+                include_id = False
+            elif not _is_flag(value, True):
+                return None, None
+        elif "." in key or not _is_flag(value, True):
+            return None, None
+        else:
+            fields.add(key)
+
+    if not fields:
+        return None, None
+
+    return fields, include_id
+
+
+def _is_preserved_by_projection(roots, projection):
+    if not isinstance(projection, dict):
+        return False
+
+    if _is_exclusion(projection):
+        excluded = {_get_root(k) for k in projection.keys()}
+        return not roots & excluded
+
+    preserved = set()
+    include_id = True
+    for key, value in projection.items():
+        if key == "_id":
+            include_id = _is_flag(value, True)
+        elif "." not in key and _is_flag(value, True):
+            preserved.add(key)
+
+    if include_id:
+        preserved.add("_id")
+
+    return roots.issubset(preserved)
+
+
+def _eliminate_lookups(pipeline):
+    pipeline = list(pipeline)
+
+    _pipeline = []
+    for idx, stage in enumerate(pipeline):
+        if _get_stage_name(stage) == "$lookup":
+            field = stage["$lookup"].get("as", None)
+        else:
+            field = None
+
+        if field is not None and "." not in field:
+            remaining = pipeline[(idx + 1) :]
+            if not _is_field_needed(remaining, field):
+                continue
+
+            if remaining and _get_stage_name(remaining[0]) == "$facet":
+                facet = _push_into_facet(stage, remaining[0], field)
+                if facet is not None:
+                    pipeline[idx + 1] = facet
+                    continue
+
+        _pipeline.append(stage)
+
+    return _pipeline
+
+
+def _push_into_facet(lookup, facet, field):
+    # Moves the `$lookup` into the only sub-pipeline that needs its field, if
+    # possible. Moving it into multiple sub-pipelines would duplicate the join
+    spec = facet["$facet"]
+    if not isinstance(spec, dict):
+        return None
+
+    keys = [k for k, p in spec.items() if _is_field_needed(p, field)]
+    if len(keys) != 1:
+        return None
+
+    key = keys[0]
+    spec = dict(spec)
+    spec[key] = optimize_pipeline([lookup] + list(spec[key]))
+    return {"$facet": spec}
+
+
+def _is_field_needed(pipeline, field):
+    # Returns True if the given top-level field is referenced by the pipeline
+    # or may be included in its output
+    for stage in pipeline:
+        name = _get_stage_name(stage)
+
+        if name in ("$skip", "$limit", "$sample"):
+            continue
+
+        if name == "$count":
+            return False
+
+        if name == "$facet":
+            spec = stage["$facet"]
+            if not isinstance(spec, dict):
+                return True
+
+            return any(_is_field_needed(p, field) for p in spec.values())
+
+        if name in ("$group", "$replaceRoot", "$replaceWith"):
+            # These stages replace the documents with new documents
+            roots = set()
+            try:
+                _add_expr_roots(stage[name], roots)
+            except _UnknownFields:
+                return True
+
+            return field in roots
+
+        if name == "$project" and not _is_exclusion(stage["$project"]):
+            spec = stage["$project"]
+            roots = {_get_root(k) for k in spec.keys()}
+            try:
+                _add_expr_roots(list(spec.values()), roots)
+            except _UnknownFields:
+                return True
+
+            return field in roots
+
+        if name in (
+            "$addFields",
+            "$lookup",
+            "$match",
+            "$project",
+            "$set",
+            "$sort",
+            "$unset",
+            "$unwind",
+        ):
+            try:
+                roots = _get_referenced_roots(name, stage)
+            except _UnknownFields:
+                return True
+
+            if field not in roots:
+                continue
+
+            if name == "$project":
+                return field not in stage["$project"]
+
+            if name == "$unset":
+                spec = stage["$unset"]
+                if isinstance(spec, str):
+                    spec = [spec]
+
+                return field not in spec
+
+            return True
+
+        return True
+
+    return True
+
+
+def _fuse_stages(pipeline):
+    fused = []
+    for stage in pipeline:
+        if fused:
+            _stage = _fuse(fused[-1], stage)
+            if _stage is not None:
+                fused[-1] = _stage
+                continue
+
+        fused.append(stage)
+
+    return fused
+
+
+def _fuse(first, second):
+    name = _get_stage_name(first)
+    if name is None or name != _get_stage_name(second):
+        return None
+
+    if name == "$match":
+        return _fuse_matches(first["$match"], second["$match"])
+
+    if name == "$unset":
+        return _fuse_unsets(first["$unset"], second["$unset"])
+
+    if name == "$project":
+        return _fuse_projections(first["$project"], second["$project"])
+
+    return None
+
+
+def _fuse_matches(first, second):
+    if not isinstance(first, dict) or not isinstance(second, dict):
+        return None
+
+    if _has_text_query(first) or _has_text_query(second):
+        # `$text` queries must be the first stage of the pipeline
+        return None
+
+    if not first:
+        return {"$match": second}
+
+    if not second:
+        return {"$match": first}
+
+    queries = []
+    for query in (first, second):
+        if list(query.keys()) == ["$and"]:
+            queries.extend(query["$and"])
+        else:
+            queries.append(query)
+
+    return {"$match": {"$and": queries}}
+
+
+def _has_text_query(query):
+    if "$text" in query:
+        return True
+
+    for key in ("$and", "$or", "$nor"):
+        for subquery in query.get(key, []):
+            if isinstance(subquery, dict) and _has_text_query(subquery):
+                return True
+
+    return False
+
+
+def _fuse_unsets(first, second):
+    if isinstance(first, str):
+        first = [first]
+
+    if isinstance(second, str):
+        second = [second]
+
+    fields = list(first)
+    fields.extend(f for f in second if f not in fields)
+
+    if _has_path_collision(fields):
+        return None
+
+    return {"$unset": fields}
+
+
+def _fuse_projections(first, second):
+    if not isinstance(first, dict) or not isinstance(second, dict):
+        return None
+
+    if _is_exclusion(first) and _is_exclusion(second):
+        fields = list(first.keys())
+        fields.extend(f for f in second.keys() if f not in first)
+        if _has_path_collision(fields):
+            return None
+
+        projection = dict(first)
+        projection.update(second)
+        return {"$project": projection}
+
+    first_fields, first_include_id = _get_plain_inclusion(first)
+    second_fields, second_include_id = _get_plain_inclusion(second)
+    if first_fields is None or second_fields is None:
+        return None
+
+    fields = [f for f in first.keys() if f in first_fields & second_fields]
+    if not fields:
+        return None
+
+    projection = {f: True for f in fields}
+    if not (first_include_id and second_include_id):
+        projection["_id"] = False
+
+    return {"$project": projection}
+
+
+def _has_path_collision(paths):
+    for path in paths:
+        for other in paths:
+            if other != path and other.startswith(path + "."):
+                return True
+
+    return False
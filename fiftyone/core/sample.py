@@ -97,13 +97,9 @@ class _DatasetSample(Document):
 
     def compute_metadata(self):
         """Populates the ``metadata`` field of the sample."""
-        if self.media_type == fomm.IMAGE:
-            self.metadata = fom.ImageMetadata.build_for(self.filepath)
-        elif self.media_type == fomm.VIDEO:
-            self.metadata = fom.VideoMetadata.build_for(self.filepath)
-        else:
-            self.metadata = fom.Metadata.build_for(self.filepath)
-
+        self.metadata = fom.build_for(
+            self.filepath, media_type=self.media_type
+        )
         self.save()
 
     def merge(self, sample, overwrite=True):
@@ -247,6 +243,9 @@ class Sample(_DatasetSample):
 
         super().save()
 
+        if self._dataset is not None:
+            _mark_modified(self._dataset)
+
     @classmethod
     def from_frame(cls, frame, filepath):
         """Creates an image :class:`Sample` from the given
@@ -535,6 +534,189 @@ class SampleView(_DatasetSample):
         self._doc.save(filtered_fields=self._filtered_fields)
 
         # Reload the sample singleton if it exists in memory
-        Sample._reload_dataset_sample(
-            self.dataset._sample_collection_name, self.id
+        collection_name = self.dataset._sample_collection_name
+        reload_sample = lambda: Sample._reload_dataset_sample(
+            collection_name, self.id
         )
+
+        bulk_writer = foo.get_bulk_writer(collection_name)
+        if bulk_writer is not None:
+            # The update has not been written to the database yet
+            bulk_writer.add_callback(reload_sample)
+        else:
+            reload_sample()
+
+        _mark_modified(self.dataset)
+
+
+class SampleRecord(object):
+    """A lightweight, read-only record of a sample returned by
+    :meth:`fiftyone.core.collections.SampleCollection.iter_samples` when
+    ``readonly=True``.
+
+    Sample records wrap the raw database dict of a sample. Unlike
+    :class:`Sample` and :class:`SampleView` instances, they do not construct a
+    backing document or register themselves as in-memory singletons, and
+    field values are only deserialized when they are first accessed.
+
+    Sample records cannot be modified or saved.
+
+    Args:
+        d: the raw database dict of the sample
+        schema: a dict mapping field names to
+            :class:`fiftyone.core.fields.Field` instances describing the
+            fields that the record exposes
+        frames (None): an optional dict mapping frame numbers to
+            :class:`SampleRecord` instances for the frames of video samples
+    """
+
+    __slots__ = ("_d", "_schema", "_frames", "_values")
+
+    def __init__(self, d, schema, frames=None):
+        object.__setattr__(self, "_d", d)
+        object.__setattr__(self, "_schema", schema)
+        object.__setattr__(self, "_frames", frames)
+        object.__setattr__(self, "_values", {})
+
+    def __str__(self):
+        return repr(self)
+
+    def __repr__(self):
+        return "<%s: %s>" % (self.__class__.__name__, self.id)
+
+    def __getattr__(self, name):
+        if name.startswith("_"):
+            raise AttributeError(
+                "%s has no attribute '%s'" % (self.__class__.__name__, name)
+            )
+
+        return self.get_field(name)
+
+    def __setattr__(self, name, value):
+        raise AttributeError("%s is read-only" % self.__class__.__name__)
+
+    def __delattr__(self, name):
+        raise AttributeError("%s is read-only" % self.__class__.__name__)
+
+    def __getitem__(self, field_name):
+        if fofu.is_frame_number(field_name) and self._frames is not None:
+            return self._frames[field_name]
+
+        try:
+            return self.get_field(field_name)
+        except AttributeError:
+            raise KeyError(
+                "%s has no field '%s'" % (self.__class__.__name__, field_name)
+            )
+
+    def __setitem__(self, field_name, value):
+        raise TypeError("%s is read-only" % self.__class__.__name__)
+
+    @property
+    def id(self):
+        """The ID of the sample, or ``None`` if it has no ID."""
+        _id = self._d.get("_id", None)
+        return str(_id) if _id is not None else None
+
+    @property
+    def media_type(self):
+        """The media type of the sample, if any."""
+        return self._d.get("_media_type", None)
+
+    @property
+    def frames(self):
+        """A dict mapping frame numbers to :class:`SampleRecord` instances for
+        the frames of the sample.
+
+        Only applicable to video samples.
+        """
+        if self._frames is None:
+            raise AttributeError(
+                "%s has no attribute 'frames'" % self.__class__.__name__
+            )
+
+        return self._frames
+
+    @property
+    def field_names(self):
+        """An ordered tuple of the public field names of the sample."""
+        return tuple(f for f in self._schema if not f.startswith("_"))
+
+    def get_field(self, field_name):
+        """Accesses the value of a field of the sample.
+
+        Args:
+            field_name: the field name
+
+        Returns:
+            the field value
+
+        Raises:
+            AttributeError: if the field does not exist
+        """
+        if field_name == "frames" and self._frames is not None:
+            return self._frames
+
+        try:
+            return self._values[field_name]
+        except KeyError:
+            pass
+
+        try:
+            field = self._schema[field_name]
+        except KeyError:
+            raise AttributeError(
+                "%s has no field '%s'" % (self.__class__.__name__, field_name)
+            )
+
+        value = self._d.get(field_name, None)
+        if value is not None:
+            value = field.to_python(value)
+
+        self._values[field_name] = value
+        return value
+
+    def iter_fields(self):
+        """Returns an iterator over the ``(name, value)`` pairs of the public
+        fields of the sample.
+
+        Returns:
+            an iterator that emits ``(name, value)`` tuples
+        """
+        for field_name in self.field_names:
+            yield field_name, self.get_field(field_name)
+
+    @classmethod
+    def from_dict(cls, d, schema, frame_schema=None):
+        """Creates a :class:`SampleRecord` from a raw database dict.
+
+        Args:
+            d: the raw database dict of the sample. Frames of video samples,
+                if any, are read from its ``_frames`` key
+            schema: a dict mapping sample field names to
+                :class:`fiftyone.core.fields.Field` instances
+            frame_schema (None): a dict mapping frame field names to
+                :class:`fiftyone.core.fields.Field` instances, for video
+                samples
+
+        Returns:
+            a :class:`SampleRecord`
+        """
+        frames = d.pop("_frames", None)
+        if frames is not None and frame_schema is not None:
+            frames = {
+                fd["frame_number"]: cls(fd, frame_schema) for fd in frames
+            }
+        else:
+            frames = None
+
+        return cls(d, schema, frames=frames)
+
+
+def _mark_modified(dataset):
+    # Buffered writes only modify the dataset once they are flushed
+    bulk_writer = foo.get_bulk_writer(dataset._sample_collection_name)
+    if bulk_writer is not None:
+        bulk_writer.add_callback(dataset._mark_modified)
+    else:
+        dataset._mark_modified()
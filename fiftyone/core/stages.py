@@ -6,6 +6,7 @@ View stages.
 |
 """
 from collections import defaultdict
+import numbers
 import random
 import reprlib
 import uuid
@@ -92,6 +93,18 @@ class ViewStage(object):
         """
         return None
 
+    def get_referenced_fields(self):
+        """Returns a list of the root sample-level fields that the stage reads
+        or modifies, if known.
+
+        This information is used to determine whether field projections can
+        safely be pushed ahead of the stage in the aggregation pipeline.
+
+        Returns:
+            a list of fields, or ``None`` if the referenced fields are unknown
+        """
+        return None
+
     def to_mongo(self, sample_collection):
         """Returns the MongoDB version of the stage.
 
@@ -235,6 +248,9 @@ class Exclude(ViewStage):
         """The list of sample IDs to exclude."""
         return self._sample_ids
 
+    def get_referenced_fields(self):
+        return ["_id"]
+
     def to_mongo(self, _):
         sample_ids = [ObjectId(id) for id in self._sample_ids]
         return [{"$match": {"_id": {"$not": {"$in": sample_ids}}}}]
@@ -300,6 +316,9 @@ class ExcludeFields(ViewStage):
         """The list of field names to exclude."""
         return self._field_names
 
+    def get_referenced_fields(self):
+        return []
+
     def get_excluded_fields(self, frames=False):
         if frames:
             default_fields = default_sample_fields(
@@ -519,6 +538,9 @@ class Exists(ViewStage):
         """
         return self._bool
 
+    def get_referenced_fields(self):
+        return [_get_root_field(self._field)]
+
     def to_mongo(self, _):
         if self._bool:
             return [{"$match": {self._field: {"$exists": True, "$ne": None}}}]
@@ -1225,6 +1247,9 @@ class Limit(ViewStage):
         """The maximum number of samples to return."""
         return self._limit
 
+    def get_referenced_fields(self):
+        return []
+
     def to_mongo(self, _):
         if self._limit <= 0:
             return [{"$match": {"_id": None}}]
@@ -1384,8 +1409,21 @@ class Match(ViewStage):
         """The filter expression."""
         return self._filter
 
-    def to_mongo(self, _):
-        return [{"$match": self._get_mongo_filter()}]
+    def to_mongo(self, sample_collection):
+        mongo_filter = self._get_mongo_filter()
+
+        # Expressions cannot be served by indexes, so we prepend equivalent
+        # query operators for any comparisons of indexable fields
+        if isinstance(self._filter, foe.ViewExpression) and (
+            sample_collection is not None
+        ):
+            queries = _get_index_queries(
+                mongo_filter["$expr"], sample_collection.get_field_schema()
+            )
+            if queries:
+                mongo_filter = {"$and": queries + [mongo_filter]}
+
+        return [{"$match": mongo_filter}]
 
     def _get_mongo_filter(self):
         if isinstance(self._filter, foe.ViewExpression):
@@ -1437,6 +1475,9 @@ class MatchTag(ViewStage):
         """The tag to match."""
         return self._tag
 
+    def get_referenced_fields(self):
+        return ["tags"]
+
     def to_mongo(self, _):
         return [{"$match": {"tags": self._tag}}]
 
@@ -1480,6 +1521,9 @@ class MatchTags(ViewStage):
         """The list of tags to match."""
         return self._tags
 
+    def get_referenced_fields(self):
+        return ["tags"]
+
     def to_mongo(self, _):
         return [{"$match": {"tags": {"$in": self._tags}}}]
 
@@ -1607,6 +1651,9 @@ class Select(ViewStage):
         """The list of sample IDs to select."""
         return self._sample_ids
 
+    def get_referenced_fields(self):
+        return ["_id"]
+
     def to_mongo(self, _):
         sample_ids = [ObjectId(id) for id in self._sample_ids]
         return [{"$match": {"_id": {"$in": sample_ids}}}]
@@ -1677,6 +1724,9 @@ class SelectFields(ViewStage):
         """The list of field names to select."""
         return self._field_names or []
 
+    def get_referenced_fields(self):
+        return []
+
     def get_selected_fields(self, frames=False):
         if frames:
             default_fields = default_sample_fields(
@@ -1893,6 +1943,9 @@ class Shuffle(ViewStage):
         """The random seed to use, or ``None``."""
         return self._seed
 
+    def get_referenced_fields(self):
+        return ["_rand"]
+
     def to_mongo(self, _):
         # @todo avoid creating new field here?
         return [
@@ -1947,6 +2000,9 @@ class Skip(ViewStage):
         """The number of samples to skip."""
         return self._skip
 
+    def get_referenced_fields(self):
+        return []
+
     def to_mongo(self, _):
         if self._skip <= 0:
             return []
@@ -2105,6 +2161,7 @@ class Take(ViewStage):
         self._seed = seed
         self._size = size
         self._randint = _randint or _get_rng(seed).randint(1e7, 1e10)
+        self._rand_query = None
 
     @property
     def size(self):
@@ -2116,17 +2173,95 @@ class Take(ViewStage):
         """The random seed to use, or ``None``."""
         return self._seed
 
-    def to_mongo(self, _):
+    def get_referenced_fields(self):
+        return ["_rand"]
+
+    def to_mongo(self, sample_collection):
         if self._size <= 0:
             return [{"$match": {"_id": None}}]
 
-        # @todo avoid creating new field here?
-        return [
-            {"$set": {"_rand_take": {"$mod": [self._randint, "$_rand"]}}},
-            {"$sort": {"_rand_take": ASCENDING}},
+        # Selects the `size` samples whose `_rand` values follow a random
+        # pivot, wrapping around to the smallest `_rand` values if necessary,
+        # which are index-backed when the stage is preceded only by filters
+        query = self._get_rand_query(sample_collection)
+
+        pipeline = [
+            {"$sort": {"_rand": ASCENDING}},
             {"$limit": self._size},
-            {"$unset": "_rand_take"},
         ]
+        if query is not None:
+            pipeline.insert(0, {"$match": query})
+
+        return pipeline
+
+    def _get_rand_query(self, sample_collection):
+        # MongoDB 4.2 has no `$unionWith` to express the wraparound in a
+        # single pipeline, so the range of `_rand` values to select is
+        # resolved when the view is first evaluated and is then reused until
+        # the dataset is modified
+        input_collection = self._get_input_collection(sample_collection)
+        dataset = input_collection._dataset
+        key = (
+            dataset.name,
+            dataset._modification_count,
+            str(
+                [
+                    stage._kwargs()
+                    for stage in getattr(input_collection, "_stages", [])
+                ]
+            ),
+        )
+        if self._rand_query is not None and self._rand_query[0] == key:
+            return self._rand_query[1]
+
+        pivot = _get_rand_pivot(self._randint)
+
+        pipeline = [
+            {"$match": {"_rand": {"$gte": pivot}}},
+            {"$limit": self._size},
+            {"$count": "count"},
+        ]
+        results = list(input_collection._aggregate(pipeline=pipeline))
+        num_wrapped = self._size - (results[0]["count"] if results else 0)
+
+        if num_wrapped <= 0:
+            query = {"_rand": {"$gte": pivot}}
+        else:
+            pipeline = [
+                {"$match": {"_rand": {"$lt": pivot}}},
+                {"$sort": {"_rand": ASCENDING}},
+                {"$skip": num_wrapped - 1},
+                {"$limit": 1},
+                {"$project": {"_id": False, "_rand": True}},
+            ]
+            results = list(input_collection._aggregate(pipeline=pipeline))
+            if results:
+                query = {
+                    "$or": [
+                        {"_rand": {"$gte": pivot}},
+                        {"_rand": {"$lte": results[0]["_rand"]}},
+                    ]
+                }
+            else:
+                query = None  # there are at most `size` samples
+
+        self._rand_query = (key, query)
+        return query
+
+    def _get_input_collection(self, sample_collection):
+        # Returns the collection that is input to this stage, i.e., the view
+        # defined by the stages that precede it
+        stages = getattr(sample_collection, "_stages", None)
+        if stages is None:
+            return sample_collection
+
+        idx = next((i for i, s in enumerate(stages) if s is self), None)
+        if idx is None:
+            return sample_collection
+
+        view = sample_collection._dataset.view()
+        view._stages = list(stages[:idx])
+        return view
 
     def _kwargs(self):
         return [
@@ -2158,6 +2293,77 @@ def _get_rng(seed):
     return _random
 
 
+def _get_index_queries(expr, schema):
+    # Returns a list of queries that are implied by the given boolean
+    # expression and that can be served by indexes on top-level fields
+    if not isinstance(expr, dict) or len(expr) != 1:
+        return []
+
+    op, args = next(iter(expr.items()))
+
+    if op == "$and" and isinstance(args, list):
+        queries = []
+        for arg in args:
+            queries.extend(_get_index_queries(arg, schema))
+
+        return queries
+
+    # Note that `$lt`, `$lte`, and `$ne` are excluded because, unlike query
+    # operators, they match null and missing values in expressions
+    if op not in ("$eq", "$gt", "$gte"):
+        return []
+
+    if not isinstance(args, list) or len(args) != 2:
+        return []
+
+    path, value = args
+    if (
+        not etau.is_str(path)
+        or not path.startswith("$")
+        or path.startswith("$$")
+    ):
+        return []
+
+    path = path[1:]
+    if not _is_index_comparable(schema.get(path, None), value, op):
+        return []
+
+    if op == "$eq":
+        return [{path: value}]
+
+    return [{path: {op: value}}]
+
+
+def _is_index_comparable(field, value, op):
+    # Query operators only compare values of the same type, and they match
+    # array elements, so only typed scalar fields are compared
+    if isinstance(field, fof.BooleanField):
+        return op == "$eq" and isinstance(value, bool)
+
+    if isinstance(field, (fof.IntField, fof.FloatField)):
+        return (
+            isinstance(value, numbers.Number)
+            and not isinstance(value, bool)
+            and value == value  # NaN
+        )
+
+    if isinstance(field, fof.StringField):
+        # Strings that start with "$" are field paths in expressions
+        return etau.is_str(value) and not value.startswith("$")
+
+    return False
+
+
+def _get_rand_pivot(randint):
+    # `_rand` values are uniformly distributed in [0.999, 1); see
+    # `fiftyone.core.odm.sample._generate_rand()`
+    return random.Random(randint).random() * 0.001 + 0.999
+
+
+def _get_root_field(field_name):
+    return field_name.split(".", 1)[0]
+
+
 def _get_labels_list_field(field_name, sample_collection):
     schema = sample_collection.get_field_schema()
     field = schema.get(field_name, None)
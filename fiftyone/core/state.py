@@ -11,6 +11,7 @@ import logging
 from bson import json_util
 
 import eta.core.serial as etas
+import eta.core.utils as etau
 
 import fiftyone.core.aggregations as foa
 import fiftyone.core.dataset as fod
@@ -135,17 +136,40 @@ _IGNORE = ("filepath", "media_type", "metadata", "tags")
 class DatasetStatistics(object):
     """Encapsulates the aggregation statistics required by the App's dataset
     view.
+
+    By default, only the sample count, the tag counts, and the count of each
+    field are included, which is all that the App's sidebar needs to render.
+    The detailed statistics of a field, e.g., its label classes and
+    confidence bounds, are only included when the field is requested, which
+    the App does when the field's filter is expanded.
+
+    Args:
+        view: a :class:`fiftyone.core.view.DatasetView`
+        fields (None): an optional field name or iterable of field names whose
+            detailed statistics to include. Frame fields are prefixed by
+            ``"frames."``. If provided, only the statistics of these fields
+            are included
     """
 
-    def __init__(self, view):
+    def __init__(self, view, fields=None):
+        if etau.is_str(fields):
+            fields = [fields]
+
+        if fields is not None:
+            fields = set(fields)
+
         schemas = [("", view.get_field_schema())]
-        aggregations = [foa.Count()]
         if view.media_type == fom.VIDEO:
             schemas.append(("frames.", view.get_frame_field_schema()))
-            aggregations.extend(
-                [foa.Count("frames"),]
-            )
-        aggregations.append(foa.CountValues("tags"))
+
+        aggregations = []
+        if fields is None:
+            aggregations.append(foa.Count())
+            if view.media_type == fom.VIDEO:
+                aggregations.append(foa.Count("frames"))
+
+            aggregations.append(foa.CountValues("tags"))
+
         for prefix, schema in schemas:
             for field_name, field in schema.items():
                 if (
@@ -156,7 +180,13 @@ class DatasetStatistics(object):
                     continue
 
                 field_name = prefix + field_name
+                if fields is not None and field_name not in fields:
+                    continue
+
                 aggregations.append(foa.Count(field_name))
+                if fields is None:
+                    continue
+
                 if _is_label(field):
                     aggregations.extend(
                         [
@@ -14,7 +14,10 @@ import io
 import itertools
 import logging
 import os
+import queue
 import signal
+import threading
+import timeit
 import types
 import zlib
 
@@ -572,6 +575,201 @@ def iter_batches(iterable, batch_size):
         yield chunk
 
 
+class DynamicBatcher(object):
+    """Class for iterating over the elements of an iterable with a dynamic
+    batch size that is tuned to achieve a desired latency and, optionally, a
+    desired content size per batch.
+
+    The batch sizes emitted when iterating over this object are dynamically
+    scaled based on the measured time between successive ``next()`` calls,
+    which is assumed to be dominated by the processing of the previous batch.
+
+    If a ``target_size`` is provided, the consumer can report the content size
+    of each batch that it processes (e.g., the number of BSON bytes that it
+    inserted into the database) via :meth:`record_size`, and batch sizes will
+    also be capped so that their expected content size does not exceed the
+    target. Consumers that process batches some time after they are emitted
+    (e.g., in a pipeline) should pass ``target_latency=None``, since the time
+    between ``next()`` calls no longer reflects their processing time, and
+    should provide the number of elements of each processed batch to
+    :meth:`record_size`.
+
+    Example usage::
+
+        import fiftyone.core.utils as fou
+
+        elements = range(int(1e7))
+
+        batcher = fou.DynamicBatcher(
+            elements, target_latency=0.1, max_batch_beta=2.0
+        )
+
+        for batch in batcher:
+            print("batch size: %d" % len(batch))
+
+    Args:
+        iterable: an iterable
+        target_latency (0.2): the target latency between ``next()`` calls, in
+            seconds
+        target_size (None): an optional target content size for each batch,
+            in the units passed to :meth:`record_size`
+        init_batch_size (1): the initial batch size to use
+        min_batch_size (1): the minimum allowed batch size
+        max_batch_size (None): an optional maximum allowed batch size
+        max_batch_beta (None): an optional lower/upper bound on the ratio
+            between successive batch sizes
+    """
+
+    def __init__(
+        self,
+        iterable,
+        target_latency=0.2,
+        target_size=None,
+        init_batch_size=1,
+        min_batch_size=1,
+        max_batch_size=None,
+        max_batch_beta=None,
+    ):
+        self.iterable = iterable
+        self.target_latency = target_latency
+        self.target_size = target_size
+        self.init_batch_size = init_batch_size
+        self.min_batch_size = min_batch_size
+        self.max_batch_size = max_batch_size
+        self.max_batch_beta = max_batch_beta
+
+        self._iter = None
+        self._last_batch_size = None
+        self._last_time = None
+        self._size_per_elem = None
+
+    def __iter__(self):
+        self._iter = iter(self.iterable)
+        self._last_batch_size = None
+        self._last_time = None
+        self._size_per_elem = None
+        return self
+
+    def __next__(self):
+        batch_size = self._compute_batch_size()
+
+        batch = tuple(itertools.islice(self._iter, batch_size))
+        if not batch:
+            raise StopIteration
+
+        self._last_batch_size = len(batch)
+        self._last_time = timeit.default_timer()
+
+        return batch
+
+    def record_size(self, size, num_elements=None):
+        """Records the content size of a processed batch.
+
+        The most recently recorded size is used to estimate the content size
+        of upcoming batches.
+
+        Args:
+            size: the content size of the batch, in the same units as
+                ``target_size``
+            num_elements (None): the number of elements in the batch. By
+                default, the batch is assumed to be the most recently emitted
+                batch
+        """
+        if num_elements is None:
+            num_elements = self._last_batch_size
+
+        if num_elements:
+            self._size_per_elem = size / num_elements
+
+    def _compute_batch_size(self):
+        if self._last_batch_size is None:
+            batch_size = self.init_batch_size
+        else:
+            last_size = self._last_batch_size
+            candidates = []
+
+            latency = timeit.default_timer() - self._last_time
+            if self.target_latency is not None and latency > 0:
+                candidates.append(last_size * self.target_latency / latency)
+
+            if self.target_size is not None and self._size_per_elem:
+                candidates.append(self.target_size / self._size_per_elem)
+
+            batch_size = min(candidates) if candidates else last_size
+
+            if self.max_batch_beta is not None:
+                batch_size = max(batch_size, last_size / self.max_batch_beta)
+                batch_size = min(batch_size, last_size * self.max_batch_beta)
+
+        batch_size = max(int(round(batch_size)), self.min_batch_size, 1)
+
+        if self.max_batch_size is not None:
+            batch_size = min(batch_size, self.max_batch_size)
+
+        return batch_size
+
+
+def iter_prefetched(iterable, num_batches, batch_size=1):
+    """Iterates over the given iterable while a background thread prefetches
+    up to ``num_batches`` batches of its upcoming elements.
+
+    This is useful when generating the elements of ``iterable`` involves I/O
+    (e.g., reading from a database cursor) that can be overlapped with the
+    processing of the current elements by the consumer.
+
+    Any exception raised while iterating over ``iterable`` is re-raised in the
+    calling thread. If the returned generator is closed before it is
+    exhausted, the background thread is stopped.
+
+    Args:
+        iterable: an iterable
+        num_batches: the maximum number of batches to prefetch
+        batch_size (1): the number of elements per prefetched batch
+
+    Returns:
+        a generator that emits the elements of ``iterable``
+    """
+    batches = queue.Queue(maxsize=max(num_batches, 1))
+    stop = threading.Event()
+
+    def _put(item):
+        while not stop.is_set():
+            try:
+                batches.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                pass
+
+        return False
+
+    def _prefetch():
+        try:
+            for batch in iter_batches(iterable, batch_size):
+                if not _put((batch, None)):
+                    return
+
+            _put((None, None))
+        except Exception as e:
+            _put((None, e))
+
+    thread = threading.Thread(target=_prefetch, daemon=True)
+    thread.start()
+
+    try:
+        while True:
+            batch, error = batches.get()
+            if error is not None:
+                raise error
+
+            if batch is None:
+                return
+
+            for element in batch:
+                yield element
+    finally:
+        stop.set()
+
+
 def call_on_exit(callback):
     """Registers the given callback function so that it will be called when the
     process exits for (almost) any reason
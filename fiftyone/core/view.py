@@ -8,15 +8,30 @@ Dataset views.
 from collections import OrderedDict
 from copy import copy, deepcopy
 import numbers
+import time
 
 from bson import ObjectId
 
 import fiftyone.core.aggregations as foa
 import fiftyone.core.collections as foc
 import fiftyone.core.media as fom
+import fiftyone.core.odm as foo
 import fiftyone.core.sample as fos
 
 
+# Stages that preserve the order of the samples that they receive
+_ORDER_PRESERVING_STAGES = {
+    "$addFields",
+    "$limit",
+    "$lookup",
+    "$match",
+    "$project",
+    "$set",
+    "$skip",
+    "$unset",
+}
+
+
 class DatasetView(foc.SampleCollection):
     """A view into a :class:`fiftyone.core.dataset.Dataset`.
 
@@ -53,6 +68,7 @@ class DatasetView(foc.SampleCollection):
     def __init__(self, dataset):
         self._dataset = dataset
         self._stages = []
+        self._materialization = None
 
     def __len__(self):
         return self.aggregate(foa.Count()).count
@@ -76,6 +92,7 @@ class DatasetView(foc.SampleCollection):
     def __copy__(self):
         view = self.__class__(self._dataset)
         view._stages = deepcopy(self._stages)
+        view._materialization = self._materialization
         return view
 
     @property
@@ -107,6 +124,119 @@ class DatasetView(foc.SampleCollection):
         """
         return self._stages
 
+    @property
+    def is_materialized(self):
+        """Whether the view is backed by an up-to-date materialized collection.
+        See :meth:`materialize`.
+        """
+        return self._get_materialization() is not None
+
+    def materialize(self, name=None, ttl=None):
+        """Materializes the view by writing its samples to a separate
+        collection in the database, from which subsequent operations on the
+        view, and on any views derived from it, are served.
+
+        Materializing a view whose pipeline is expensive to compute, e.g., one
+        that sorts or filters the labels of a large dataset, allows repeated
+        iterations, aggregations, and pages of the view to be read without
+        recomputing its pipeline each time.
+
+        The materialized collection becomes stale, and the view transparently
+        falls back to its full pipeline, when the underlying dataset is
+        modified in this process or when the optional ``ttl`` expires. Use
+        ``ttl`` to bound the staleness of views of datasets that may be
+        modified by other processes.
+
+        Examples::
+
+            import fiftyone as fo
+            from fiftyone import ViewField as F
+
+            dataset = fo.load_dataset(...)
+
+            view = dataset.filter_labels("predictions", F("confidence") > 0.5)
+            view.materialize(ttl=600)
+
+            # Served from the materialized collection
+            print(view.count("predictions.detections"))
+            print(view.take(10).first())
+
+        Args:
+            name (None): an optional name for the materialized collection,
+                which must not be in use by another materialized view of the
+                dataset. By default, a unique name is generated
+            ttl (None): an optional number of seconds after which the
+                materialized collection expires
+
+        Returns:
+            the view
+
+        Raises:
+            ValueError: if the view is a view of a video dataset, which cannot
+                be materialized, or if ``name`` is already in use
+        """
+        # Materializations inherited from the views that this view was derived
+        # from are left intact
+        materialization = self._materialization
+        if materialization is not None:
+            if materialization.num_stages == len(self._stages):
+                materialization.drop()
+
+            self._materialization = None
+
+        dataset = self._dataset
+        if name is None:
+            name = str(ObjectId())
+
+        collection_name = (
+            _get_materialized_prefix(dataset._sample_collection_name) + name
+        )
+
+        conn = foo.get_db_conn()
+        if collection_name in conn.list_collection_names():
+            raise ValueError(
+                "Materialized view name '%s' is already in use" % name
+            )
+
+        if dataset.media_type == fom.VIDEO:
+            raise ValueError("Views of video datasets cannot be materialized")
+
+        # The modification count is read first so that writes that happen
+        # while the collection is being written mark it as stale
+        modification_count = dataset._modification_count
+
+        # The samples are written by the database via `$out`. Since the
+        # natural order of the collection is not guaranteed to be the order in
+        # which they were written, the keys of the view's final sort, if any,
+        # are stored with them and the collection is read sorted by them
+        pipeline, sort = _add_materialized_index(self._pipeline())
+        pipeline.append({"$out": collection_name})
+        try:
+            dataset._sample_collection.aggregate(pipeline, allowDiskUse=True)
+            if sort is not None:
+                conn[collection_name].create_index(sort)
+        except:
+            conn.drop_collection(collection_name)
+            raise
+
+        self._materialization = _Materialization(
+            collection_name,
+            len(self._stages),
+            modification_count,
+            sort=sort,
+            ttl=ttl,
+        )
+
+        return self
+
+    def dematerialize(self):
+        """Deletes the materialized collection of the view, if any, so that
+        subsequent operations are served by the view's full pipeline.
+        """
+        if self._materialization is not None:
+            self._materialization.drop()
+            self._materialization = None
+
     def summary(self):
         """Returns a string summary of the view.
 
@@ -149,16 +279,52 @@ class DatasetView(foc.SampleCollection):
 
         return "\n".join(elements)
 
-    def iter_samples(self):
+    def iter_samples(
+        self, fields=None, readonly=False, batch_size=None, prefetch=None
+    ):
         """Returns an iterator over the samples in the view.
 
+        Args:
+            fields (None): an optional field name or iterable of field names to
+                load. If provided, only these fields (and the default sample
+                fields) are fetched from the database, as if
+                :meth:`select_fields` had been applied to the view
+            readonly (False): whether to return lightweight, read-only
+                :class:`fiftyone.core.sample.SampleRecord` instances rather
+                than :class:`fiftyone.core.sample.SampleView` instances
+            batch_size (None): the number of samples to fetch from the
+                database per round trip. By default,
+                ``fiftyone.config.default_cursor_batch_size`` is used
+            prefetch (None): the number of batches of samples to fetch and
+                decode in a background thread while the current samples are
+                being processed. By default,
+                ``fiftyone.config.default_cursor_prefetch`` is used
+
         Returns:
-            an iterator over :class:`fiftyone.core.sample.SampleView` instances
+            an iterator over :class:`fiftyone.core.sample.SampleView` or
+            :class:`fiftyone.core.sample.SampleRecord` instances
         """
+        if fields is not None:
+            return self.select_fields(fields).iter_samples(
+                readonly=readonly, batch_size=batch_size, prefetch=prefetch
+            )
+
+        batch_size, prefetch = self._parse_cursor_params(batch_size, prefetch)
+
+        if readonly:
+            samples = self._iter_sample_records(batch_size=batch_size)
+        else:
+            samples = self._iter_samples(batch_size=batch_size)
+
+        return self._prefetch(samples, batch_size, prefetch)
+
+    def _iter_samples(self, batch_size=None):
         selected_fields, excluded_fields = self._get_selected_excluded_fields()
         filtered_fields = self._get_filtered_fields()
 
-        for d in self._aggregate(hide_frames=True):
+        for d in self._aggregate(
+            hide_frames=True, batch_size=batch_size, record_query=True
+        ):
             try:
                 frames = d.pop("_frames", [])
                 doc = self._dataset._sample_dict_to_doc(d)
@@ -252,6 +418,40 @@ class DatasetView(foc.SampleCollection):
         """
         self._dataset.create_index(field)
 
+    def list_indexes(self):
+        """Returns the list of fields on which the underlying dataset has
+        database indexes.
+
+        For video datasets, indexes on the frames collection are included with
+        a ``"frames."`` prefix.
+
+        Returns:
+            a list of field names
+        """
+        return self._dataset.list_indexes()
+
+    def ensure_indexes(self, fields=None, min_count=10, create=False):
+        """Recommends, and optionally creates, database indexes on the given
+        fields of the underlying dataset.
+
+        See :meth:`fiftyone.core.dataset.Dataset.ensure_indexes` for details.
+
+        Args:
+            fields (None): an optional field or iterable of fields to index
+            min_count (10): the minimum number of times that a field must have
+                been filtered or sorted on to be indexed when no ``fields`` are
+                provided
+            create (False): whether to create the missing indexes. By default,
+                the fields that need an index are only returned
+
+        Returns:
+            the list of fields that lack an index, on which indexes were
+            created if ``create`` is True
+        """
+        return self._dataset.ensure_indexes(
+            fields=fields, min_count=min_count, create=create
+        )
+
     def to_dict(self, rel_dir=None, frame_labels_dir=None, pretty_print=False):
         """Returns a JSON dictionary representation of the view.
 
@@ -294,38 +494,88 @@ class DatasetView(foc.SampleCollection):
     ):
         _pipeline = []
 
-        for s in self._stages:
+        materialization = self._get_materialization()
+        stages = self._stages
+        if materialization is not None:
+            stages = stages[materialization.num_stages :]
+
+        for s in _push_down_projections(stages):
             _pipeline.extend(s.to_mongo(self))
 
         if pipeline is not None:
             _pipeline.extend(pipeline)
 
-        return self._dataset._pipeline(
+        _pipeline = self._dataset._pipeline(
             pipeline=_pipeline,
             hide_frames=hide_frames,
             squash_frames=squash_frames,
             attach_frames=attach_frames,
         )
 
+        if materialization is not None and materialization.sort is not None:
+            # Materialized samples are read in the order of the view via an
+            # index, ahead of any stages that the optimizer may reorder
+            _pipeline = [
+                {"$sort": OrderedDict(materialization.sort)},
+                {"$unset": "_materialized_index"},
+            ] + _pipeline
+
+        return _pipeline
+
     def _aggregate(
         self,
         pipeline=None,
         hide_frames=False,
         squash_frames=False,
         attach_frames=True,
+        batch_size=None,
+        record_query=False,
     ):
+        collection = self._aggregation_collection
         _pipeline = self._pipeline(
             pipeline=pipeline,
             hide_frames=hide_frames,
             squash_frames=squash_frames,
             attach_frames=attach_frames,
         )
-        return self._dataset._sample_collection.aggregate(_pipeline)
+
+        if record_query:
+            self._dataset._index_advisor.record(_pipeline)
+
+        # Allow large blocking sorts, e.g., from `Shuffle` or `SortBy`, to
+        # spill to disk
+        kwargs = {"allowDiskUse": True}
+        if batch_size is not None:
+            kwargs["batchSize"] = batch_size
+
+        return collection.aggregate(_pipeline, **kwargs)
 
     @property
     def _doc(self):
         return self._dataset._doc
 
+    @property
+    def _aggregation_collection(self):
+        materialization = self._get_materialization()
+        if materialization is not None:
+            return foo.get_db_conn()[materialization.collection_name]
+
+        return self._dataset._sample_collection
+
+    def _get_materialization(self):
+        materialization = self._materialization
+        if materialization is None:
+            return None
+
+        if not materialization.is_fresh(self._dataset):
+            # The collection is shared by any views derived from this one,
+            # which will also find it stale
+            materialization.drop()
+            self._materialization = None
+            return None
+
+        return materialization
+
     def _get_pipeline(self):
         pipeline = []
 
@@ -429,3 +679,143 @@ class DatasetView(foc.SampleCollection):
                 filtered_fields.update(_filtered_fields)
 
         return filtered_fields
+
+
+def _get_materialized_prefix(sample_collection_name):
+    return "materialized.%s." % sample_collection_name
+
+
+class _Materialization(object):
+    """The materialized collection of a :class:`DatasetView`.
+
+    Args:
+        collection_name: the name of the materialized collection
+        num_stages: the number of stages of the view that were materialized
+        modification_count: the modification count of the dataset when the
+            view was materialized
+        sort (None): an optional list of ``(key, direction)`` tuples by which
+            the collection must be sorted to read it in the order of the view
+        ttl (None): an optional number of seconds after which the collection
+            expires
+    """
+
+    def __init__(
+        self,
+        collection_name,
+        num_stages,
+        modification_count,
+        sort=None,
+        ttl=None,
+    ):
+        self.collection_name = collection_name
+        self.num_stages = num_stages
+        self.modification_count = modification_count
+        self.sort = sort
+        self.expiration = time.time() + ttl if ttl is not None else None
+        self.dropped = False
+
+    def is_fresh(self, dataset):
+        """Whether the collection reflects the current contents of the given
+        dataset.
+
+        Args:
+            dataset: the :class:`fiftyone.core.dataset.Dataset` that was
+                materialized
+
+        Returns:
+            True/False
+        """
+        if self.dropped:
+            return False
+
+        if dataset._modification_count != self.modification_count:
+            return False
+
+        return self.expiration is None or time.time() < self.expiration
+
+    def drop(self):
+        """Drops the collection from the database."""
+        foo.get_db_conn().drop_collection(self.collection_name)
+        self.dropped = True
+
+
+def _add_materialized_index(pipeline):
+    # Copies the keys of the final `$sort` of the pipeline into a
+    # `_materialized_index` field, and returns the sort that reproduces the
+    # order of the pipeline from this field, or None if the order of the
+    # pipeline is not defined by a sort
+    idx = next(
+        (i for i in reversed(range(len(pipeline))) if "$sort" in pipeline[i]),
+        None,
+    )
+    if idx is None:
+        return pipeline, None
+
+    if any(
+        next(iter(stage)) not in _ORDER_PRESERVING_STAGES
+        for stage in pipeline[idx + 1 :]
+    ):
+        return pipeline, None
+
+    sort_spec = pipeline[idx]["$sort"]
+    if any(not isinstance(d, numbers.Number) for d in sort_spec.values()):
+        return pipeline, None  # e.g., `{"$meta": "textScore"}`
+
+    index = OrderedDict()
+    sort = []
+    for i, (key, direction) in enumerate(sort_spec.items()):
+        index["k%d" % i] = "$" + key
+        sort.append(("_materialized_index.k%d" % i, direction))
+
+    pipeline = list(pipeline)
+    pipeline.insert(idx + 1, {"$addFields": {"_materialized_index": index}})
+    for i in range(idx + 2, len(pipeline)):
+        stage = pipeline[i]
+        if "$project" in stage and _is_inclusion(stage["$project"]):
+            project = dict(stage["$project"])
+            project["_materialized_index"] = True
+            pipeline[i] = {"$project": project}
+
+    return pipeline, sort
+
+
+def _is_inclusion(project):
+    return any(v not in (False, 0) for k, v in project.items() if k != "_id")
+
+
+def _push_down_projections(stages):
+    # Moves field projections (e.g., `SelectFields` and `ExcludeFields`) as
+    # early in the pipeline as possible, so that unneeded fields are not
+    # carried through subsequent stages such as in-memory sorts
+    stages = list(stages)
+    for idx, stage in enumerate(stages):
+        selected_fields = stage.get_selected_fields()
+        excluded_fields = stage.get_excluded_fields()
+        if selected_fields is None and excluded_fields is None:
+            continue
+
+        while idx > 0 and _can_project_before(
+            stages[idx - 1], selected_fields, excluded_fields
+        ):
+            stages[idx - 1], stages[idx] = stages[idx], stages[idx - 1]
+            idx -= 1
+
+    return stages
+
+
+def _can_project_before(stage, selected_fields, excluded_fields):
+    referenced_fields = stage.get_referenced_fields()
+    if referenced_fields is None:
+        return False
+
+    for field_name in referenced_fields:
+        if field_name == "_id":
+            continue
+
+        if selected_fields is not None and field_name not in selected_fields:
+            return False
+
+        if excluded_fields is not None and field_name in excluded_fields:
+            return False
+
+    return True
@@ -5,9 +5,12 @@ FiftyOne server json utilies.
 | `voxel51.com <https://voxel51.com/>`_
 |
 """
+from base64 import b64encode
 from bson import ObjectId, json_util
+import json
 from json import JSONEncoder
 from collections import OrderedDict
+import math
 
 import numpy as np
 
@@ -15,6 +18,11 @@ from fiftyone.core.sample import Sample, SampleView
 from fiftyone.core.stages import ViewStage
 import fiftyone.core.utils as fou
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 
 def _handle_bytes(o):
     for k, v in o.items():
@@ -28,9 +36,9 @@ def _handle_bytes(o):
 def _handle_numpy_array(raw, key=None):
     if key != "mask":
         return str(fou.deserialize_numpy_array(raw).shape)
-    return fou.serialize_numpy_array(
-        fou.deserialize_numpy_array(raw), ascii=True
-    )
+
+    # Equivalent to re-serializing the deserialized array with `ascii=True`
+    return b64encode(raw).decode("ascii")
 
 
 def convert(d):
@@ -52,6 +60,50 @@ def convert(d):
                 d[idx] = _handle_numpy_array(i)
 
 
+def _to_json(o, key=None):
+    # Converts the object to JSON-compatible builtin types in a single pass
+    if isinstance(o, (str, int, type(None))):
+        return o
+
+    if isinstance(o, float):
+        if math.isfinite(o):
+            return o
+
+        if math.isnan(o):
+            return "NaN"
+
+        return "Infinity" if o > 0 else "-Infinity"
+
+    if isinstance(o, dict):
+        return {k: _to_json(v, key=k) for k, v in o.items()}
+
+    if isinstance(o, (list, tuple, set)):
+        return [_to_json(i) for i in o]
+
+    if isinstance(o, ObjectId):
+        return str(o)
+
+    if isinstance(o, bytes):
+        return _handle_numpy_array(o, key)
+
+    if isinstance(o, (Sample, SampleView)):
+        return _to_json(_handle_bytes(o.to_mongo_dict()))
+
+    if isinstance(o, ViewStage):
+        return _to_json(o._serialize())
+
+    # Other BSON types, e.g. datetimes
+    return _to_json(json_util.default(o))
+
+
+def _dumps_json(d):
+    return json.dumps(d)
+
+
+def _dumps_orjson(d):
+    return orjson.dumps(d, option=orjson.OPT_NON_STR_KEYS).decode()
+
+
 class FiftyOneJSONEncoder(JSONEncoder):
     """JSON encoder for the FiftyOne server.
 
@@ -79,17 +131,27 @@ class FiftyOneJSONEncoder(JSONEncoder):
         return super().default(o)
 
     @staticmethod
-    def dumps(*args, **kwargs):
-        """Defined for overriding the default SocketIO `json` interface"""
-        kwargs["cls"] = FiftyOneJSONEncoder
-        return json_util.dumps(
-            json_util.loads(
-                json_util.dumps(*args, **kwargs), parse_constant=lambda c: c
-            ),
-            **kwargs
-        )
+    def dumps(obj):
+        """Defined for overriding the default SocketIO `json` interface.
+
+        The object is converted to JSON in a single pass. ObjectIds are
+        serialized as strings, serialized numpy arrays are handled as in
+        :func:`convert`, and non-finite floats are serialized as the strings
+        ``"NaN"``, ``"Infinity"``, and ``"-Infinity"``.
+
+        Args:
+            obj: the object to serialize
+
+        Returns:
+            a JSON string
+        """
+        return _dumps(_to_json(obj))
 
     @staticmethod
     def loads(*args, **kwargs):
         """Defined for overriding the default SocketIO `json` interface"""
         return json_util.loads(*args, **kwargs)
+
+
+# Use the fastest available JSON backend to write the converted objects
+_dumps = _dumps_orjson if orjson is not None else _dumps_json
@@ -7,15 +7,22 @@ FiftyOne Tornado server.
 """
 import asyncio
 import argparse
-from collections import defaultdict
+from collections import defaultdict, OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from copy import deepcopy
+import datetime
+import hashlib
 import json
+import logging
+import numbers
 import os
 import posixpath
 import traceback
 import uuid
 
-from bson import ObjectId
+from bson import json_util, ObjectId
+from pymongo import UpdateOne
+import pymongo.errors
 import tornado.escape
 import tornado.ioloop
 import tornado.iostream
@@ -33,23 +40,27 @@ import fiftyone.constants as foc
 import fiftyone.core.fields as fof
 import fiftyone.core.labels as fol
 import fiftyone.core.media as fom
+import fiftyone.core.metadata as fomt
 import fiftyone.core.odm as foo
 from fiftyone.core.service import DatabaseService
 from fiftyone.core.stages import _STAGES
 import fiftyone.core.stages as fosg
 import fiftyone.core.state as fos
-import fiftyone.core.view as fov
 
 from fiftyone.server.json_util import convert, FiftyOneJSONEncoder
-from fiftyone.server.util import get_file_dimensions
+import fiftyone.server.masks as fosk
+from fiftyone.server.util import get_cached_file_dimensions
 from fiftyone.server.pipelines import (
-    DISTRIBUTION_PIPELINES,
+    make_bool_distribution_pipeline,
+    make_numeric_distribution_pipeline,
     TAGS,
     LABELS,
     SCALARS,
 )
 
 
+logger = logging.getLogger(__name__)
+
 # connect to the existing DB service to initialize global port information
 db = DatabaseService()
 db.start()
@@ -131,26 +142,52 @@ def _catch_errors(func):
             result = await func(self, *args, **kwargs)
             return result
         except Exception as error:
-            StateHandler.state = StateHandler.prev_state
-            for client in StateHandler.clients:
-                client.write_message(
-                    {
-                        "type": "notification",
-                        "kind": "Server Error",
-                        "message": (
-                            "An exception has been raised by the server. Your session "
-                            "has been reverted to its previous state."
-                        ),
-                        "session_items": [traceback.format_exc()],
-                        "app_items": [
-                            "A traceback has been printed to your Python shell."
-                        ],
-                    }
-                )
+            StateHandler.set_state(StateHandler.prev_state)
+            _notify_error(
+                "An exception has been raised by the server. Your session "
+                "has been reverted to its previous state.",
+                traceback.format_exc(),
+            )
 
     return wrapper
 
 
+def _notify_error(message, trace):
+    for client in StateHandler.clients:
+        client.write_message(
+            {
+                "type": "notification",
+                "kind": "Server Error",
+                "message": message,
+                "session_items": [trace],
+                "app_items": [
+                    "A traceback has been printed to your Python shell."
+                ],
+            }
+        )
+
+
+def _report_task_errors(task):
+    # Background tasks are not awaited by a handler wrapped by
+    # `_catch_errors`, so their exceptions are reported here
+    if task.cancelled():
+        return
+
+    error = task.exception()
+    if error is None:
+        return
+
+    trace = "".join(
+        traceback.format_exception(type(error), error, error.__traceback__)
+    )
+    logger.error(trace)
+    _notify_error(
+        "An exception has been raised by the server while computing "
+        "statistics.",
+        trace,
+    )
+
+
 _WITHOUT_PAGINATION_EXTENDED_STAGES = {
     fosg.FilterClassifications,
     fosg.FilterDetections,
@@ -186,6 +223,18 @@ def _make_frame_labels(name, label, frame_number, prefix=""):
     for obj in labels.objects:
         obj.frame_number = frame_number
 
+    _serialize_object_ids(labels, label)
+    return labels
+
+
+def _make_sample_labels(name, label):
+    label = fol.ImageLabel.from_dict(label)
+    labels = label.to_image_labels(name=name)
+    _serialize_object_ids(labels, label)
+    return labels
+
+
+def _serialize_object_ids(labels, label):
     for attr in labels.attributes():
         container = getattr(labels, attr)
         if isinstance(container, etal.LabelsContainer):
@@ -197,9 +246,658 @@ def _make_frame_labels(name, label, frame_number, prefix=""):
                 attrs = obj.attributes() + ["_id"]
                 obj.attributes = lambda: attrs
 
+
+def _make_frames_labels(frames):
+    labels = etav.VideoLabels()
+    for frame_dict in frames:
+        frame_number = frame_dict["frame_number"]
+        frame_labels = etav.VideoFrameLabels(frame_number=frame_number)
+        for k, v in frame_dict.items():
+            if isinstance(v, dict) and "_cls" in v:
+                field_labels = _make_frame_labels(
+                    k, v, frame_number, prefix="frames."
+                )
+                frame_labels.merge_labels(field_labels)
+
+        labels.add_frame(frame_labels)
+
     return labels
 
 
+def _iter_sample_label_fields(sample, sample_schema):
+    for k, v in sample.items():
+        if k not in sample_schema:
+            continue
+
+        field = sample_schema[k]
+        if not isinstance(field, fof.EmbeddedDocumentField):
+            continue
+
+        if not issubclass(field.document_type, fol.Label):
+            continue
+
+        yield k, v
+
+
+def _make_video_info(sample, sample_schema):
+    labels = etal.ImageLabels()
+    for k, v in _iter_sample_label_fields(sample, sample_schema):
+        labels.merge_labels(_make_sample_labels(k, v))
+
+    filepath = sample["filepath"]
+    return {
+        "sample_labels": labels.serialize(),
+        "fps": etav.get_frame_rate(filepath),
+        "frame_count": etav.get_frame_count(filepath),
+    }
+
+
+# The number of seconds for which state and selection broadcasts are
+# debounced
+_DEBOUNCE = 0.05
+
+# The number of seconds after which idle page cursors are closed
+_PAGE_CURSOR_TIMEOUT = 60
+
+# Stages that preserve the order of the samples that they receive
+_ORDER_PRESERVING_STAGES = {
+    "$addFields",
+    "$lookup",
+    "$match",
+    "$project",
+    "$set",
+    "$unset",
+}
+
+
+class _SelectionDelta(object):
+    """A coalesced change to the selected samples and objects of the state."""
+
+    def __init__(self):
+        self.added = set()
+        self.removed = set()
+        self.clear = False
+        self.selected_objects = None
+
+    def update(
+        self, added=None, removed=None, clear=False, selected_objects=None
+    ):
+        """Applies the given change to the delta.
+
+        Args:
+            added (None): a list of newly selected sample _ids
+            removed (None): a list of newly unselected sample _ids
+            clear (False): whether the selected samples were cleared
+            selected_objects (None): the new list of selected objects, if it
+                changed
+        """
+        if clear:
+            self.clear = True
+            self.added.clear()
+            self.removed.clear()
+
+        for _id in removed or []:
+            self.added.discard(_id)
+            self.removed.add(_id)
+
+        for _id in added or []:
+            self.removed.discard(_id)
+            self.added.add(_id)
+
+        if selected_objects is not None:
+            self.selected_objects = selected_objects
+
+    def serialize(self):
+        """Serializes the delta into a dictionary.
+
+        Returns:
+            a JSON dictionary
+        """
+        d = {
+            "added": list(self.added),
+            "removed": list(self.removed),
+            "clear": self.clear,
+        }
+        if self.selected_objects is not None:
+            d["selected_objects"] = self.selected_objects
+
+        return d
+
+
+# The maximum width and height of the segmentation masks in App pages
+_GRID_MASK_SIZE = 256
+
+# Cache of encoded segmentation masks
+_MASK_CACHE = fosk.MaskCache()
+
+
+def _encode_sample_masks(samples, encoding, max_size):
+    return [
+        fosk.encode_masks(
+            sample, encoding=encoding, max_size=max_size, cache=_MASK_CACHE
+        )
+        for sample in samples
+    ]
+
+
+# The maximum number of frames whose labels are sent per message when
+# streaming frame labels
+_FRAME_CHUNK_SIZE = 256
+
+# The frame collections whose frame number index has been ensured
+_INDEXED_FRAME_COLLECTIONS = set()
+
+
+async def _ensure_frames_index(coll):
+    if coll.name in _INDEXED_FRAME_COLLECTIONS:
+        return
+
+    await coll.create_index(
+        [("_sample_id", foo.ASC), ("frame_number", foo.ASC)]
+    )
+    _INDEXED_FRAME_COLLECTIONS.add(coll.name)
+
+
+class _StateCache(object):
+    """Cache of the live objects described by the serialized state of the
+    server.
+
+    Deserializing a :class:`fiftyone.core.state.StateDescription` loads the
+    dataset and reconstructs every stage of its view, so the dataset, the
+    views that are derived from it, and their compiled pipelines are cached
+    here and are only rebuilt after the state is replaced via :meth:`update`.
+    """
+
+    # The maximum number of derived views/pipelines to cache per state
+    _MAX_CACHED = 32
+
+    def __init__(self):
+        self.version = 0
+        self._state = None
+        self._built_version = None
+        self._dataset = None
+        self._views = {}
+        self._pipelines = {}
+        self._results = {}
+
+    def update(self, state):
+        """Replaces the serialized state described by the cache.
+
+        Args:
+            state: a serialized
+                :class:`fiftyone.core.state.StateDescription`
+        """
+        self._state = state
+        self.version += 1
+
+    @property
+    def dataset(self):
+        """The current :class:`fiftyone.core.dataset.Dataset`, or None."""
+        self._build()
+        return self._dataset
+
+    def get_view(self, stages=None):
+        """Returns the view obtained by applying the given stages to the
+        current dataset.
+
+        Args:
+            stages (None): a list of serialized
+                :class:`fiftyone.core.stages.ViewStage` instances
+
+        Returns:
+            a :class:`fiftyone.core.view.DatasetView`, or None if there is no
+            current dataset
+        """
+        self._build()
+        if self._dataset is None:
+            return None
+
+        key = _make_cache_key(stages or [])
+        view = self._views.get(key, None)
+        if view is None:
+            view = self._dataset.view()
+            for stage_dict in stages or []:
+                stage = fosg.ViewStage._from_dict(stage_dict)
+                view = view.add_stage(stage)
+
+            _cache_put(self._views, key, view, self._MAX_CACHED)
+
+        return view
+
+    def get_pipeline(self, stages=None, **kwargs):
+        """Returns the compiled aggregation pipeline for the view obtained by
+        applying the given stages to the current dataset.
+
+        Args:
+            stages (None): a list of serialized
+                :class:`fiftyone.core.stages.ViewStage` instances
+            **kwargs: optional keyword arguments for
+                :meth:`fiftyone.core.view.DatasetView._pipeline`
+
+        Returns:
+            a list of pipeline stage dicts
+        """
+        key = (_make_cache_key(stages or []), _make_cache_key(kwargs))
+        self._build()
+        pipeline = self._pipelines.get(key, None)
+        if pipeline is None:
+            pipeline = self.get_view(stages)._pipeline(**kwargs)
+            _cache_put(self._pipelines, key, pipeline, self._MAX_CACHED)
+
+        return list(pipeline)
+
+    def get_result(self, key):
+        """Returns a cached result that was computed for the current state.
+
+        Args:
+            key: the key of the result
+
+        Returns:
+            the cached result, or None
+        """
+        self._build()
+        return self._results.get(key, None)
+
+    def put_result(self, key, result):
+        """Caches a result that was computed for the current state.
+
+        Args:
+            key: the key of the result, which should include the
+                :attr:`version` of the state for which it was computed
+            result: the result
+        """
+        self._build()
+        _cache_put(self._results, key, result, self._MAX_CACHED)
+
+    def _build(self):
+        if self._built_version == self.version:
+            return
+
+        # Release the previous dataset first so that the dataset singleton is
+        # reloaded from the database rather than reused
+        self._dataset = None
+        self._views.clear()
+        self._pipelines.clear()
+        self._results.clear()
+
+        state = fos.StateDescription.from_dict(self._state or {})
+        self._dataset = state.dataset
+        self._built_version = self.version
+
+
+def _make_cache_key(obj):
+    return json_util.dumps(obj, sort_keys=True)
+
+
+def _cache_put(cache, key, value, max_size):
+    if len(cache) >= max_size:
+        cache.clear()
+
+    cache[key] = value
+
+
+class _StatisticsCache(object):
+    """Cache of the App statistics of the views of the current dataset.
+
+    Results are cached per aggregation and are keyed by the dataset, its
+    modification counter, and a hash of the view's stages, which include the
+    filters of the state for extended statistics. Repeated requests for a
+    view therefore only aggregate the fields whose statistics have not yet
+    been computed, and writes to the dataset are never served stale
+    statistics. Writes made by other processes reach the server via state
+    updates, so the cache is also cleared whenever the version of the server
+    state changes.
+    """
+
+    # The maximum number of views whose statistics are cached
+    _MAX_CACHED = 32
+
+    def __init__(self):
+        self._version = None
+        self._results = {}
+
+    def invalidate(self):
+        """Clears all cached statistics."""
+        self._version = None
+        self._results.clear()
+
+    async def aggregate(self, coll, view, stages, version, aggregations):
+        """Computes the given aggregations on the view, reusing any previously
+        cached results.
+
+        Args:
+            coll: the motor collection of the view's dataset
+            view: a :class:`fiftyone.core.view.DatasetView`
+            stages: the list of serialized stages that define the view
+            version: the version of the server state
+            aggregations: a list of
+                :class:`fiftyone.core.aggregations.Aggregation` instances
+
+        Returns:
+            a list of serialized
+            :class:`fiftyone.core.aggregations.AggregationResult` instances
+        """
+        results = self._get_results(view, stages, version)
+
+        missing = [a for a in aggregations if _get_agg_key(a) not in results]
+        if missing:
+            missing_results = await view._async_aggregate(coll, missing)
+            for agg, result in zip(missing, missing_results):
+                results[_get_agg_key(agg)] = result.serialize(reflective=True)
+
+        return [results[_get_agg_key(a)] for a in aggregations]
+
+    def get(self, view, stages, version, aggregations):
+        """Returns the cached results of the given aggregations on the view,
+        without computing any missing results.
+
+        Args:
+            view: a :class:`fiftyone.core.view.DatasetView`
+            stages: the list of serialized stages that define the view
+            version: the version of the server state
+            aggregations: a list of
+                :class:`fiftyone.core.aggregations.Aggregation` instances
+
+        Returns:
+            a list of serialized
+            :class:`fiftyone.core.aggregations.AggregationResult` instances,
+            with ``None`` for results that are not cached
+        """
+        results = self._get_results(view, stages, version)
+        return [results.get(_get_agg_key(a), None) for a in aggregations]
+
+    def _get_results(self, view, stages, version):
+        if version != self._version:
+            self.invalidate()
+            self._version = version
+
+        stages_hash = hashlib.md5(
+            _make_cache_key(stages or []).encode()
+        ).hexdigest()
+        dataset = view._dataset
+        key = (dataset.name, dataset._modification_count, stages_hash)
+        results = self._results.get(key, None)
+        if results is None:
+            results = {}
+            _cache_put(self._results, key, results, self._MAX_CACHED)
+
+        return results
+
+
+def _get_agg_key(aggregation):
+    return etau.get_class_name(aggregation), aggregation._field_name
+
+
+class _PageCursor(object):
+    """Server-side cursor over the pages of a view that is being scrolled by
+    an App client.
+
+    Consecutive pages are read from the same open database cursor, so
+    requesting the next page only reads that page rather than skipping over
+    all previous ones.
+
+    Args:
+        key: the key identifying the view and page length of the cursor
+        cursor: a motor cursor
+        page: the number of pages that were skipped by the cursor
+        keyset (None): the :class:`_PageKeyset` of the cursor's pipeline, if
+            any
+        bound (None): the keyset bound after which the cursor starts, if any
+    """
+
+    def __init__(self, key, cursor, page, keyset=None, bound=None):
+        self.key = key
+        self.page = page
+        self.bound = bound
+        self._exact = bound is not None or page == 0
+        self._cursor = cursor
+        self._keyset = keyset
+        self._next = []
+
+    async def next_page(self, page_length):
+        """Reads the next page of the cursor.
+
+        After the page is read, :attr:`bound` contains the keyset bound after
+        which the following page starts, if it is known.
+
+        Args:
+            page_length: the number of samples per page
+
+        Returns:
+            a tuple of
+
+            -   the list of sample dicts in the page
+            -   whether there are more samples after the page
+        """
+        num_needed = page_length + 1 - len(self._next)
+        samples = self._next + await self._cursor.to_list(num_needed)
+        self._next = samples[page_length:]
+        self.page += 1
+
+        samples = samples[:page_length]
+        if self._keyset is not None:
+            self.bound = self._keyset.get_bound(
+                samples, previous=self.bound, exact=self._exact
+            )
+            self._exact = self.bound is not None
+            for sample in samples:
+                sample.pop("_page_key", None)
+
+        return samples, bool(self._next)
+
+    def close(self):
+        """Closes the cursor."""
+        self._cursor.close()
+
+
+class _PageKeyset(object):
+    """The keyset that orders the samples of a view, which allows pages of
+    the view to be resumed from the last sample of a previous page rather
+    than by skipping over all previous samples.
+
+    Views whose order is not defined by a sort are paged in ``_id`` order.
+    Pages of sorted views are resumed from the sort key of the last sample of
+    the previous page, skipping only the samples of previous pages that have
+    the same key.
+
+    Args:
+        sort_idx: the index of the final ``$sort`` stage of the pipeline, or
+            None if the pipeline is not sorted
+        field: the field by which the samples are sorted
+        direction: the direction of the sort
+        trailing_limit: whether ``$limit`` or ``$skip`` stages follow the
+            sort, in which case bounds must be applied at the end of the
+            pipeline
+    """
+
+    def __init__(self, sort_idx, field, direction, trailing_limit):
+        self.sort_idx = sort_idx
+        self.field = field
+        self.direction = direction
+        self.trailing_limit = trailing_limit
+
+    @classmethod
+    def from_pipeline(cls, pipeline, schema):
+        """Creates a :class:`_PageKeyset` for the given pipeline, if possible.
+
+        Args:
+            pipeline: a list of pipeline stage dicts
+            schema: the field schema of the view
+
+        Returns:
+            a :class:`_PageKeyset`, or None if the pipeline cannot be paged by
+            keyset
+        """
+        sort_idx = next(
+            (
+                i
+                for i in reversed(range(len(pipeline)))
+                if "$sort" in pipeline[i]
+            ),
+            None,
+        )
+        if sort_idx is None:
+            trailing = pipeline
+        else:
+            trailing = pipeline[sort_idx + 1 :]
+
+        trailing_limit = False
+        for stage in trailing:
+            op = next(iter(stage))
+            if op in ("$limit", "$skip"):
+                trailing_limit = True
+            elif op not in _ORDER_PRESERVING_STAGES:
+                return None
+
+        if sort_idx is None:
+            return cls(None, "_id", 1, trailing_limit)
+
+        sort = pipeline[sort_idx]["$sort"]
+        if len(sort) != 1:
+            return None
+
+        field, direction = next(iter(sort.items()))
+        if not isinstance(direction, numbers.Number) or "." in field:
+            return None
+
+        # Query comparisons match array elements, unlike sorts
+        if isinstance(schema.get(field, None), fof.ListField):
+            return None
+
+        return cls(sort_idx, field, direction, trailing_limit)
+
+    def make_pipeline(self, pipeline, bound=None):
+        """Returns the given pipeline ordered by the keyset, starting after
+        the given bound.
+
+        Args:
+            pipeline: a list of pipeline stage dicts
+            bound (None): an optional bound returned by :meth:`get_bound`
+
+        Returns:
+            a list of pipeline stage dicts
+        """
+        pipeline = list(pipeline)
+        if self.sort_idx is None:
+            # Ordering by `_id` is served by its index
+            pipeline.insert(0, {"$sort": {"_id": 1}})
+            if bound is not None:
+                stage = {"$match": {"_id": {"$gt": bound}}}
+                if self.trailing_limit:
+                    pipeline.append(stage)
+                else:
+                    pipeline.insert(0, stage)
+
+            return pipeline
+
+        # The sort key is copied into the samples since the sort field may be
+        # removed by later stages
+        idx = self.sort_idx
+        pipeline.insert(
+            idx + 1, {"$addFields": {"_page_key": "$" + self.field}}
+        )
+        for i in range(idx + 2, len(pipeline)):
+            project = pipeline[i].get("$project", None)
+            if project is not None and _is_inclusion(project):
+                project = dict(project)
+                project["_page_key"] = True
+                pipeline[i] = {"$project": project}
+
+        if bound is None:
+            return pipeline
+
+        value, num_ties = bound
+        if self.trailing_limit:
+            stages = [{"$match": self._get_query("_page_key", value)}]
+            if num_ties > 0:
+                stages.append({"$skip": num_ties})
+
+            pipeline.extend(stages)
+        else:
+            # The database moves the `$match` ahead of the sort, where it can
+            # be served by an index on the sort field
+            stages = [{"$match": self._get_query(self.field, value)}]
+            if num_ties > 0:
+                stages.append({"$skip": num_ties})
+
+            pipeline[idx + 1 : idx + 1] = stages
+
+        return pipeline
+
+    def get_bound(self, samples, previous=None, exact=True):
+        """Returns the bound after which the samples that follow the given
+        page of samples start.
+
+        Args:
+            samples: the list of sample dicts of a page
+            previous (None): the bound after which the page started, if any
+            exact (True): whether the page started at ``previous``, or at the
+                first sample if ``previous`` is None. If False, the samples
+                that precede the page are unknown
+
+        Returns:
+            the bound, or None if it cannot be expressed by a query
+        """
+        if not samples:
+            return None
+
+        if self.sort_idx is None:
+            return samples[-1]["_id"]
+
+        value = samples[-1].get("_page_key", None)
+        if value is not None and not isinstance(
+            value, (numbers.Number, str, ObjectId, datetime.datetime)
+        ):
+            return None
+
+        num_ties = 0
+        for sample in reversed(samples):
+            if sample.get("_page_key", None) != value:
+                break
+
+            num_ties += 1
+
+        if num_ties == len(samples):
+            # The ties may have started on previous pages
+            if not exact:
+                return None
+
+            if previous is not None and previous[0] == value:
+                num_ties += previous[1]
+
+        return value, num_ties
+
+    def _get_query(self, path, value):
+        # Null and missing values sort before all other values
+        if value is None:
+            if self.direction > 0:
+                return {}
+
+            return {path: None}
+
+        if self.direction > 0:
+            return {path: {"$gte": value}}
+
+        return {"$or": [{path: {"$lte": value}}, {path: None}]}
+
+
+def _is_inclusion(project):
+    return any(v not in (False, 0) for k, v in project.items() if k != "_id")
+
+
+async def _get_sample_dimensions(sample, executor):
+    metadata = sample.get("metadata", None) or {}
+    width = metadata.get("width", metadata.get("frame_width", None))
+    height = metadata.get("height", metadata.get("frame_height", None))
+    if width is not None and height is not None:
+        return width, height
+
+    loop = asyncio.get_event_loop()
+    return await loop.run_in_executor(
+        executor, get_cached_file_dimensions, sample["filepath"]
+    )
+
+
 class StateHandler(tornado.websocket.WebSocketHandler):
     """WebSocket handler for bi-directional state communication.
 
@@ -216,6 +914,37 @@ class StateHandler(tornado.websocket.WebSocketHandler):
     clients = set()
     state = fos.StateDescription().serialize()
     prev_state = fos.StateDescription().serialize()
+    state_cache = _StateCache()
+    statistics_cache = _StatisticsCache()
+
+    # The broadcast statistics tasks that are currently running, keyed by
+    # whether they are extended
+    _statistics_tasks = {}
+
+    # The cursor of the pages that this client is currently scrolling, which
+    # is closed when it is idle
+    _page_cursor = None
+    _page_cursor_handle = None
+
+    # The keyset bounds of the pages of recently scrolled views, which are
+    # shared by all clients
+    _page_bounds = {}
+
+    # The debounced messages that are pending for this client
+    _flush_handle = None
+    _update_pending = False
+    _selection = None
+
+    @classmethod
+    def set_state(cls, state):
+        """Sets the current state.
+
+        Args:
+            state: a serialized
+                :class:`fiftyone.core.state.StateDescription`
+        """
+        cls.state = state
+        cls.state_cache.update(state)
 
     @staticmethod
     def dumps(data):
@@ -245,8 +974,8 @@ class StateHandler(tornado.websocket.WebSocketHandler):
     def sample_collection(self):
         """Getter for the current sample collection."""
         db = self.settings["db"]
-        state = fos.StateDescription.from_dict(StateHandler.state)
-        return db[state.dataset._sample_collection_name]
+        dataset = StateHandler.state_cache.dataset
+        return db[dataset._sample_collection_name]
 
     def write_message(self, message):
         """Writes a message to the client.
@@ -272,6 +1001,7 @@ class StateHandler(tornado.websocket.WebSocketHandler):
         current state to the new client.
         """
         StateHandler.clients.add(self)
+        self._frame_labels_tasks = {}
         self.write_message({"type": "update", "state": StateHandler.state})
 
     def on_close(self):
@@ -280,6 +1010,11 @@ class StateHandler(tornado.websocket.WebSocketHandler):
         """
         StateHandler.clients.remove(self)
         StateHandler.app_clients.discard(self)
+        self._close_page_cursor()
+        for task in self._frame_labels_tasks.values():
+            task.cancel()
+
+        self._frame_labels_tasks.clear()
 
     @_catch_errors
     async def on_message(self, message):
@@ -296,8 +1031,7 @@ class StateHandler(tornado.websocket.WebSocketHandler):
     async def on_as_app(self):
         """Event for registering a client as an App."""
         StateHandler.app_clients.add(self)
-        awaitables = self.get_statistics_awaitables(only=self)
-        asyncio.gather(*awaitables)
+        self.run_statistics(only=self)
 
     async def on_fiftyone(self):
         """Event for FiftyOne package version and user id requests."""
@@ -317,10 +1051,29 @@ class StateHandler(tornado.websocket.WebSocketHandler):
                 :class:fiftyone.core.stages.Stage`
         """
         StateHandler.state["filters"] = filters
+        self.run_statistics(extended_only=True)
+
+    async def on_statistics(self, fields=None, extended=False):
+        """Event for requesting the detailed statistics of specific fields,
+        which the App sends when their filters are expanded. Sends a
+        statistics message to the requesting client.
+
+        Args:
+            fields (None): a list of field names whose detailed statistics to
+                send. By default, the counts of all fields are sent
+            extended (False): whether to send the statistics of the current
+                view with its filters applied
+        """
         state = StateHandler.state
-        view = state["view"] or []
+        if state["dataset"] is None:
+            return
+
+        stages = state["view"] or []
+        if extended:
+            stages = stages + list(state["filters"].values())
+
         await self.send_statistics(
-            view + list(state["filters"].values()), extended=True
+            stages, extended=extended, only=self, fields=fields
         )
 
     async def on_page(self, **kwargs):
@@ -334,18 +1087,15 @@ class StateHandler(tornado.websocket.WebSocketHandler):
         Args:
             state: a serialized :class:`fiftyone.core.state.StateDescription`
         """
-        StateHandler.state = state
-        awaitables = [
-            self.send_updates(),
-        ]
-        awaitables += self.get_statistics_awaitables()
-        asyncio.gather(*awaitables)
+        StateHandler.set_state(state)
+        await self.send_updates()
+        self.run_statistics()
 
     async def on_add_selection(self, _id):
         """Event for adding a :class:`fiftyone.core.samples.Sample` _id to the
         currently selected sample _ids.
 
-        Sends state updates to all active clients.
+        Sends a selection update to all other active clients.
 
         Args:
             _id: a sample _id
@@ -353,13 +1103,13 @@ class StateHandler(tornado.websocket.WebSocketHandler):
         selected = set(StateHandler.state["selected"])
         selected.add(_id)
         StateHandler.state["selected"] = selected
-        await self.send_updates(ignore=self)
+        await self.send_selection(added=[_id], ignore=self)
 
     async def on_remove_selection(self, _id):
         """Event for removing a :class:`fiftyone.core.samples.Sample` _id from the
         currently selected sample _ids
 
-        Sends state updates to all active clients.
+        Sends a selection update to all other active clients.
 
         Args:
             _id: a sample _id
@@ -367,15 +1117,15 @@ class StateHandler(tornado.websocket.WebSocketHandler):
         selected = set(StateHandler.state["selected"])
         selected.remove(_id)
         StateHandler.state["selected"] = selected
-        await self.send_updates(ignore=self)
+        await self.send_selection(removed=[_id], ignore=self)
 
     async def on_clear_selection(self):
         """Event for clearing the currently selected sample _ids.
 
-        Sends state updates to all active clients.
+        Sends a selection update to all other active clients.
         """
         StateHandler.state["selected"] = []
-        await self.send_updates(ignore=self)
+        await self.send_selection(clear=True, ignore=self)
 
     async def on_set_selected_objects(self, selected_objects):
         """Event for setting the entire selected objects list.
@@ -387,183 +1137,358 @@ class StateHandler(tornado.websocket.WebSocketHandler):
             raise TypeError("selected_objects must be a list")
 
         StateHandler.state["selected_objects"] = selected_objects
-        await self.send_updates(ignore=self)
+        await self.send_selection(
+            selected_objects=selected_objects, ignore=self
+        )
 
-    async def on_get_video_data(self, _id, filepath):
-        """Gets the frame labels for video samples.
+    async def on_get_frame_labels(self, _id, start_frame=1, end_frame=None):
+        """Streams the frame labels of a video sample to the requesting
+        client.
+
+        The labels of the requested frames are sent in
+        ``frame_labels-<_id>`` messages that each contain at most
+        ``_FRAME_CHUNK_SIZE`` frames. The last message of the stream has its
+        ``more`` flag set to False.
+
+        When ``start_frame`` is 1, the first message also contains the
+        sample-level labels, frame rate, and frame count of the video.
+        Sample-level labels are not replicated onto every frame; the App adds
+        them to the frames that it renders.
+
+        The labels are streamed in the background so that the other messages
+        of the client are handled in the meantime. If the sample does not
+        exist, a single message with an ``error`` is sent.
 
         Args:
             _id: a sample _id
-            filepath: the absolute path to the sample's video on disk
-        """
-        state = fos.StateDescription.from_dict(StateHandler.state)
-        find_d = {"_sample_id": ObjectId(_id)}
-        labels = etav.VideoLabels()
-        frames = list(state.dataset._frame_collection.find(find_d))
-        sample = state.dataset[_id].to_mongo_dict()
-        convert(frames)
-
-        for frame_dict in frames:
-            frame_number = frame_dict["frame_number"]
-            frame_labels = etav.VideoFrameLabels(frame_number=frame_number)
-            for k, v in frame_dict.items():
-                if isinstance(v, dict) and "_cls" in v:
-                    field_labels = _make_frame_labels(
-                        k, v, frame_number, prefix="frames."
-                    )
-                    frame_labels.merge_labels(field_labels)
+            start_frame (1): the first frame number to send
+            end_frame (None): the last frame number to send. By default, all
+                frames from ``start_frame`` onwards are sent
+        """
+        task = self._frame_labels_tasks.pop(_id, None)
+        if task is not None:
+            task.cancel()
 
-            labels.add_frame(frame_labels)
+        task = asyncio.ensure_future(
+            self._send_frame_labels(_id, start_frame, end_frame)
+        )
+        task.add_done_callback(_report_task_errors)
+        self._frame_labels_tasks[_id] = task
 
-        sample_schema = state.dataset.get_field_schema()
-        for frame_number in range(
-            1, etav.get_frame_count(sample["filepath"]) + 1
-        ):
-            frame_labels = etav.VideoFrameLabels(frame_number=frame_number)
-            for k, v in sample.items():
-                if k not in sample_schema:
-                    continue
+        def _discard(done):
+            if self._frame_labels_tasks.get(_id) is done:
+                del self._frame_labels_tasks[_id]
 
-                field = sample_schema[k]
-                if not isinstance(field, fof.EmbeddedDocumentField):
-                    continue
+        task.add_done_callback(_discard)
 
-                if not issubclass(field.document_type, fol.Label):
-                    continue
+    async def _send_frame_labels(self, _id, start_frame, end_frame):
+        dataset = StateHandler.state_cache.dataset
+        message = {"type": "frame_labels-%s" % _id}
 
-                field_labels = _make_frame_labels(k, v, frame_number)
-                for obj in field_labels.objects:
-                    obj.frame_number = frame_number
+        sample = None
+        if dataset is not None:
+            projection = None if start_frame == 1 else {"_id": True}
+            sample = await self.sample_collection.find_one(
+                {"_id": ObjectId(_id)}, projection
+            )
 
-                frame_labels.merge_labels(field_labels)
+        if sample is None:
+            message.update(
+                {
+                    "frames": [],
+                    "labels": {},
+                    "more": False,
+                    "error": "Sample '%s' not found" % _id,
+                }
+            )
+            self.write_message(message)
+            return
 
-            labels.add_frame(frame_labels, overwrite=False)
+        coll = self.settings["db"][dataset._frame_collection_name]
+        await _ensure_frames_index(coll)
 
-        fps = etav.get_frame_rate(sample["filepath"])
-        self.write_message(
-            {
-                "type": "video_data-%s" % _id,
-                "frames": frames,
-                "labels": labels.serialize(),
-                "fps": fps,
-            }
+        loop = asyncio.get_event_loop()
+        executor = self.settings["executor"]
+
+        if start_frame == 1:
+            video_info = await loop.run_in_executor(
+                executor, _make_video_info, sample, dataset.get_field_schema(),
+            )
+            message.update(video_info)
+
+        frame_numbers = {"$gte": start_frame}
+        if end_frame is not None:
+            frame_numbers["$lte"] = end_frame
+
+        find_d = {"_sample_id": ObjectId(_id), "frame_number": frame_numbers}
+        cursor = coll.find(find_d, batch_size=_FRAME_CHUNK_SIZE).sort(
+            "frame_number", 1
         )
 
-    def get_statistics_awaitables(self, only=None):
-        """Gets statistic awaitables that will send statistics to the relevant
-        client(s) when executed
-    
+        more = True
+        while more:
+            frames = await cursor.to_list(_FRAME_CHUNK_SIZE)
+            more = len(frames) == _FRAME_CHUNK_SIZE
+            convert(frames)
+            labels = await loop.run_in_executor(
+                executor, _make_frames_labels, frames
+            )
+            message.update(
+                {"frames": frames, "labels": labels.serialize(), "more": more}
+            )
+
+            # Waiting for each chunk to be flushed keeps a slow client from
+            # buffering the whole video
+            try:
+                await self.write_message(message)
+            except tornado.websocket.WebSocketClosedError:
+                await cursor.close()
+                return
+
+            message = {"type": "frame_labels-%s" % _id}
+
+    def run_statistics(self, only=None, extended_only=False):
+        """Computes and sends the statistics of the current state in the
+        background.
+
+        Statistics that are broadcast to all App clients supersede any
+        broadcast statistics of the same kind that are still being computed,
+        which are cancelled.
+
         Args:
             only (None): a client to restrict the messages to
-
-        Returns:
-            a list of coroutines
+            extended_only (False): whether to only send the statistics of the
+                current view with its filters applied
         """
-        if StateHandler.state["dataset"] is None:
-            return []
+        tasks = StateHandler._statistics_tasks
+        if only is None:
+            for extended in [True] if extended_only else [False, True]:
+                task = tasks.pop(extended, None)
+                if task is not None:
+                    task.cancel()
+
         state = StateHandler.state
+        if state["dataset"] is None:
+            return
+
         view = state["view"] or []
-        awaitables = [self.send_statistics(view, only=only)]
-
-        if len(state["filters"]):
-            awaitables.append(
-                self.send_statistics(
-                    view + list(state["filters"].values()),
-                    extended=True,
-                    only=only,
-                )
-            )
+        stages = {}
+        if not extended_only:
+            stages[False] = view
 
-        return awaitables
+        if extended_only or state["filters"]:
+            stages[True] = view + list(state["filters"].values())
+
+        for extended, _stages in stages.items():
+            task = asyncio.ensure_future(
+                self.send_statistics(_stages, extended=extended, only=only)
+            )
+            task.add_done_callback(_report_task_errors)
+            if only is None:
+                tasks[extended] = task
 
     @classmethod
     async def send_updates(cls, ignore=None):
         """Sends an update event to the all clients, exluding the ignore
         client, if it is not None.
 
+        Updates are debounced per client, and only the latest state is sent
+        when the update is flushed. Any pending selection change is dropped,
+        since the update contains the latest selection. Pending updates are
+        flushed before any statistics are sent to the client, so that they
+        always precede the statistics of the new state.
+
         Args:
             ignore (None): a client to not send the update to
         """
-        response = {"type": "update", "state": StateHandler.state}
         for client in cls.clients:
             if client == ignore:
                 continue
-            client.write_message(response)
 
-    async def send_statistics(self, stages, extended=False, only=None):
+            client._update_pending = True
+            client._selection = None
+            client._schedule_flush()
+
+    @classmethod
+    async def send_selection(
+        cls,
+        added=None,
+        removed=None,
+        clear=False,
+        selected_objects=None,
+        ignore=None,
+    ):
+        """Sends a selection event that describes a change to the currently
+        selected samples and objects to all clients, excluding the ignore
+        client, if it is not None.
+
+        Selection changes are debounced and coalesced per client into a single
+        ``selection`` message with ``added``, ``removed``, ``clear``, and
+        (optionally) ``selected_objects`` keys. Clients should apply ``clear``,
+        then ``removed``, then ``added`` to their selected samples.
+
+        Args:
+            added (None): a list of newly selected sample _ids
+            removed (None): a list of newly unselected sample _ids
+            clear (False): whether the selected samples were cleared
+            selected_objects (None): the new list of selected objects, if it
+                changed
+            ignore (None): a client to not send the update to
+        """
+        for client in cls.clients:
+            if client == ignore:
+                continue
+
+            if client._update_pending:
+                # The pending update will contain the latest selection
+                continue
+
+            if client._selection is None:
+                client._selection = _SelectionDelta()
+
+            client._selection.update(
+                added=added,
+                removed=removed,
+                clear=clear,
+                selected_objects=selected_objects,
+            )
+            client._schedule_flush()
+
+    def _schedule_flush(self):
+        if self._flush_handle is None:
+            self._flush_handle = tornado.ioloop.IOLoop.current().call_later(
+                _DEBOUNCE, self._flush
+            )
+
+    def _flush(self):
+        self._flush_handle = None
+        if self not in StateHandler.clients:
+            return
+
+        if self._update_pending:
+            self._flush_update()
+        elif self._selection is not None:
+            message = self._selection.serialize()
+            message["type"] = "selection"
+            self.write_message(message)
+            self._selection = None
+
+    def _flush_update(self):
+        if not self._update_pending:
+            return
+
+        self._update_pending = False
+        self._selection = None
+        self.write_message({"type": "update", "state": StateHandler.state})
+
+    async def send_statistics(
+        self, stages, extended=False, only=None, fields=None
+    ):
         """Sends a statistics event given using the provided stages to all App
         clients, unless an only client is provided in which case it is only
         sent to the that client.
 
+        Statistics are cached until the state of the server is next updated
+        or the dataset is modified.
+
         Args:
             stages: a list of serialized stages
             extended (False): extended flag
             only (None): a client to restrict the message to
+            fields (None): an optional list of field names whose detailed
+                statistics to send. By default, the counts of all fields are
+                sent
         """
-        state = fos.StateDescription.from_dict(StateHandler.state)
-        if stages is None:
-            stages = []
-
-        view = fov.DatasetView(state.dataset)
-        for stage_dict in stages:
-            stage = fosg.ViewStage._from_dict(stage_dict)
-            view = view.add_stage(stage)
-
-        aggs = fos.DatasetStatistics(view).aggregations
-        stats = await view._async_aggregate(self.sample_collection, aggs)
-        stats = [r.serialize(reflective=True) for r in stats]
+        state_cache = StateHandler.state_cache
+        view = state_cache.get_view(stages)
 
-        message = {"type": "statistics", "stats": stats, "extended": extended}
+        aggs = fos.DatasetStatistics(view, fields=fields).aggregations
+        stats = await StateHandler.statistics_cache.aggregate(
+            self.sample_collection, view, stages, state_cache.version, aggs
+        )
 
-        if only:
-            only.write_message(message)
-        else:
-            for client in StateHandler.app_clients:
-                client.write_message(message)
+        message = {
+            "type": "statistics",
+            "stats": stats,
+            "extended": extended,
+            "fields": fields,
+        }
 
-    async def send_page(self, page, page_length=20):
+        clients = [only] if only else StateHandler.app_clients
+        for client in clients:
+            # The statistics are of the latest state, which the client must
+            # receive first
+            client._flush_update()
+            client.write_message(message)
+
+    async def send_page(
+        self,
+        page,
+        page_length=20,
+        mask_encoding=fosk.NPY,
+        mask_size=_GRID_MASK_SIZE,
+    ):
         """Sends a pagination response to the current client
 
         Args:
             page: the page number
             page_length (20): the number of items to return
+            mask_encoding ("npy"): the encoding of segmentation masks. See
+                :func:`fiftyone.server.masks.encode_mask`
+            mask_size (_GRID_MASK_SIZE): the maximum width and height of the
+                segmentation masks, or None to send full resolution masks
         """
-        state = fos.StateDescription.from_dict(StateHandler.state)
-        if state.view is not None:
-            view = state.view
-        elif state.dataset is not None:
-            view = state.dataset.view()
-        else:
+        state = StateHandler.state
+        if StateHandler.state_cache.dataset is None:
             self.write_message(
                 {"type": "page", "page": page, "results": [], "more": False}
             )
             return
 
-        for stage_dict in state.filters.values():
+        stages = list(state["view"] or [])
+        for stage_dict in state["filters"].values():
             stage = fosg.ViewStage._from_dict(stage_dict)
             if type(stage) in _WITHOUT_PAGINATION_EXTENDED_STAGES:
                 continue
 
-            view = view.add_stage(stage)
+            stages.append(stage_dict)
 
-        view = view.skip((page - 1) * page_length)
-        pipeline = view._pipeline(hide_frames=True, squash_frames=True)
-        samples = await self.sample_collection.aggregate(pipeline).to_list(
-            page_length + 1
+        cursor = self._get_page_cursor(stages, page, page_length)
+        try:
+            samples, more = await cursor.next_page(page_length)
+        except pymongo.errors.CursorNotFound:
+            # The cursor was closed by the database, e.g., due to inactivity
+            self._close_page_cursor()
+            cursor = self._get_page_cursor(stages, page, page_length)
+            samples, more = await cursor.next_page(page_length)
+
+        bounds = StateHandler._page_bounds.get(cursor.key, None)
+        if bounds is not None and cursor.bound is not None:
+            bounds[page] = cursor.bound
+
+        more = page + 1 if more else False
+
+        loop = asyncio.get_event_loop()
+        executor = self.settings["executor"]
+        await loop.run_in_executor(
+            executor, _encode_sample_masks, samples, mask_encoding, mask_size,
         )
-        convert(samples)
 
-        more = False
-        if len(samples) > page_length:
-            samples = samples[:page_length]
-            more = page + 1
+        dimensions = await asyncio.gather(
+            *[_get_sample_dimensions(s, executor) for s in samples]
+        )
 
-        results = [{"sample": s} for s in samples]
-        for r in results:
-            w, h = get_file_dimensions(r["sample"]["filepath"])
-            r["width"] = w
-            r["height"] = h
-            # default to image
+        missing = [s for s in samples if not s.get("metadata", None)]
+        if missing:
+            asyncio.ensure_future(
+                self._backfill_metadata(
+                    deepcopy(missing), StateHandler.state_cache.dataset
+                )
+            )
+
+        results = []
+        for s, (w, h) in zip(samples, dimensions):
+            results.append({"sample": s, "width": w, "height": h})
 
         for r in results:
             s = r["sample"]
@@ -580,6 +1505,153 @@ class StateHandler(tornado.websocket.WebSocketHandler):
 
         self.write_message(message)
 
+    async def on_get_sample_masks(self, _id, mask_encoding=fosk.NPY):
+        """Sends the full resolution segmentation masks of a sample to the
+        requesting client, e.g., when the sample is expanded in the App.
+
+        The masks are sent as a dict mapping the paths of the masks in the
+        sample to their encoded values.
+
+        Args:
+            _id: a sample _id
+            mask_encoding ("npy"): the encoding of the masks. See
+                :func:`fiftyone.server.masks.encode_mask`
+        """
+        sample = await self.sample_collection.find_one({"_id": ObjectId(_id)})
+        loop = asyncio.get_event_loop()
+        masks = await loop.run_in_executor(
+            self.settings["executor"],
+            _encode_sample_masks,
+            [sample],
+            mask_encoding,
+            None,
+        )
+        self.write_message(
+            {"type": "sample_masks-%s" % _id, "masks": masks[0]}
+        )
+
+    async def _backfill_metadata(self, samples, dataset):
+        """Computes and stores the metadata of the given samples in a worker
+        thread.
+
+        Args:
+            samples: a list of sample dicts without metadata
+            dataset: the :class:`fiftyone.core.dataset.Dataset` of the samples
+        """
+        loop = asyncio.get_event_loop()
+        executor = self.settings["executor"]
+        coll = self.settings["db"][dataset._sample_collection_name]
+        field = dataset.get_field_schema()["metadata"]
+        try:
+            metadatas = await asyncio.gather(
+                *[
+                    loop.run_in_executor(
+                        executor,
+                        fomt.build_for,
+                        s["filepath"],
+                        s.get("_media_type", None),
+                    )
+                    for s in samples
+                ],
+                return_exceptions=True
+            )
+
+            ops = []
+            for sample, metadata in zip(samples, metadatas):
+                if isinstance(metadata, Exception):
+                    logger.debug(
+                        "Failed to compute metadata for '%s': %s",
+                        sample["filepath"],
+                        metadata,
+                    )
+                    continue
+
+                ops.append(
+                    UpdateOne(
+                        {"_id": ObjectId(sample["_id"]), "metadata": None},
+                        {"$set": {"metadata": field.to_mongo(metadata)}},
+                    )
+                )
+
+            # The dataset is not marked as modified, since metadata does not
+            # affect any statistics or distributions shown in the App
+            if ops:
+                await coll.bulk_write(ops, ordered=False)
+        except Exception as e:
+            logger.warning("Failed to backfill sample metadata: %s", e)
+
+    def _get_page_cursor(self, stages, page, page_length):
+        key = (
+            StateHandler.state_cache.version,
+            _make_cache_key(stages),
+            page_length,
+        )
+        cursor = self._page_cursor
+        if cursor is None or cursor.key != key or cursor.page != page - 1:
+            self._close_page_cursor()
+            cursor = self._make_page_cursor(key, stages, page, page_length)
+            self._page_cursor = cursor
+
+        # Idle cursors are closed, rather than left open until the database
+        # times them out
+        loop = tornado.ioloop.IOLoop.current()
+        if self._page_cursor_handle is not None:
+            loop.remove_timeout(self._page_cursor_handle)
+
+        self._page_cursor_handle = loop.call_later(
+            _PAGE_CURSOR_TIMEOUT, self._close_page_cursor
+        )
+
+        return cursor
+
+    def _make_page_cursor(self, key, stages, page, page_length):
+        state_cache = StateHandler.state_cache
+        pipeline = state_cache.get_pipeline(
+            stages, hide_frames=True, squash_frames=True
+        )
+        schema = state_cache.get_view(stages).get_field_schema()
+        keyset = _PageKeyset.from_pipeline(pipeline, schema)
+
+        bounds = StateHandler._page_bounds.get(key, None)
+        if bounds is None:
+            bounds = {}
+            _cache_put(
+                StateHandler._page_bounds, key, bounds, _StateCache._MAX_CACHED
+            )
+
+        # Pages are resumed from the bound of the nearest previous page whose
+        # bound is known, so only the pages in between are skipped
+        start = 0
+        bound = None
+        if keyset is not None:
+            start = max((p for p in bounds if p < page), default=0)
+            bound = bounds.get(start, None)
+            pipeline = keyset.make_pipeline(pipeline, bound=bound)
+
+        if page - 1 > start:
+            # The bounds of the skipped pages are unknown
+            pipeline.append({"$skip": (page - 1 - start) * page_length})
+            bound = None
+
+        return _PageCursor(
+            key,
+            self.sample_collection.aggregate(pipeline, allowDiskUse=True),
+            page - 1,
+            keyset=keyset,
+            bound=bound,
+        )
+
+    def _close_page_cursor(self):
+        if self._page_cursor_handle is not None:
+            tornado.ioloop.IOLoop.current().remove_timeout(
+                self._page_cursor_handle
+            )
+            self._page_cursor_handle = None
+
+        if self._page_cursor is not None:
+            self._page_cursor.close()
+            self._page_cursor = None
+
     async def on_distributions(self, group):
         """Sends distribution data with respect to a group to the requesting
         client.
@@ -588,14 +1660,22 @@ class StateHandler(tornado.websocket.WebSocketHandler):
             group: the distribution group. Valid groups are 'labels', 'scalars',
                 and 'tags'.
         """
-        state = fos.StateDescription.from_dict(StateHandler.state)
-        results = None
-        if state.view is not None:
-            view = state.view
-        elif state.dataset is not None:
-            view = state.dataset.view()
-        else:
+        state_cache = StateHandler.state_cache
+        stages = StateHandler.state["view"]
+        view = state_cache.get_view(stages)
+        if view is None:
             results = []
+        else:
+            # Distributions are cached until the state is next updated, its
+            # filters change, or the dataset is modified
+            key = (
+                state_cache.version,
+                view._dataset._modification_count,
+                group,
+                _make_cache_key(stages or []),
+                _make_cache_key(StateHandler.state["filters"]),
+            )
+            results = state_cache.get_result(key)
 
         if group == LABELS and results is None:
             aggregations = []
@@ -654,111 +1734,79 @@ class StateHandler(tornado.websocket.WebSocketHandler):
                 }
             ]
         elif results is None:
-            results = await _get_distributions(
-                self.sample_collection, view, group
+            results = await _get_scalar_distributions(
+                self.sample_collection,
+                view,
+                stages,
+                state_cache.version,
+                StateHandler.statistics_cache,
             )
 
-        self.write_message({"type": "distributions", "results": results})
+        if view is not None:
+            state_cache.put_result(key, results)
 
+        self.write_message({"type": "distributions", "results": results})
 
-async def _get_distributions(coll, view, group):
-    pipeline = deepcopy(DISTRIBUTION_PIPELINES[group])
-    await _numeric_distribution_pipelines(coll, view, pipeline)
-    pipeline = view._pipeline(pipeline=pipeline)
-    response = await coll.aggregate(pipeline).to_list(1)
 
-    result = []
-    for f in response[0].values():
-        result += f
-
-    return sorted(result, key=lambda d: d["name"])
+async def _get_scalar_distributions(
+    coll, view, stages, version, statistics_cache
+):
+    schema = view.get_field_schema()
+    bools = [
+        name
+        for name, field in schema.items()
+        if isinstance(field, fof.BooleanField)
+    ]
+    numerics = [
+        (name, field)
+        for name, field in schema.items()
+        if isinstance(field, (fof.IntField, fof.FloatField))
+    ]
+
+    # Histograms are computed in a single pass, so bounds are only used if
+    # they are already cached, i.e., if the filters of their fields were
+    # expanded in the App. Otherwise, the buckets are chosen by the pass
+    bounds = statistics_cache.get(
+        view, stages, version, [foa.Bounds(name) for name, _ in numerics]
+    )
 
+    facets = {}
+    for idx, name in enumerate(bools):
+        facets["bool-%d" % idx] = make_bool_distribution_pipeline(name)
 
-async def _numeric_bounds(coll, view, numerics):
-    bounds_pipeline = [{"$facet": {}}]
-    if len(numerics) == 0:
-        return {}
+    for idx, ((name, field), result) in enumerate(zip(numerics, bounds)):
+        field_type = field.__class__.__name__[
+            : -len("Field")  # grab field type from the class
+        ].lower()
+        if result is None:
+            field_bounds = None
+        else:
+            field_bounds = result["bounds"]
+            if field_bounds[0] is None or field_bounds[1] is None:
+                continue
 
-    for idx, (k, v) in enumerate(numerics.items()):
-        bounds_pipeline[0]["$facet"]["numeric-%d" % idx] = [
-            {
-                "$group": {
-                    "_id": k,
-                    "min": {"$min": "$%s" % k},
-                    "max": {"$max": "$%s" % k},
-                },
-            }
-        ]
+        facets["numeric-%d" % idx] = make_numeric_distribution_pipeline(
+            name, field_type, bounds=field_bounds
+        )
 
-    pipeline = view._pipeline(pipeline=bounds_pipeline)
-    result = await coll.aggregate(pipeline).to_list(1)
-    return result[0]
+    if not facets:
+        return []
 
+    # Only the scalar fields are needed, and the histograms of all fields are
+    # computed in a single pass over them
+    project = {name: True for name in bools}
+    project.update({name: True for name, _ in numerics})
+    coll = coll.database[view._aggregation_collection.name]
+    pipeline = view._pipeline(
+        pipeline=[{"$project": project}, {"$facet": facets}]
+    )
+    response = await coll.aggregate(pipeline).to_list(1)
 
-async def _numeric_distribution_pipelines(coll, view, pipeline, buckets=50):
-    numerics = view._dataset.get_field_schema(ftype=fof.IntField)
-    numerics.update(view._dataset.get_field_schema(ftype=fof.FloatField))
-    # here we query the min and max for each numeric field
-    # unfortunately, it looks like this has to be a separate query
-    bounds = await _numeric_bounds(coll, view, numerics)
+    result = []
+    for f in response[0].values():
+        result += f
 
-    # for each numeric field, build the boundaries array with the
-    # min/max results when adding the field's sub-pipeline
-    for idx, (k, v) in enumerate(numerics.items()):
-        sub_pipeline = "numeric-%d" % idx
-        if not bounds[sub_pipeline]:
-            continue
-        field_bounds = bounds[sub_pipeline][0]
-        mn = field_bounds["min"]
-        mx = field_bounds["max"]
-
-        # if min and max are equal, we artifically create a boundary
-        # @todo alternative approach to scalar fields with only one value
-        if mn == mx:
-            if mx > 0:
-                mn = 0
-            else:
-                mx = 0
-
-        step = (mx - mn) / buckets
-        boundaries = [mn + step * s for s in range(0, buckets)]
-
-        pipeline[0]["$facet"][sub_pipeline] = [
-            {
-                "$bucket": {
-                    "groupBy": "$%s" % k,
-                    "boundaries": boundaries,
-                    "default": "null",
-                    "output": {"count": {"$sum": 1}},
-                }
-            },
-            {
-                "$group": {
-                    "_id": k,
-                    "data": {
-                        "$push": {
-                            "key": {
-                                "$cond": [
-                                    {"$ne": ["$_id", "null"]},
-                                    {"$add": ["$_id", step / 2]},
-                                    "null",
-                                ]
-                            },
-                            "count": "$count",
-                        }
-                    },
-                }
-            },
-            {
-                "$project": {
-                    "name": k,
-                    "type": v.__class__.__name__[
-                        : -len("Field")  # grab field type from the class
-                    ].lower(),
-                    "data": "$data",
-                }
-            },
-        ]
+    return sorted(result, key=lambda d: d["name"])
 
 
 class Application(tornado.web.Application):
@@ -777,7 +1825,8 @@ class Application(tornado.web.Application):
             (r"/state", StateHandler),
         ]
         db = foo.get_async_db_conn()
-        super().__init__(handlers, db=db, **settings)
+        executor = ThreadPoolExecutor()
+        super().__init__(handlers, db=db, executor=executor, **settings)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,205 @@
+"""
+FiftyOne server segmentation mask transport.
+
+| Copyright 2017-2020, Voxel51, Inc.
+| `voxel51.com <https://voxel51.com/>`_
+|
+"""
+from base64 import b64encode
+from collections import OrderedDict
+import hashlib
+import io
+import math
+import threading
+
+import numpy as np
+import PIL.Image
+
+import fiftyone.core.utils as fou
+
+
+NPY = "npy"
+PNG = "png"
+RLE = "rle"
+ENCODINGS = (NPY, PNG, RLE)
+
+
+def downsample_mask(mask, max_size):
+    """Downsamples the mask via nearest neighbor sampling so that its
+    dimensions do not exceed the given size.
+
+    Args:
+        mask: a numpy array
+        max_size: the maximum width and height of the downsampled mask
+
+    Returns:
+        a numpy array
+    """
+    stride = int(math.ceil(max(mask.shape[:2]) / max_size))
+    if stride <= 1:
+        return mask
+
+    return mask[::stride, ::stride]
+
+
+def encode_mask(mask, encoding=NPY, max_size=None):
+    """Encodes the mask for transport to the App.
+
+    The ``"npy"`` encoding is a base64-encoded string of the mask serialized
+    via :func:`fiftyone.core.utils.serialize_numpy_array`, which is the
+    format that the App expects by default. The ``"png"`` and ``"rle"``
+    encodings are dicts with ``"encoding"``, ``"shape"``, and ``"data"`` keys,
+    where ``"data"`` is a base64-encoded PNG image or a dict of the
+    ``"values"`` and ``"counts"`` of the runs of the row-major mask,
+    respectively.
+
+    Args:
+        mask: a numpy array
+        encoding ("npy"): the encoding to use. Supported values are
+            ``("npy", "png", "rle")``
+        max_size (None): an optional maximum width and height to which to
+            downsample the mask before encoding it
+
+    Returns:
+        the encoded mask
+    """
+    if encoding not in ENCODINGS:
+        raise ValueError(
+            "Unsupported mask encoding '%s'; supported values are %s"
+            % (encoding, ENCODINGS)
+        )
+
+    if max_size is not None:
+        mask = downsample_mask(mask, max_size)
+
+    if encoding == NPY:
+        return fou.serialize_numpy_array(mask, ascii=True)
+
+    if encoding == PNG:
+        data = _encode_png(mask)
+    else:
+        data = _encode_rle(mask)
+
+    return {"encoding": encoding, "shape": list(mask.shape), "data": data}
+
+
+def encode_masks(d, encoding=NPY, max_size=None, cache=None):
+    """Encodes all serialized masks in the given document dict in-place.
+
+    Args:
+        d: a sample or frame dict, as stored in the database
+        encoding ("npy"): the encoding to use. See :func:`encode_mask`
+        max_size (None): an optional maximum width and height to which to
+            downsample the masks
+        cache (None): an optional :class:`MaskCache` of encoded masks. Masks
+            are cached by a digest of their serialized contents, so edited
+            masks are never served from the cache
+
+    Returns:
+        a dict mapping the paths of the masks in the document to their encoded
+        values
+    """
+    results = {}
+    for path, container, key in _iter_masks(d):
+        raw = container[key]
+        value = None
+        if cache is not None:
+            mask_key = (hashlib.md5(raw).digest(), encoding, max_size)
+            value = cache.get(mask_key)
+
+        if value is None:
+            mask = fou.deserialize_numpy_array(raw)
+            value = encode_mask(mask, encoding=encoding, max_size=max_size)
+            if cache is not None:
+                cache.put(mask_key, value)
+
+        container[key] = value
+        results[path] = value
+
+    return results
+
+
+class MaskCache(object):
+    """Thread-safe LRU cache of encoded masks.
+
+    Args:
+        max_size (1024): the maximum number of masks to cache
+    """
+
+    def __init__(self, max_size=1024):
+        self.max_size = max_size
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        """Returns the cached value for the key, if any.
+
+        Args:
+            key: the key
+
+        Returns:
+            the cached value, or None
+        """
+        with self._lock:
+            value = self._cache.pop(key, None)
+            if value is not None:
+                self._cache[key] = value
+
+            return value
+
+    def put(self, key, value):
+        """Caches the value for the key.
+
+        Args:
+            key: the key
+            value: the value
+        """
+        with self._lock:
+            self._cache.pop(key, None)
+            self._cache[key] = value
+            while len(self._cache) > self.max_size:
+                self._cache.popitem(last=False)
+
+
+def _iter_masks(d, path=""):
+    if isinstance(d, dict):
+        for k, v in d.items():
+            _path = path + "." + k if path else k
+            if k == "mask" and isinstance(v, bytes):
+                yield _path, d, k
+            elif isinstance(v, (dict, list)):
+                for result in _iter_masks(v, path=_path):
+                    yield result
+    elif isinstance(d, list):
+        for idx, v in enumerate(d):
+            if isinstance(v, (dict, list)):
+                for result in _iter_masks(v, path="%s.%d" % (path, idx)):
+                    yield result
+
+
+def _encode_png(mask):
+    if mask.dtype == bool:
+        mask = mask.astype(np.uint8)
+    elif mask.dtype != np.uint8:
+        if mask.size and (mask.min() < 0 or mask.max() > 255):
+            raise ValueError(
+                "Only masks with values in [0, 255] can be encoded as PNG"
+            )
+
+        mask = mask.astype(np.uint8)
+
+    with io.BytesIO() as f:
+        PIL.Image.fromarray(mask).save(f, format="PNG")
+        return b64encode(f.getvalue()).decode("ascii")
+
+
+def _encode_rle(mask):
+    values = mask.ravel()
+    if not values.size:
+        return {"values": [], "counts": []}
+
+    starts = np.concatenate(
+        ([0], np.flatnonzero(values[1:] != values[:-1]) + 1)
+    )
+    counts = np.diff(np.concatenate((starts, [values.size])))
+    return {"values": values[starts].tolist(), "counts": counts.tolist()}
@@ -10,60 +10,132 @@ LABELS = "labels"
 SCALARS = "scalars"
 TAGS = "tags"
 
-DISTRIBUTION_PIPELINES = {
-    SCALARS: [
+
+def make_bool_distribution_pipeline(field_name):
+    """Returns a ``$facet`` sub-pipeline that computes the distribution of
+    the values of a boolean field.
+
+    Args:
+        field_name: the name of the field
+
+    Returns:
+        a list of pipeline stages
+    """
+    return [
+        {"$match": {field_name: {"$type": "bool"}}},
+        {"$group": {"_id": "$%s" % field_name, "count": {"$sum": 1}}},
+        {
+            "$group": {
+                "_id": field_name,
+                "data": {"$push": {"key": "$_id", "count": "$count"}},
+            }
+        },
+        {"$project": {"name": field_name, "type": "bool", "data": "$data"}},
+    ]
+
+
+def make_numeric_distribution_pipeline(
+    field_name, field_type, bounds=None, buckets=50
+):
+    """Returns a ``$facet`` sub-pipeline that computes a histogram of the
+    values of a numeric field.
+
+    If no bounds are provided, the buckets are chosen by ``$bucketAuto`` so
+    that the histogram is computed in a single pass over the samples. In this
+    case, the buckets contain roughly equal numbers of values and samples
+    without a value are omitted.
+
+    Args:
+        field_name: the name of the field
+        field_type: the type of the field, e.g., ``"int"`` or ``"float"``
+        bounds (None): the ``(min, max)`` bounds of the field, if known
+        buckets (50): the number of histogram buckets
+
+    Returns:
+        a list of pipeline stages
+    """
+    if bounds is None:
+        return _make_auto_numeric_distribution_pipeline(
+            field_name, field_type, buckets
+        )
+
+    mn, mx = bounds
+
+    # if min and max are equal, we artifically create a boundary
+    # @todo alternative approach to scalar fields with only one value
+    if mn == mx:
+        if mx > 0:
+            mn = 0
+        else:
+            mx = 0
+
+    step = (mx - mn) / buckets
+    boundaries = [mn + step * s for s in range(0, buckets)]
+
+    return [
+        {
+            "$bucket": {
+                "groupBy": "$%s" % field_name,
+                "boundaries": boundaries,
+                "default": "null",
+                "output": {"count": {"$sum": 1}},
+            }
+        },
+        {
+            "$group": {
+                "_id": field_name,
+                "data": {
+                    "$push": {
+                        "key": {
+                            "$cond": [
+                                {"$ne": ["$_id", "null"]},
+                                {"$add": ["$_id", step / 2]},
+                                "null",
+                            ]
+                        },
+                        "count": "$count",
+                    }
+                },
+            }
+        },
+        {
+            "$project": {
+                "name": field_name,
+                "type": field_type,
+                "data": "$data",
+            }
+        },
+    ]
+
+
+def _make_auto_numeric_distribution_pipeline(field_name, field_type, buckets):
+    return [
+        {"$match": {field_name: {"$type": "number"}}},
+        {
+            "$bucketAuto": {
+                "groupBy": "$%s" % field_name,
+                "buckets": buckets,
+                "output": {"count": {"$sum": 1}},
+            }
+        },
+        {
+            "$group": {
+                "_id": field_name,
+                "data": {
+                    "$push": {
+                        "key": {
+                            "$divide": [{"$add": ["$_id.min", "$_id.max"]}, 2,]
+                        },
+                        "count": "$count",
+                    }
+                },
+            }
+        },
         {
-            "$facet": {
-                "groupings": [
-                    {"$project": {"field": {"$objectToArray": "$$ROOT"}}},
-                    {"$unwind": "$field"},
-                    {"$match": {"field.k": {"$ne": "filepath"}}},
-                    {
-                        "$project": {
-                            "field": "$field",
-                            "type": {"$type": "$field.v"},
-                        }
-                    },
-                    {"$match": {"type": {"$ne": "array"}}},
-                    {
-                        "$match": {
-                            "field.v": {"$type": "bool"}
-                        },  # @todo: support strings
-                    },
-                    {"$project": {"field": "$field.k", "label": "$field.v"}},
-                    {
-                        "$group": {
-                            "_id": {
-                                "group": "$field",
-                                "label": "$label",
-                                "type": {"$type": "$label"},
-                            },
-                            "count": {"$sum": 1},
-                        }
-                    },
-                    {
-                        "$group": {
-                            "_id": {
-                                "group": "$_id.group",
-                                "type": "$_id.type",
-                            },
-                            "data": {
-                                "$push": {
-                                    "key": "$_id.label",
-                                    "count": "$count",
-                                }
-                            },
-                        }
-                    },
-                    {
-                        "$project": {
-                            "name": "$_id.group",
-                            "type": "$_id.type",
-                            "data": "$data",
-                        }
-                    },
-                ],
+            "$project": {
+                "name": field_name,
+                "type": field_type,
+                "data": "$data",
             }
-        }
-    ],
-}
+        },
+    ]
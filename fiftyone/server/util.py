@@ -10,6 +10,7 @@ TODO (BEN): clean up, document, and fit into fiftyone.core
 |
 """
 import collections
+import functools
 import json
 import mimetypes
 import os
@@ -54,6 +55,29 @@ def get_file_dimensions(file_path):
     raise UnknownFileFormat("Unhandled mime type: %r" % mime_type)
 
 
+# The maximum number of file dimensions to cache
+_DIMENSIONS_CACHE_SIZE = 65536
+
+
+def get_cached_file_dimensions(file_path):
+    """
+    Calculates the dimensions of the specified file, reusing previously
+    calculated dimensions if the file has not been modified since.
+
+    Args:
+        file_path (str): path to the file
+
+    Returns:
+        tuple: (width, height) as integers
+    """
+    return _get_file_dimensions(file_path, os.path.getmtime(file_path))
+
+
+@functools.lru_cache(maxsize=_DIMENSIONS_CACHE_SIZE)
+def _get_file_dimensions(file_path, mtime):
+    return get_file_dimensions(file_path)
+
+
 types = collections.OrderedDict()
 BMP = types["BMP"] = "BMP"
 GIF = types["GIF"] = "GIF"
@@ -18,7 +18,10 @@ from builtins import *
 # pragma pylint: enable=unused-wildcard-import
 # pragma pylint: enable=wildcard-import
 
+from concurrent.futures import ProcessPoolExecutor
+import contextlib
 import logging
+import numbers
 
 import numpy as np
 
@@ -29,37 +32,37 @@ import fiftyone.core.utils as fou
 logger = logging.getLogger(__name__)
 
 
+# The number of samples whose detections are matched per batch
+_BATCH_SIZE = 100
+
+
 def evaluate_detections(
-    samples, pred_field, gt_field="ground_truth", iou=0.75,
+    samples, pred_field, gt_field="ground_truth", iou=0.75, num_workers=None,
 ):
     """Evaluates the predicted detections in the given samples with respect to
     the specified ground truth detections using the specified Intersection over
-    Union (IoU) threshold to determine matches.
+    Union (IoU) threshold(s) to determine matches.
 
     This method uses COCO-style evaluation. In particular, this means that if a
     :class:`fiftyone.core.labels.Detection` in the ground truth field has a
     boolean attribute called ``iscrowd``, then this detection can have multiple
     true positive predictions matched to it.
 
-    Dictionaries are added to each predicted/ground truth
-    :class:`fiftyone.core.labels.Detections` instance in the fields listed
-    below; these fields tabulate the true positive (TP), false positive (FP),
-    and false negative (FN) counts for the sample at the specified IoU::
-
-        Ground truth:   detections.<pred_field>_eval
-        Predictions:    detections.<gt_field>_eval
+    The IoUs between the predicted and ground truth objects of each category
+    are computed once per image, and matching is then performed for all of the
+    requested IoU thresholds in a single pass over the samples.
 
-    Dictionaries are also added to each individual
+    Dictionaries are added to each individual
     :class:`fiftyone.core.labels.Detection` instance in the fields listed
     below; these fields tabulate the IDs of the matching ground
-    truth/prediction for the detection at the specified IoU::
+    truth/prediction for the detection at each specified IoU::
 
         Ground truth:   detection.<pred_field>_eval
         Predictions:    detection.<gt_field>_eval
 
     In addition, true positive (TP), false positive (FP), and false negative
-    (FN) counts at the specified IoU are saved in the following top-level
-    fields of each sample::
+    (FN) counts at each specified IoU are saved in the following top-level
+    fields of each sample (and each frame, for video samples)::
 
         TP: sample.tp_iou_<iou>
         FP: sample.fp_iou_<iou>
@@ -75,206 +78,236 @@ def evaluate_detections(
             :class:`fiftyone.core.labels.Detections` to evaluate
         gt_field ("ground_truth"): the name of the field containing the ground
             truth :class:`fiftyone.core.labels.Detections`
-        iou (0.75): an IoU value for which to compute
-            per-detection and per-image TP/FP/FN
+        iou (0.75): an IoU value or iterable of IoU values for which to
+            compute per-detection and per-image TP/FP/FN
+        num_workers (None): an optional number of worker processes to use to
+            perform the matching. By default, matching is performed in the
+            main process
     """
     gt_key = "%s_eval" % pred_field
     pred_key = "%s_eval" % gt_field
-    eval_id = 0
 
-    iou_str = str(iou).replace(".", "_")
+    if isinstance(iou, numbers.Number):
+        ious = [iou]
+    else:
+        ious = list(iou)
+
+    iou_strs = [str(i).replace(".", "_") for i in ious]
+
+    if num_workers:
+        executor = ProcessPoolExecutor(max_workers=num_workers)
+    else:
+        executor = contextlib.ExitStack()
 
     logger.info("Evaluating detections...")
-    with fou.ProgressBar() as pb:
-        for sample in pb(samples):
+    with fou.ProgressBar() as pb, _save_context(samples), executor:
+        for batch in fou.iter_batches(pb(samples), _BATCH_SIZE):
             # Get image(s) to process
-            if sample.media_type == fom.VIDEO:
-                images = sample.frames.values()
-                has_frames = True
+            images = []
+            for sample in batch:
+                if sample.media_type == fom.VIDEO:
+                    images.extend(sample.frames.values())
+                else:
+                    images.append(sample)
+
+            dets = [
+                _get_detections(img, pred_field, gt_field) for img in images
+            ]
+            tasks = [
+                (
+                    _to_arrays(pred_dets),
+                    _to_arrays(gt_dets, include_crowds=True),
+                    ious,
+                )
+                for pred_dets, gt_dets in dets
+            ]
+
+            if num_workers:
+                results = executor.map(_match_image, tasks)
             else:
-                images = [sample]
-                has_frames = False
-
-            # Initialize sample result dict tp, fp, fn = 0 for each IoU
-            sample_result_dict = {
-                "true_positives": 0,
-                "false_positives": 0,
-                "false_negatives": 0,
-            }
-
-            for image in images:
-                preds = image[pred_field]
-                gts = image[gt_field]
-
-                # Sort preds and gt detections by category label
-                image_cats = {}
-                for det in preds.detections:
-                    if pred_key not in det:
-                        det[pred_key] = {}
-
-                    if "matches" not in det[pred_key]:
-                        det[pred_key]["matches"] = {
-                            iou_str: {"gt_id": -1, "iou": -1}
-                        }
-
-                    else:
-                        matches = dict(det[pred_key]["matches"])
-                        matches[iou_str] = {"gt_id": -1, "iou": -1}
-                        det[pred_key]["matches"] = matches
-
-                    if det.label not in image_cats:
-                        image_cats[det.label] = {}
-                        image_cats[det.label]["preds"] = []
-                        image_cats[det.label]["gts"] = []
-                    image_cats[det.label]["preds"].append(det)
-
-                for det in gts.detections:
-                    if gt_key not in det:
-                        det[gt_key] = {}
-
-                    if "matches" not in det[gt_key]:
-                        det[gt_key]["matches"] = {
-                            iou_str: {"pred_id": -1, "iou": -1}
-                        }
-
-                    else:
-                        matches = dict(det[gt_key]["matches"])
-                        matches[iou_str] = {"pred_id": -1, "iou": -1}
-                        det[gt_key]["matches"] = matches
-
-                    if det.label not in image_cats:
-                        image_cats[det.label] = {}
-                        image_cats[det.label]["preds"] = []
-                        image_cats[det.label]["gts"] = []
-                    image_cats[det.label]["gts"].append(det)
-
-                # Compute IoU for every detection and gt
-                pred_ious = {}
-
-                for cat, dets in image_cats.items():
-                    gts = dets["gts"]
-                    preds = dets["preds"]
-
-                    inds = np.argsort(
-                        [-(p.confidence or 0.0) for p in preds],
-                        kind="mergesort",
-                    )
-                    preds = [preds[i] for i in inds]
-                    image_cats[cat]["preds"] = preds
-
-                    gt_ids = [g.id for g in gts]
-
-                    gt_boxes = [list(g.bounding_box) for g in gts]
-                    pred_boxes = [list(p.bounding_box) for p in preds]
-
-                    iscrowd = [False] * len(gt_boxes)
-                    for gind, g in enumerate(gts):
-                        if "iscrowd" in g.attributes:
-                            iscrowd[gind] = bool(g.attributes["iscrowd"].value)
-
-                    # Get the IoU of every prediction with every ground truth
-                    # shape = [num_preds, num_gts]
-                    ious = _compute_iou(pred_boxes, gt_boxes, iscrowd)
-
-                    for pind, gt_ious in enumerate(ious):
-                        pred_ious[preds[pind].id] = list(zip(gt_ids, gt_ious))
-
-                #
-                # Starting with highest confidence prediction, match all with
-                # GTs. Store true and false positives
-                #
-                # Reference implementation:
-                # https://github.com/cocodataset/cocoapi/blob/8c9bcc3cf640524c4c20a9c40e89cb6a2f2fa0e9/PythonAPI/pycocotools/cocoeval.py#L273
-                #
-                true_pos = 0
-                false_pos = 0
-                for cat, dets in image_cats.items():
-                    gt_by_id = {g.id: g for g in dets["gts"]}
-
-                    # Note: predictions were sorted by confidence in the
-                    # previous step
-                    preds = dets["preds"]
-
-                    # Match each prediction to the highest IoU ground truth
-                    # available
-                    for pred in preds:
-                        if pred.id in pred_ious:
-                            best_match = -1
-                            best_match_iou = min([iou, 1 - 1e-10])
-                            for gt_id, det_iou in pred_ious[pred.id]:
-                                gt = gt_by_id[gt_id]
-                                curr_gt_match = gt[gt_key]["matches"][iou_str][
-                                    "pred_id"
-                                ]
-
-                                if "iscrowd" in gt.attributes:
-                                    iscrowd = bool(
-                                        gt.attributes["iscrowd"].value
-                                    )
-                                else:
-                                    iscrowd = False
-
-                                # Cannot match two preds to the same gt unless
-                                # the gt is a crowd
-                                if curr_gt_match != -1 and not iscrowd:
-                                    continue
-
-                                # Ignore gts with an IoU lower than what was
-                                # already found
-                                if det_iou < best_match_iou:
-                                    continue
-
-                                best_match_iou = det_iou
-                                best_match = gt_id
-
-                            if best_match != -1:
-                                # If the prediction was matched, store the eval
-                                # id of the pred in the gt and of the gt in the
-                                # pred
-                                gt_to_store = gt_by_id[best_match][gt_key]
-                                gt_to_store["matches"][iou_str] = {
-                                    "pred_id": pred.id,
-                                    "iou": best_match_iou,
-                                }
-                                pred[pred_key]["matches"][iou_str] = {
-                                    "gt_id": best_match,
-                                    "iou": best_match_iou,
-                                }
-                                true_pos += 1
-                            else:
-                                false_pos += 1
-
-                        elif pred.label == cat:
-                            false_pos += 1
-
-                sample_result_dict["true_positives"] += true_pos
-                sample_result_dict["false_positives"] += false_pos
-                false_neg = len(
-                    [
-                        g
-                        for g in dets["gts"]
-                        if g[gt_key]["matches"][iou_str]["pred_id"] == -1
-                    ]
+                results = map(_match_image, tasks)
+
+            for image, (pred_dets, gt_dets), result in zip(
+                images, dets, results
+            ):
+                _store_matches(
+                    image,
+                    pred_dets,
+                    gt_dets,
+                    result,
+                    pred_key,
+                    gt_key,
+                    iou_strs,
                 )
 
-                sample_result_dict["false_negatives"] += false_neg
+            for sample in batch:
+                if sample.media_type == fom.VIDEO:
+                    frames = list(sample.frames.values())
+                    for iou_str in iou_strs:
+                        for prefix in ("tp", "fp", "fn"):
+                            field = "%s_iou_%s" % (prefix, iou_str)
+                            sample[field] = sum(f[field] for f in frames)
+
+                sample.save()
+
+
+def _save_context(samples):
+    # Batch the sample saves when possible
+    if hasattr(samples, "save_context"):
+        return samples.save_context()
+
+    return contextlib.ExitStack()
 
-                image["tp_iou_%s" % iou_str] = true_pos
-                image["fp_iou_%s" % iou_str] = false_pos
-                image["fn_iou_%s" % iou_str] = false_neg
 
-            if has_frames:
-                sample["tp_iou_%s" % iou_str] = sample_result_dict[
-                    "true_positives"
-                ]
-                sample["fp_iou_%s" % iou_str] = sample_result_dict[
-                    "false_positives"
-                ]
-                sample["fn_iou_%s" % iou_str] = sample_result_dict[
-                    "false_negatives"
-                ]
+def _get_detections(image, pred_field, gt_field):
+    preds = image[pred_field]
+    gts = image[gt_field]
+    pred_dets = preds.detections if preds is not None else []
+    gt_dets = gts.detections if gts is not None else []
+    return pred_dets, gt_dets
 
-            sample.save()
+
+def _to_arrays(dets, include_crowds=False):
+    labels = np.array([d.label for d in dets], dtype=object)
+    boxes = np.array(
+        [list(d.bounding_box) for d in dets], dtype=float
+    ).reshape(-1, 4)
+
+    if include_crowds:
+        values = np.array([_is_crowd(d) for d in dets], dtype=bool)
+    else:
+        values = np.array([d.confidence or 0.0 for d in dets], dtype=float)
+
+    return labels, boxes, values
+
+
+def _is_crowd(det):
+    if "iscrowd" in det.attributes:
+        return bool(det.attributes["iscrowd"].value)
+
+    return False
+
+
+def _match_image(task):
+    """Matches the predicted and ground truth objects of an image at each of
+    the given IoU thresholds.
+
+    Reference implementation:
+    https://github.com/cocodataset/cocoapi/blob/8c9bcc3cf640524c4c20a9c40e89cb6a2f2fa0e9/PythonAPI/pycocotools/cocoeval.py#L273
+
+    Args:
+        task: a ``(preds, gts, ious)`` tuple, where ``preds`` is a tuple of
+            ``(labels, boxes, confidences)`` arrays, ``gts`` is a tuple of
+            ``(labels, boxes, iscrowd)`` arrays, and ``ious`` is a list of IoU
+            thresholds
+
+    Returns:
+        a tuple of ``(pred_matches, pred_ious, gt_matches, gt_ious)`` arrays
+        of shape ``num_ious x num_preds`` and ``num_ious x num_gts``
+        containing the index of the matching object (or -1 if unmatched) and
+        the IoU of the match
+    """
+    (
+        (pred_labels, pred_boxes, confs),
+        (gt_labels, gt_boxes, crowds),
+        ious,
+    ) = task
+
+    num_ious = len(ious)
+    pred_matches = np.full((num_ious, len(pred_labels)), -1, dtype=int)
+    pred_ious = np.full((num_ious, len(pred_labels)), -1.0)
+    gt_matches = np.full((num_ious, len(gt_labels)), -1, dtype=int)
+    gt_ious = np.full((num_ious, len(gt_labels)), -1.0)
+
+    for label in set(pred_labels):
+        ginds = np.flatnonzero(gt_labels == label)
+        if ginds.size == 0:
+            continue
+
+        # Sort predictions by confidence
+        pinds = np.flatnonzero(pred_labels == label)
+        pinds = pinds[np.argsort(-confs[pinds], kind="mergesort")]
+
+        # shape = [num_preds, num_gts]
+        cat_ious = _compute_iou(
+            pred_boxes[pinds], gt_boxes[ginds], crowds[ginds]
+        )
+        cat_crowds = crowds[ginds]
+
+        for t, iou in enumerate(ious):
+            min_iou = min([iou, 1 - 1e-10])
+            matched = np.zeros(ginds.size, dtype=bool)
+
+            # Starting with the highest confidence prediction, match each to
+            # the available ground truth with the highest IoU. Ground truth
+            # can only be matched to multiple predictions if it is a crowd
+            for i, pind in enumerate(pinds):
+                candidate_ious = np.where(
+                    matched & ~cat_crowds, -1.0, cat_ious[i]
+                )
+
+                # Ties are broken in favor of the last ground truth object
+                j = ginds.size - 1 - np.argmax(candidate_ious[::-1])
+                best_iou = candidate_ious[j]
+                if best_iou < min_iou:
+                    continue
+
+                matched[j] = True
+                gind = ginds[j]
+                pred_matches[t, pind] = gind
+                pred_ious[t, pind] = best_iou
+                gt_matches[t, gind] = pind
+                gt_ious[t, gind] = best_iou
+
+    return pred_matches, pred_ious, gt_matches, gt_ious
+
+
+def _store_matches(
+    image, pred_dets, gt_dets, result, pred_key, gt_key, iou_strs
+):
+    pred_matches, pred_ious, gt_matches, gt_ious = result
+
+    for pind, det in enumerate(pred_dets):
+        matches = {}
+        for t, iou_str in enumerate(iou_strs):
+            gind = pred_matches[t, pind]
+            if gind >= 0:
+                matches[iou_str] = {
+                    "gt_id": gt_dets[gind].id,
+                    "iou": float(pred_ious[t, pind]),
+                }
+            else:
+                matches[iou_str] = {"gt_id": -1, "iou": -1}
+
+        _update_matches(det, pred_key, matches)
+
+    for gind, det in enumerate(gt_dets):
+        matches = {}
+        for t, iou_str in enumerate(iou_strs):
+            pind = gt_matches[t, gind]
+            if pind >= 0:
+                matches[iou_str] = {
+                    "pred_id": pred_dets[pind].id,
+                    "iou": float(gt_ious[t, gind]),
+                }
+            else:
+                matches[iou_str] = {"pred_id": -1, "iou": -1}
+
+        _update_matches(det, gt_key, matches)
+
+    for t, iou_str in enumerate(iou_strs):
+        true_pos = int(np.count_nonzero(pred_matches[t] >= 0))
+        image["tp_iou_%s" % iou_str] = true_pos
+        image["fp_iou_%s" % iou_str] = len(pred_dets) - true_pos
+        image["fn_iou_%s" % iou_str] = int(np.count_nonzero(gt_matches[t] < 0))
+
+
+def _update_matches(det, key, matches):
+    eval_dict = dict(det[key]) if key in det else {}
+    _matches = dict(eval_dict.get("matches", {}))
+    _matches.update(matches)
+    eval_dict["matches"] = _matches
+    det[key] = eval_dict
 
 
 def _compute_iou(pred_boxes, gt_boxes, iscrowd):
@@ -287,36 +320,33 @@ def _compute_iou(pred_boxes, gt_boxes, iscrowd):
     of the predicted bounding box.
 
     Args:
-        pred_boxes: a list of predicted bounding box coordinates
-        gt_boxes: a list of ground truth bounding box coordinates
-        iscrowd: a boolean list corresponding to each ground truth box
+        pred_boxes: a ``num_preds x 4`` array-like of predicted bounding box
+            coordinates
+        gt_boxes: a ``num_gts x 4`` array-like of ground truth bounding box
+            coordinates
+        iscrowd: a boolean array-like corresponding to each ground truth box
             indicating whether it represents a crowd
 
     Returns:
-        an array of IoU values computed for each provided predicted and ground
-        truth box
+        a ``num_preds x num_gts`` array of IoU values computed for each
+        provided predicted and ground truth box
     """
-    ious = np.zeros((len(pred_boxes), len(gt_boxes)))
-    for g, gt_box in enumerate(gt_boxes):
-        gx, gy, gw, gh = gt_box
-        crowd = iscrowd[g]
-        g_area = gh * gw
-        for p, pred_box in enumerate(pred_boxes):
-            px, py, pw, ph = pred_box
-
-            # Width of intersection
-            w = min(px + pw, gx + gw) - max(px, gx)
-            if w <= 0:
-                continue
-
-            # Height of intersection
-            h = min(py + ph, gy + gh) - max(py, gy)
-            if h <= 0:
-                continue
-
-            p_area = ph * pw
-            inter = h * w
-            union = p_area if crowd else p_area + g_area - inter
-            ious[p, g] = inter / union
+    pred_boxes = np.asarray(pred_boxes, dtype=float).reshape(-1, 4)
+    gt_boxes = np.asarray(gt_boxes, dtype=float).reshape(-1, 4)
+    iscrowd = np.asarray(iscrowd, dtype=bool).reshape(-1)
+
+    px, py, pw, ph = [c[:, np.newaxis] for c in pred_boxes.T]
+    gx, gy, gw, gh = [c[np.newaxis, :] for c in gt_boxes.T]
+
+    # Width and height of intersections
+    w = np.minimum(px + pw, gx + gw) - np.maximum(px, gx)
+    h = np.minimum(py + ph, gy + gh) - np.maximum(py, gy)
+    inter = np.maximum(w, 0) * np.maximum(h, 0)
+
+    p_area = pw * ph
+    g_area = gw * gh
+    union = np.where(iscrowd[np.newaxis, :], p_area, p_area + g_area - inter)
 
+    ious = np.zeros(inter.shape)
+    np.divide(inter, union, out=ious, where=inter > 0)
     return ious
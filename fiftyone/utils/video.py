@@ -5,6 +5,7 @@ Video utilities.
 | `voxel51.com <https://voxel51.com/>`_
 |
 """
+from functools import partial
 import os
 import random
 import string
@@ -50,7 +51,7 @@ def reencode_videos(
             executed
         **kwargs: keyword arguments for ``eta.core.video.FFmpeg(**kwargs)``
     """
-    with fou.ProgressBar() as pb:
+    with fou.ProgressBar() as pb, sample_collection.save_context() as ctx:
         with etav.FFmpeg(**kwargs) as ffmpeg:
             for sample in pb(sample_collection.select_fields()):
                 inpath = sample.filepath
@@ -69,4 +70,5 @@ def reencode_videos(
                 sample.save()
 
                 if delete_originals:
-                    etau.delete_file(inpath)
+                    # Don't delete originals until the new paths are saved
+                    ctx.add_callback(partial(etau.delete_file, inpath))
@@ -41,6 +41,6 @@ samples = [s.copy() for s in dataset]
 
 logger.info("\nStarting test")
 for batch_size in [1, 2, 4, 8, 16, 32, 64, 128, 256, 512, 1024, 2048, None]:
-    logger.info("\nBatch size: %s" % batch_size)
+    logger.info("\nBatch size: %s" % (batch_size or "dynamic"))
     dataset2 = fo.Dataset()
     dataset2.add_samples(samples, _batch_size=batch_size)
@@ -0,0 +1,133 @@
+"""
+Benchmarking for :meth:`fiftyone.server.json_util.FiftyOneJSONEncoder.dumps`.
+
+Compares the single-pass encoder against the previous implementation, which
+walked messages with :func:`fiftyone.server.json_util.convert` and then
+serialized them with a ``dumps()``-``loads()``-``dumps()`` round trip.
+
+| Copyright 2017-2020, Voxel51, Inc.
+| `voxel51.com <https://voxel51.com/>`_
+|
+"""
+from copy import deepcopy
+import timeit
+
+from bson import ObjectId, json_util
+import numpy as np
+
+import fiftyone.core.utils as fou
+from fiftyone.server.json_util import convert, FiftyOneJSONEncoder
+
+
+NUMBER = 20
+
+
+def legacy_dumps(message):
+    message = deepcopy(message)
+    convert(message)
+    return json_util.dumps(
+        json_util.loads(json_util.dumps(message), parse_constant=lambda c: c)
+    )
+
+
+def make_detection(label, confidence=None):
+    d = {
+        "_id": ObjectId(),
+        "_cls": "Detection",
+        "label": label,
+        "bounding_box": list(np.random.rand(4)),
+        "attributes": {},
+    }
+    if confidence is not None:
+        d["confidence"] = confidence
+
+    return d
+
+
+def make_sample(idx, num_objects=20):
+    return {
+        "_id": ObjectId(),
+        "filepath": "/path/to/image%d.jpg" % idx,
+        "tags": ["train"],
+        "metadata": {
+            "_cls": "ImageMetadata",
+            "size_bytes": 1024,
+            "mime_type": "image/jpeg",
+            "width": 640,
+            "height": 480,
+            "num_channels": 3,
+        },
+        "_media_type": "image",
+        "uniqueness": float(np.random.rand()),
+        "ground_truth": {
+            "_id": ObjectId(),
+            "_cls": "Detections",
+            "detections": [make_detection("cat") for _ in range(num_objects)],
+        },
+        "predictions": {
+            "_id": ObjectId(),
+            "_cls": "Detections",
+            "detections": [
+                make_detection("cat", float(np.random.rand()))
+                for _ in range(num_objects)
+            ],
+        },
+        "segmentation": {
+            "_id": ObjectId(),
+            "_cls": "Segmentation",
+            "mask": fou.serialize_numpy_array(
+                np.random.randint(0, 8, (64, 64), dtype=np.uint8)
+            ),
+        },
+    }
+
+
+page_message = {
+    "type": "page",
+    "page": 1,
+    "results": [
+        {"sample": make_sample(idx), "width": 640, "height": 480}
+        for idx in range(20)
+    ],
+    "more": 2,
+}
+
+statistics_message = {
+    "type": "statistics",
+    "extended": False,
+    "stats": [
+        {"_CLS": "CountResult", "name": "field%d" % idx, "count": idx}
+        for idx in range(50)
+    ]
+    + [
+        {
+            "_CLS": "BoundsResult",
+            "name": "numeric%d" % idx,
+            "bounds": [float("-inf"), float("nan")],
+        }
+        for idx in range(50)
+    ],
+}
+
+for name, message in [
+    ("page", page_message),
+    ("statistics", statistics_message),
+]:
+    assert json_util.loads(legacy_dumps(message)) == json_util.loads(
+        FiftyOneJSONEncoder.dumps(message)
+    )
+
+    legacy_time = timeit.timeit(lambda: legacy_dumps(message), number=NUMBER)
+    new_time = timeit.timeit(
+        lambda: FiftyOneJSONEncoder.dumps(message), number=NUMBER
+    )
+
+    print(
+        "%s message: legacy %.2fms, single-pass %.2fms (%.1fx)"
+        % (
+            name,
+            1000 * legacy_time / NUMBER,
+            1000 * new_time / NUMBER,
+            legacy_time / new_time,
+        )
+    )
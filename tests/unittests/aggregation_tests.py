@@ -194,6 +194,49 @@ class DatasetTests(unittest.TestCase):
             ["label"],
         )
 
+    @drop_datasets
+    def test_values(self):
+        d = fo.Dataset()
+        s1 = fo.Sample(
+            "image1.jpeg",
+            number=1.0,
+            ground_truth=fo.Detections(
+                detections=[
+                    fo.Detection(label="cat", confidence=0.9),
+                    fo.Detection(label="dog"),
+                ]
+            ),
+        )
+        s2 = fo.Sample("image2.jpeg", number=2.0)
+        d.add_samples([s1, s2])
+
+        self.assertListEqual(d.values("id"), [s1.id, s2.id])
+        self.assertListEqual(d.values("number"), [1.0, 2.0])
+        self.assertListEqual(
+            d.values("number", as_numpy=True).tolist(), [1.0, 2.0]
+        )
+        self.assertListEqual(
+            d.values("ground_truth.detections.label"), [["cat", "dog"], None]
+        )
+        self.assertListEqual(
+            d.values("ground_truth.detections.confidence"), [[0.9, None], None]
+        )
+        self.assertListEqual(
+            d.values("ground_truth.detections.label", unwind=True),
+            ["cat", "dog"],
+        )
+        self.assertListEqual(
+            d.values("ground_truth.detections.id", unwind=True),
+            [det.id for det in s1.ground_truth.detections],
+        )
+
+        detections = d.values("ground_truth")
+        self.assertIsInstance(detections[0], fo.Detections)
+        self.assertIsNone(detections[1])
+
+        view = d.sort_by("number", reverse=True)
+        self.assertListEqual(view.values("number"), [2.0, 1.0])
+
 
 if __name__ == "__main__":
     fo.config.show_progress_bars = False
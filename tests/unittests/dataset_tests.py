@@ -6,12 +6,19 @@ FiftyOne dataset-related unit tests.
 |
 """
 import gc
+import os
 import unittest
 
+import numpy as np
+from PIL import Image
+
+import eta.core.utils as etau
+
 import fiftyone as fo
 from fiftyone import ViewField as F
 import fiftyone.core.dataset as fod
 import fiftyone.core.odm as foo
+import fiftyone.core.sample as fos
 
 from decorators import drop_datasets
 
@@ -178,6 +185,164 @@ class DatasetTests(unittest.TestCase):
 
         self.assertEqual(sample["new_field"], value)
 
+    @drop_datasets
+    def test_add_samples_pipelined(self):
+        dataset = fo.Dataset()
+
+        samples = [
+            fo.Sample(filepath="/path/to/image%d.jpg" % i, field=i)
+            for i in range(100)
+        ]
+        sample_ids = dataset.add_samples(samples, num_workers=4)
+
+        self.assertEqual(len(dataset), 100)
+        self.assertListEqual(sample_ids, [s.id for s in samples])
+        self.assertListEqual(
+            [s.field for s in dataset], list(range(100)),
+        )
+
+    @drop_datasets
+    def test_save_context(self):
+        dataset = fo.Dataset()
+        dataset.add_samples(
+            [fo.Sample(filepath="/path/to/image%d.jpg" % i) for i in range(10)]
+        )
+
+        with dataset.save_context(batch_size=4) as ctx:
+            for idx, sample in enumerate(dataset):
+                sample["field"] = idx
+                sample.save()
+
+            self.assertEqual(ctx.num_pending, 2)
+
+        self.assertEqual(ctx.num_pending, 0)
+        self.assertSetEqual(dataset.distinct("field"), set(range(10)))
+
+        view = dataset.exclude_fields("field")
+        with view.save_context():
+            for sample in view:
+                sample.tags = ["test"]
+                sample.save()
+
+        self.assertListEqual(dataset.get_tags(), ["test"])
+        self.assertEqual(dataset.first().field, 0)
+
+    @drop_datasets
+    def test_iter_samples_readonly(self):
+        dataset = fo.Dataset()
+        dataset.add_samples(
+            [
+                fo.Sample(
+                    filepath="/path/to/image%d.jpg" % i,
+                    ground_truth=fo.Classification(label=str(i)),
+                    field=i,
+                )
+                for i in range(3)
+            ]
+        )
+
+        sample_ids = [sample.id for sample in dataset]
+        for sample_id, record in zip(
+            sample_ids, dataset.iter_samples(readonly=True)
+        ):
+            self.assertIsInstance(record, fos.SampleRecord)
+            self.assertEqual(record.id, sample_id)
+            self.assertIsInstance(record.ground_truth, fo.Classification)
+            self.assertEqual(record["field"], int(record.ground_truth.label))
+            with self.assertRaises(AttributeError):
+                record.field = 0
+
+            with self.assertRaises(AttributeError):
+                record.missing_field
+
+        view = dataset.exclude_fields("ground_truth")
+        record = next(view.iter_samples(readonly=True))
+        self.assertNotIn("ground_truth", record.field_names)
+        with self.assertRaises(AttributeError):
+            record.ground_truth
+
+        d = next(dataset.iter_dicts(fields="field"))
+        self.assertEqual(d["field"], 0)
+        self.assertNotIn("ground_truth", d)
+
+    @drop_datasets
+    def test_iter_samples_prefetch(self):
+        dataset = fo.Dataset()
+        dataset.add_samples(
+            [
+                fo.Sample(filepath="/path/to/image%d.jpg" % i, field=i)
+                for i in range(25)
+            ]
+        )
+
+        samples = dataset.iter_samples(batch_size=4, prefetch=2)
+        self.assertListEqual([s.field for s in samples], list(range(25)))
+
+        view = dataset.skip(5)
+        samples = view.iter_samples(readonly=True, batch_size=4, prefetch=2)
+        self.assertListEqual([s.field for s in samples], list(range(5, 25)))
+
+    @drop_datasets
+    def test_indexes(self):
+        dataset = fo.Dataset()
+        dataset.add_samples(
+            [
+                fo.Sample(filepath="/path/to/image%d.jpg" % i, field=i)
+                for i in range(5)
+            ]
+        )
+
+        self.assertIn("filepath", dataset.list_indexes())
+        self.assertNotIn("field", dataset.list_indexes())
+
+        for _ in range(2):
+            len(dataset.match(F("field") > 2))
+
+        # Internal pipelines and private fields are not recorded
+        dataset.match(F("field") > 2).values("field")
+        list(dataset.take(2))
+        self.assertNotIn("_rand", dataset._index_advisor.counts)
+        self.assertEqual(dataset._index_advisor.counts["field"], 2)
+
+        self.assertListEqual(dataset.ensure_indexes(min_count=3), [])
+        self.assertListEqual(dataset.ensure_indexes(min_count=2), ["field"])
+        self.assertNotIn("field", dataset.list_indexes())
+
+        self.assertListEqual(
+            dataset.ensure_indexes(min_count=2, create=True), ["field"]
+        )
+        self.assertIn("field", dataset.list_indexes())
+
+        self.assertListEqual(dataset.ensure_indexes("field"), [])
+        self.assertListEqual(dataset.ensure_indexes(["tags"]), ["tags"])
+        self.assertNotIn("tags", dataset.list_indexes())
+
+    @drop_datasets
+    def test_compute_metadata(self):
+        with etau.TempDir() as tmp_dir:
+            samples = []
+            for i in range(5):
+                filepath = os.path.join(tmp_dir, "image%d.png" % i)
+                img = np.zeros((8 + i, 16, 3), dtype=np.uint8)
+                Image.fromarray(img).save(filepath)
+                samples.append(fo.Sample(filepath=filepath))
+
+            dataset = fo.Dataset()
+            dataset.add_samples(samples)
+
+            dataset.compute_metadata(num_workers=2)
+
+        for i, sample in enumerate(samples):
+            self.assertIsInstance(sample.metadata, fo.ImageMetadata)
+            self.assertEqual(sample.metadata.width, 16)
+            self.assertEqual(sample.metadata.height, 8 + i)
+            self.assertEqual(sample.metadata.num_channels, 3)
+            self.assertEqual(sample.metadata.mime_type, "image/png")
+
+        # Samples with existing metadata are skipped
+        dataset.compute_metadata()
+        self.assertEqual(samples[0].metadata.height, 8)
+
 
 if __name__ == "__main__":
     fo.config.show_progress_bars = False
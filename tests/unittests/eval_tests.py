@@ -0,0 +1,90 @@
+"""
+FiftyOne evaluation-related unit tests.
+
+| Copyright 2017-2020, Voxel51, Inc.
+| `voxel51.com <https://voxel51.com/>`_
+|
+"""
+import unittest
+
+import numpy as np
+
+import fiftyone as fo
+import fiftyone.utils.eval.coco as fouc
+
+from decorators import drop_datasets
+
+
+class COCOEvaluationTests(unittest.TestCase):
+    def test_compute_iou(self):
+        pred_boxes = [[0.0, 0.0, 0.5, 0.5], [0.5, 0.5, 0.5, 0.5]]
+        gt_boxes = [[0.0, 0.0, 0.5, 0.25], [0.0, 0.0, 0.25, 0.25]]
+
+        ious = fouc._compute_iou(pred_boxes, gt_boxes, [False, True])
+        np.testing.assert_allclose(ious, [[0.5, 0.25], [0.0, 0.0]])
+
+        ious = fouc._compute_iou([], gt_boxes, [False, True])
+        self.assertEqual(ious.shape, (0, 2))
+
+    @drop_datasets
+    def test_evaluate_detections(self):
+        dataset = fo.Dataset()
+        dataset.add_sample(
+            fo.Sample(
+                filepath="/path/to/image.jpg",
+                ground_truth=fo.Detections(
+                    detections=[
+                        fo.Detection(
+                            label="cat", bounding_box=[0.0, 0.0, 0.5, 0.5]
+                        ),
+                        fo.Detection(
+                            label="dog", bounding_box=[0.5, 0.5, 0.5, 0.5]
+                        ),
+                    ]
+                ),
+                predictions=fo.Detections(
+                    detections=[
+                        fo.Detection(
+                            label="cat",
+                            bounding_box=[0.0, 0.0, 0.5, 0.4],
+                            confidence=0.9,
+                        ),
+                        fo.Detection(
+                            label="cat",
+                            bounding_box=[0.0, 0.0, 0.5, 0.5],
+                            confidence=0.5,
+                        ),
+                        fo.Detection(
+                            label="dog",
+                            bounding_box=[0.0, 0.5, 0.5, 0.5],
+                            confidence=0.8,
+                        ),
+                    ]
+                ),
+            )
+        )
+
+        fouc.evaluate_detections(
+            dataset, "predictions", gt_field="ground_truth", iou=[0.5, 0.9]
+        )
+
+        sample = dataset.first()
+        self.assertEqual(sample.tp_iou_0_5, 1)
+        self.assertEqual(sample.fp_iou_0_5, 2)
+        self.assertEqual(sample.fn_iou_0_5, 1)
+        self.assertEqual(sample.tp_iou_0_9, 1)
+        self.assertEqual(sample.fp_iou_0_9, 2)
+
+        cat_gt = sample.ground_truth.detections[0]
+        preds = sample.predictions.detections
+        matches = cat_gt["predictions_eval"]["matches"]
+        self.assertEqual(matches["0_5"]["pred_id"], preds[0].id)
+        self.assertEqual(matches["0_9"]["pred_id"], preds[1].id)
+        self.assertEqual(
+            preds[2]["ground_truth_eval"]["matches"]["0_5"]["gt_id"], -1
+        )
+
+
+if __name__ == "__main__":
+    fo.config.show_progress_bars = False
+    unittest.main(verbosity=2)
@@ -0,0 +1,208 @@
+"""
+FiftyOne pipeline optimizer unit tests.
+
+| Copyright 2017-2020, Voxel51, Inc.
+| `voxel51.com <https://voxel51.com/>`_
+|
+"""
+import unittest
+
+import fiftyone.core.optimizer as foop
+
+
+LOOKUP = {
+    "$lookup": {
+        "from": "frames.samples.abc",
+        "localField": "_id",
+        "foreignField": "_sample_id",
+        "as": "frames",
+    }
+}
+
+
+class OptimizerTests(unittest.TestCase):
+    def test_match_before_sort(self):
+        pipeline = [
+            {"$sort": {"filepath": 1}},
+            {"$match": {"tags": "train"}},
+        ]
+        self.assertListEqual(foop.optimize_pipeline(pipeline), pipeline[::-1])
+
+    def test_match_dependencies(self):
+        # Matches cannot be moved ahead of stages that modify their fields
+        pipeline = [
+            {"$addFields": {"_sort_field": {"$size": "$gt.detections"}}},
+            {"$match": {"_sort_field": {"$gt": 0}}},
+        ]
+        self.assertListEqual(foop.optimize_pipeline(pipeline), pipeline)
+
+        pipeline = [
+            {"$addFields": {"other": 1}},
+            {"$match": {"$expr": {"$gt": ["$uniqueness", 0.5]}}},
+        ]
+        self.assertListEqual(foop.optimize_pipeline(pipeline), pipeline[::-1])
+
+        pipeline = [
+            {"$unset": "field"},
+            {"$match": {"field": None}},
+        ]
+        self.assertListEqual(foop.optimize_pipeline(pipeline), pipeline)
+
+        pipeline = [
+            {"$project": {"filepath": True, "tags": True}},
+            {"$match": {"tags": "train"}},
+        ]
+        self.assertListEqual(foop.optimize_pipeline(pipeline), pipeline[::-1])
+
+        pipeline = [
+            {"$project": {"filepath": True}},
+            {"$match": {"tags": "train"}},
+        ]
+        self.assertListEqual(foop.optimize_pipeline(pipeline), pipeline)
+
+        # Matches that cannot be analyzed are never moved
+        pipeline = [
+            {"$sort": {"filepath": 1}},
+            {"$match": {"$where": "this.tags.length > 0"}},
+        ]
+        self.assertListEqual(foop.optimize_pipeline(pipeline), pipeline)
+
+        pipeline = [
+            {"$limit": 10},
+            {"$match": {"tags": "train"}},
+        ]
+        self.assertListEqual(foop.optimize_pipeline(pipeline), pipeline)
+
+    def test_defer_lookup(self):
+        pipeline = [
+            LOOKUP,
+            {"$match": {"tags": "train"}},
+            {"$sort": {"filepath": 1}},
+            {"$skip": 10},
+            {"$limit": 5},
+            {"$unset": "field"},
+        ]
+        self.assertListEqual(
+            foop.optimize_pipeline(pipeline), pipeline[1:] + [LOOKUP]
+        )
+
+        pipeline = [
+            LOOKUP,
+            {"$skip": 10},
+            {"$match": {"frames.1": {"$exists": True}}},
+            {"$limit": 5},
+        ]
+        self.assertListEqual(
+            foop.optimize_pipeline(pipeline),
+            [{"$skip": 10}, LOOKUP] + pipeline[2:],
+        )
+
+        pipeline = [LOOKUP, {"$project": {"filepath": True, "frames": True}}]
+        self.assertListEqual(foop.optimize_pipeline(pipeline), pipeline)
+
+    def test_eliminate_lookup(self):
+        # Frames are not needed to count samples
+        pipeline = [
+            LOOKUP,
+            {"$match": {"tags": "train"}},
+            {"$facet": {"count": [{"$count": "count"}]}},
+        ]
+        self.assertListEqual(foop.optimize_pipeline(pipeline), pipeline[1:])
+
+        # Frames are not needed to count the values of sample fields
+        pipeline = [
+            LOOKUP,
+            {"$unwind": "$tags"},
+            {"$group": {"_id": "$tags", "count": {"$sum": 1}}},
+        ]
+        self.assertListEqual(foop.optimize_pipeline(pipeline), pipeline[1:])
+
+        # Frames are not needed when they are excluded from the output
+        pipeline = [
+            LOOKUP,
+            {"$skip": 20},
+            {"$limit": 20},
+            {"$project": {"frames": False}},
+        ]
+        self.assertListEqual(foop.optimize_pipeline(pipeline), pipeline[1:])
+
+        pipeline = [LOOKUP, {"$project": {"_id": False, "value": "$tags"}}]
+        self.assertListEqual(foop.optimize_pipeline(pipeline), pipeline[1:])
+
+        # Frames are needed when they are referenced or returned
+        pipeline = [LOOKUP, {"$skip": 20}]
+        self.assertListEqual(foop.optimize_pipeline(pipeline), pipeline[::-1])
+
+        pipeline = [
+            LOOKUP,
+            {"$unwind": "$frames"},
+            {"$replaceRoot": {"newRoot": "$frames"}},
+        ]
+        self.assertListEqual(foop.optimize_pipeline(pipeline), pipeline)
+
+        pipeline = [LOOKUP, {"$project": {"frames.label": False}}]
+        self.assertListEqual(foop.optimize_pipeline(pipeline), pipeline)
+
+        # Frames are only joined in the facets that need them
+        frames_facet = [
+            {"$unwind": "$frames"},
+            {"$group": {"_id": None, "count": {"$sum": 1}}},
+        ]
+        pipeline = [
+            LOOKUP,
+            {
+                "$facet": {
+                    "count": [{"$count": "count"}],
+                    "frames": frames_facet,
+                }
+            },
+        ]
+        self.assertListEqual(
+            foop.optimize_pipeline(pipeline),
+            [
+                {
+                    "$facet": {
+                        "count": [{"$count": "count"}],
+                        "frames": [LOOKUP] + frames_facet,
+                    }
+                }
+            ],
+        )
+
+        pipeline = [
+            LOOKUP,
+            {"$facet": {"one": frames_facet, "two": frames_facet}},
+        ]
+        self.assertListEqual(foop.optimize_pipeline(pipeline), pipeline)
+
+    def test_fuse_stages(self):
+        pipeline = [
+            {"$match": {"tags": "train"}},
+            {"$match": {"$and": [{"a": 1}, {"b": 2}]}},
+            {"$unset": "c"},
+            {"$unset": ["d", "c"]},
+            {"$project": {"e": True, "f": True, "g": True}},
+            {"$project": {"g": True, "e": True, "_id": False}},
+        ]
+        self.assertListEqual(
+            foop.optimize_pipeline(pipeline),
+            [
+                {"$match": {"$and": [{"tags": "train"}, {"a": 1}, {"b": 2}]}},
+                {"$unset": ["c", "d"]},
+                {"$project": {"e": True, "g": True, "_id": False}},
+            ],
+        )
+
+        # Conflicting paths are not fused
+        pipeline = [{"$unset": "a"}, {"$unset": "a.b"}]
+        self.assertListEqual(foop.optimize_pipeline(pipeline), pipeline)
+
+        pipeline = [
+            {"$project": {"a": True}},
+            {"$project": {"b": True}},
+        ]
+        self.assertListEqual(foop.optimize_pipeline(pipeline), pipeline)
+
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
@@ -12,6 +12,7 @@ import numpy as np
 
 import fiftyone as fo
 import fiftyone.core.media as fom
+import fiftyone.core.utils as fou
 from fiftyone.migrations.runner import Runner
 
 from decorators import drop_datasets
@@ -202,6 +203,77 @@ class MigrationTests(unittest.TestCase):
         self.assertEqual(runner.revisions, ["0.1"])
 
 
+class BatcherTests(unittest.TestCase):
+    def test_dynamic_batcher(self):
+        elements = list(range(1000))
+
+        batcher = fou.DynamicBatcher(
+            elements, target_latency=None, init_batch_size=10
+        )
+        batches = list(batcher)
+        self.assertEqual(len(batches[0]), 10)
+        self.assertListEqual([e for batch in batches for e in batch], elements)
+
+        batcher = fou.DynamicBatcher(
+            elements,
+            target_latency=None,
+            target_size=100,
+            init_batch_size=4,
+            max_batch_beta=2.0,
+        )
+        sizes = []
+        for batch in batcher:
+            sizes.append(len(batch))
+            batcher.record_size(10 * len(batch))
+
+        self.assertListEqual(sizes[:4], [4, 8, 10, 10])
+        self.assertEqual(sum(sizes), len(elements))
+
+        # Sizes may be recorded for batches other than the most recent one
+        batcher = fou.DynamicBatcher(
+            elements,
+            target_latency=None,
+            target_size=100,
+            init_batch_size=4,
+            max_batch_beta=2.0,
+        )
+        sizes = []
+        prev_batch = None
+        for batch in batcher:
+            sizes.append(len(batch))
+            if prev_batch is not None:
+                batcher.record_size(
+                    10 * len(prev_batch), num_elements=len(prev_batch)
+                )
+
+            prev_batch = batch
+
+        self.assertListEqual(sizes[:5], [4, 4, 8, 10, 10])
+        self.assertEqual(sum(sizes), len(elements))
+
+        batcher = fou.DynamicBatcher(
+            elements, target_latency=None, init_batch_size=64, max_batch_size=8
+        )
+        self.assertTrue(all(len(batch) <= 8 for batch in batcher))
+
+    def test_iter_prefetched(self):
+        elements = list(range(1000))
+
+        prefetched = fou.iter_prefetched(elements, 2, batch_size=16)
+        self.assertListEqual(list(prefetched), elements)
+
+        def _generate():
+            yield 1
+            raise ValueError("test")
+
+        with self.assertRaises(ValueError):
+            list(fou.iter_prefetched(_generate(), 2))
+
+        prefetched = fou.iter_prefetched(iter(elements), 1, batch_size=4)
+        self.assertEqual(next(prefetched), 0)
+        prefetched.close()
+
+
 if __name__ == "__main__":
     fo.config.show_progress_bars = False
     unittest.main(verbosity=2)
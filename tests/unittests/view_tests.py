@@ -6,6 +6,7 @@ FiftyOne view-related unit tests.
 |
 """
 import math
+import time
 import unittest
 
 import fiftyone as fo
@@ -699,6 +700,24 @@ class ViewStageTests(unittest.TestCase):
         self.assertIs(len(result), 1)
         self.assertEqual(result[0].id, self.sample1.id)
 
+    def test_match_index_queries(self):
+        self.sample1["value"] = 1
+        self.sample1.save()
+        self.sample2["value"] = None
+        self.sample2.save()
+
+        # Comparisons of indexable fields are also expressed as queries
+        view = self.dataset.match((F("value") > 0) & (F("value") < 2))
+        query = view._pipeline()[0]["$match"]
+        self.assertDictEqual(query["$and"][0], {"value": {"$gt": 0}})
+        self.assertListEqual([s.id for s in view], [self.sample1.id])
+
+        # `$lt` also matches null values in expressions
+        view = self.dataset.match(F("value") < 2)
+        query = view._pipeline()[0]["$match"]
+        self.assertNotIn("$and", query)
+        self.assertEqual(len(view), 2)
+
     def test_match_tag(self):
         self.sample1.tags.append("test")
         self.sample1.save()
@@ -756,6 +775,38 @@ class ViewStageTests(unittest.TestCase):
             with self.assertRaises(AttributeError):
                 sample.select_fields_field
 
+    def test_iter_samples_fields(self):
+        self.dataset.add_sample_field("field_one", fo.IntField)
+        self.dataset.add_sample_field("field_two", fo.IntField)
+
+        for sample in self.dataset.iter_samples(fields="field_one"):
+            self.assertIsInstance(sample, fos.SampleView)
+            sample.filepath
+            sample.field_one
+            with self.assertRaises(AttributeError):
+                sample.field_two
+
+        view = self.dataset.sort_by("filepath")
+        samples = list(view.iter_samples(fields=["field_two"]))
+        self.assertEqual(samples[0].id, self.sample1.id)
+        with self.assertRaises(AttributeError):
+            samples[0].field_one
+
+    def test_push_down_projections(self):
+        self.dataset.add_sample_field("field_one", fo.IntField)
+
+        view = self.dataset.take(2, seed=51).exclude_fields("field_one")
+        stages = [next(iter(s)) for s in view._pipeline()]
+        self.assertLess(stages.index("$unset"), stages.index("$sort"))
+        self.assertSetEqual(
+            {s.id for s in view}, {self.sample1.id, self.sample2.id}
+        )
+
+        # Projections cannot be moved ahead of stages that may depend on them
+        view = self.dataset.exists("field_one").exclude_fields("field_one")
+        pipeline = view._pipeline()
+        self.assertIn("$match", pipeline[0])
+
     def test_skip(self):
         result = list(self.dataset.sort_by("filepath").skip(1))
         self.assertIs(len(result), 1)
@@ -773,6 +824,61 @@ class ViewStageTests(unittest.TestCase):
         result = list(self.dataset.take(1))
         self.assertIs(len(result), 1)
 
+        # Samples are selected deterministically for a given seed, even if
+        # few samples follow the random pivot
+        for seed in range(10):
+            view = self.dataset.take(2, seed=seed)
+            self.assertEqual(len(view), 2)
+            self.assertListEqual(
+                [s.id for s in view],
+                [s.id for s in self.dataset.take(2, seed=seed)],
+            )
+
+    @drop_datasets
+    def test_take_wraparound(self):
+        dataset = fo.Dataset()
+        dataset.add_samples(
+            [fo.Sample(filepath="image%d.png" % i, num=i) for i in range(10)]
+        )
+
+        # Exactly `size` samples are returned, wrapping around the random
+        # pivot if necessary
+        for seed in range(10):
+            self.assertEqual(len(dataset.take(5, seed=seed)), 5)
+            self.assertEqual(len(dataset.take(10, seed=seed)), 10)
+            self.assertEqual(len(dataset.take(20, seed=seed)), 10)
+
+            view = dataset.match(F("num") < 3).take(2, seed=seed)
+            self.assertEqual(len(view), 2)
+            self.assertTrue(all(s.num < 3 for s in view))
+
+        # The wraparound is resolved once and is reused until the dataset is
+        # modified, so views remain full after samples are deleted
+        view = dataset.take(5, seed=51)
+        self.assertEqual(len(view), 5)
+        rand_query = view._stages[-1]._rand_query
+        self.assertEqual(len(view), 5)
+        self.assertIs(view._stages[-1]._rand_query, rand_query)
+
+        dataset.remove_samples([s.id for s in view])
+        self.assertEqual(len(view), 5)
+
+    @drop_datasets
+    def test_shuffle(self):
+        dataset = fo.Dataset()
+        dataset.add_samples(
+            [fo.Sample(filepath="image%d.png" % i) for i in range(10)]
+        )
+
+        order1 = [s.id for s in dataset.shuffle(seed=1)]
+        order2 = [s.id for s in dataset.shuffle(seed=2)]
+        self.assertListEqual(order1, [s.id for s in dataset.shuffle(seed=1)])
+        self.assertSetEqual(set(order1), set(order2))
+
+        # Different seeds induce different orders, not rotations of one order
+        idx = order2.index(order1[0])
+        self.assertNotEqual(order1, order2[idx:] + order2[:idx])
+
     def test_uuids(self):
         stage = fosg.Take(1)
         stage_dict = stage._serialize()
@@ -782,6 +888,150 @@ class ViewStageTests(unittest.TestCase):
         )
 
 
+class SetValuesTests(unittest.TestCase):
+    @drop_datasets
+    def setUp(self):
+        self.dataset = fo.Dataset()
+        self.dataset.add_samples(
+            [
+                fo.Sample(filepath="image%d.png" % i, tags=["train"], num=i)
+                for i in range(4)
+            ]
+        )
+
+    def test_set_values(self):
+        view = self.dataset.sort_by("filepath", reverse=True)
+        view.set_values("score", [0.1, 0.2, 0.3, 0.4])
+
+        self.assertIsInstance(
+            self.dataset.get_field_schema()["score"], fo.FloatField
+        )
+        scores = [s.score for s in self.dataset.sort_by("filepath")]
+        self.assertListEqual(scores, [0.4, 0.3, 0.2, 0.1])
+
+        sample = self.dataset.sort_by("filepath").first()
+        self.dataset.set_values("score", {sample.id: 1.0})
+        self.assertEqual(sample.score, 1.0)
+
+        with self.assertRaises(ValueError):
+            view.set_values("score", [0.1])
+
+        with self.assertRaises(ValueError):
+            view.set_values("other", [0.1] * 4, expand_schema=False)
+
+    def test_set_field(self):
+        self.dataset.set_field("double", F("num") * 2)
+        self.assertIsInstance(
+            self.dataset.get_field_schema()["double"], fo.IntField
+        )
+        self.assertSetEqual(self.dataset.distinct("double"), {0, 2, 4, 6})
+
+        view = self.dataset.match(F("num") > 1)
+        view.set_field("num", 0)
+        self.assertListEqual(sorted(s.num for s in self.dataset), [0, 0, 0, 1])
+
+
+class MaterializeTests(unittest.TestCase):
+    @drop_datasets
+    def setUp(self):
+        self.dataset = fo.Dataset()
+        self.dataset.add_samples(
+            [
+                fo.Sample(filepath="image%d.png" % i, tags=["train"], num=i)
+                for i in range(4)
+            ]
+        )
+
+    def test_materialize(self):
+        view = self.dataset.match(F("num") > 0).sort_by("num", reverse=True)
+        view.materialize()
+        self.assertTrue(view.is_materialized)
+        self.assertIn("materialized.", view._aggregation_collection.name)
+
+        self.assertEqual(len(view), 3)
+        self.assertListEqual([s.num for s in view], [3, 2, 1])
+        self.assertListEqual(view.values("num"), [3, 2, 1])
+
+        # Derived views are served from the materialized collection
+        derived = view.skip(1).limit(1)
+        self.assertTrue(derived.is_materialized)
+        self.assertListEqual([s.num for s in derived], [2])
+
+        view.dematerialize()
+        self.assertFalse(view.is_materialized)
+        self.assertListEqual([s.num for s in view], [3, 2, 1])
+
+    def test_materialize_order(self):
+        # The sort key is removed and the fields are selected after the sort
+        view = (
+            self.dataset.shuffle(seed=51)
+            .select_fields("num")
+            .skip(1)
+            .materialize()
+        )
+        self.assertTrue(view._materialization.sort is not None)
+
+        view.dematerialize()
+        nums = [s.num for s in view]
+
+        view.materialize()
+        self.assertListEqual([s.num for s in view], nums)
+        self.assertNotIn("_materialized_index", view.first().to_mongo_dict())
+
+    def test_materialize_pipeline(self):
+        view = self.dataset.match(F("num") > 0).limit(2)
+        num_stages = len(view._pipeline())
+
+        view.materialize(ttl=0.1)
+        self.assertLess(len(view._pipeline()), num_stages)
+
+        # The pipelines of stale materializations include all stages
+        time.sleep(0.2)
+        self.assertEqual(len(view._pipeline()), num_stages)
+
+    def test_materialize_name(self):
+        view1 = self.dataset.match(F("num") > 1).materialize(name="test")
+        view2 = self.dataset.match(F("num") > 2)
+
+        with self.assertRaises(ValueError):
+            view2.materialize(name="test")
+
+        self.assertTrue(view1.is_materialized)
+        self.assertEqual(len(view1), 2)
+
+        view1.dematerialize()
+        view2.materialize(name="test")
+        self.assertEqual(len(view2), 1)
+
+    def test_materialize_stale(self):
+        view = self.dataset.match(F("num") > 0).materialize()
+
+        sample = self.dataset.sort_by("num").first()
+        sample["num"] = 4
+        sample.save()
+
+        self.assertFalse(view.is_materialized)
+        self.assertEqual(len(view), 4)
+
+        view.materialize()
+        self.dataset.add_sample(fo.Sample(filepath="image4.png", num=5))
+        self.assertFalse(view.is_materialized)
+        self.assertEqual(len(view), 5)
+
+        view.materialize()
+        self.dataset.set_field("num", 0)
+        self.assertFalse(view.is_materialized)
+        self.assertEqual(len(view), 0)
+
+    def test_materialize_ttl(self):
+        view = self.dataset.match(F("num") > 0).materialize(ttl=0.1)
+        self.assertTrue(view.is_materialized)
+
+        time.sleep(0.2)
+        self.assertFalse(view.is_materialized)
+        self.assertEqual(len(view), 3)
+
+
 if __name__ == "__main__":
     fo.config.show_progress_bars = False
     unittest.main(verbosity=2)